@@ -2,6 +2,7 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.db.models import Count
+from tutorials.calendar import forget_tokens
 from .models import User, Zone, Woreda, Kebele, College, Department
 
 # Custom Filters
@@ -136,7 +137,10 @@ class CustomUserAdmin(UserAdmin):
     activate_users.short_description = "Activate selected users"
     
     def deactivate_users(self, request, queryset):
+        user_ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_active=False)
+        # update() skips post_save, so cached calendar feed tokens are dropped here
+        forget_tokens(user_ids)
         self.message_user(request, f'{updated} users were deactivated.')
     deactivate_users.short_description = "Deactivate selected users"
 
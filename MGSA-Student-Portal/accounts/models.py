@@ -1,9 +1,13 @@
 # accounts/models.py
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
+from django.db.models.signals import post_save
+from django.dispatch import receiver
 from django.utils import timezone
 from django.conf import settings
 
+from .tracking import TrackedFieldsMixin
+
 '''class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         if not email:
@@ -57,7 +61,7 @@ class UserManager(BaseUserManager):
 
         return self.create_user(email, password, **extra_fields)
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(TrackedFieldsMixin, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = [
         ('Student', 'Student'),
         ('Executive', 'Executive'),
@@ -123,6 +127,9 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    # Fields whose changes are reported to post_save receivers
+    tracked_fields = ('role', 'executive_title', 'first_name', 'last_name', 'email', 'gender', 'department', 'is_active')
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
 
@@ -276,4 +283,18 @@ class Executive(models.Model):
     
     class Meta:
         verbose_name = 'Executive Profile'
-        verbose_name_plural = 'Executive Profiles'   
+        verbose_name_plural = 'Executive Profiles'
+
+
+# Keep Student/Executive profiles in step with the user's role
+@receiver(post_save, sender=User)
+def sync_profiles_on_user_save(sender, instance, created, **kwargs):
+    """
+    Only act when a profile-relevant field changed, so saves such as
+    last_login updates on login don't touch the profile tables
+    """
+    from .services import PROFILE_TRIGGER_FIELDS, sync_user_profiles
+
+    changed_fields = getattr(instance, 'changed_fields', set())
+    if created or changed_fields & PROFILE_TRIGGER_FIELDS:
+        sync_user_profiles(instance, created=created, changed_fields=changed_fields)
@@ -0,0 +1,96 @@
+# accounts/services.py
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from executive.models import Executive
+from students.models import Student
+
+# User fields that feed Student.calculate_profile_completion()
+PROFILE_COMPLETION_FIELDS = {'first_name', 'last_name', 'email', 'gender'}
+
+# Any change outside these fields leaves the profiles untouched
+PROFILE_TRIGGER_FIELDS = {'role', 'executive_title'} | PROFILE_COMPLETION_FIELDS
+
+
+def sync_user_profiles(user, created=False, changed_fields=()):
+    """Create or update the Student/Executive profile of a user after it changed"""
+    changed_fields = set(changed_fields)
+    role_changed = created or 'role' in changed_fields
+
+    with transaction.atomic():
+        if user.role == 'Student':
+            if role_changed:
+                ensure_student_profile(user)
+            elif changed_fields & PROFILE_COMPLETION_FIELDS:
+                update_profile_completion(user)
+        elif role_changed:
+            # Keep the profile for history but take it out of active listings
+            Student.objects.filter(user=user, is_active_student=True).update(is_active_student=False)
+
+        if user.role == 'Executive':
+            if role_changed:
+                ensure_executive_profile(user)
+            elif 'executive_title' in changed_fields:
+                update_executive_title(user)
+
+
+def ensure_student_profile(user):
+    year_of_study = user.year_of_study if user.year_of_study in dict(Student.YEAR_CHOICES) else 'Fresh'
+    student, created = Student.objects.get_or_create(
+        user=user,
+        defaults={'year_of_study': year_of_study}
+    )
+    if not created and not student.is_active_student:
+        Student.objects.filter(pk=student.pk).update(is_active_student=True)
+    return student
+
+
+def update_profile_completion(user):
+    student = Student.objects.filter(user=user).first()
+    if student is None:
+        return ensure_student_profile(user)
+
+    student.user = user
+    student.calculate_profile_completion()
+    Student.objects.filter(pk=student.pk).update(
+        profile_completion_percentage=student.profile_completion_percentage
+    )
+    return student
+
+
+def executive_title_for(user):
+    """Map the free-text User.executive_title onto an Executive title choice"""
+    title = (user.executive_title or '').strip()
+    for value, label in Executive.EXECUTIVE_TITLES:
+        if title.lower() in (value, label.lower()):
+            return value
+    return 'general_member'
+
+
+def ensure_executive_profile(user):
+    executive = Executive.objects.filter(user=user).first()
+    if executive is not None:
+        return executive
+
+    today = timezone.now().date()
+    return Executive.objects.create(
+        user=user,
+        executive_title=executive_title_for(user),
+        committee='executive_committee',
+        term_start_date=today,
+        term_end_date=today + timedelta(days=365),  # 1 year term
+    )
+
+
+def update_executive_title(user):
+    executive = Executive.objects.filter(user=user).first()
+    if executive is None:
+        return ensure_executive_profile(user)
+
+    title = executive_title_for(user)
+    if executive.executive_title != title:
+        executive.executive_title = title
+        executive.save()
+    return executive
@@ -1,3 +1,64 @@
+import json
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from executive.models import Executive
+from students.models import Student
+from .models import User
+
+
+class UserProfileSyncTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='student@example.com',
+            password='secret-pass-123',
+            first_name='Abdi',
+            last_name='Kedir',
+            gender='Male',
+            role='Student',
+        )
+
+    def test_student_profile_created_with_user(self):
+        self.assertTrue(Student.objects.filter(user=self.user).exists())
+
+    def test_login_does_not_touch_profile_tables(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/api/auth/api/login/',
+                data=json.dumps({'email': 'student@example.com', 'password': 'secret-pass-123'}),
+                content_type='application/json',
+                secure=True,
+            )
+
+        self.assertEqual(response.status_code, 200)
+        sql = [query['sql'] for query in queries.captured_queries]
+        self.assertFalse([q for q in sql if 'students_student' in q or 'executive_executive' in q])
+        # user lookup, session create (with savepoints), last_login update
+        # and session update (with savepoints)
+        self.assertEqual(len(sql), 9)
+
+    def test_unrelated_save_runs_no_profile_queries(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.woreda = 'Chiro'
+        with self.assertNumQueries(1):
+            user.save()
+
+    def test_role_change_creates_executive_profile(self):
+        user = User.objects.get(pk=self.user.pk)
+        user.role = 'Executive'
+        user.executive_title = 'Secretary'
+        user.save()
+
+        executive = Executive.objects.get(user=user)
+        self.assertEqual(executive.executive_title, 'secretary')
+        self.assertFalse(Student.objects.get(user=user).is_active_student)
+
+    def test_name_change_updates_profile_completion(self):
+        Student.objects.filter(user=self.user).update(profile_completion_percentage=0)
+        user = User.objects.get(pk=self.user.pk)
+        user.first_name = 'Chaltu'
+        user.save()
 
-# Create your tests here.
+        self.assertEqual(Student.objects.get(user=user).profile_completion_percentage, 62)
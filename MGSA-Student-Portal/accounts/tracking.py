@@ -0,0 +1,63 @@
+# accounts/tracking.py
+import copy
+
+
+class TrackedFieldsMixin:
+    """
+    Remember the database values of ``tracked_fields`` so post_save receivers
+    can tell what actually changed.
+
+    After save(), ``instance.changed_fields`` holds the tracked fields that were
+    written with a new value and ``instance.previous_values`` their values as
+    loaded. A newly created instance reports all of them as changed.
+    """
+    tracked_fields = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._snapshot_tracked_fields()
+        return instance
+
+    def _snapshot_tracked_fields(self):
+        # Deferred fields are not in __dict__ and are left out of the snapshot.
+        # Lists and dicts (JSONField) are copied so in-place edits show up as changes.
+        self._tracked_values = {
+            field: copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+            for field, value in self.__dict__.items() if field in self.tracked_fields
+        }
+
+    def get_tracked_values(self):
+        """Current values of the tracked fields"""
+        return {field: self.__dict__.get(field) for field in self.tracked_fields}
+
+    def get_previous_values(self):
+        """Tracked values as loaded from the database, empty for new instances"""
+        if self._state.adding:
+            return {}
+        return dict(getattr(self, '_tracked_values', {}))
+
+    def get_changed_fields(self):
+        """Tracked fields whose current value differs from the loaded one"""
+        if self._state.adding or not hasattr(self, '_tracked_values'):
+            return set(self.tracked_fields)
+
+        changed = set()
+        for field in self.tracked_fields:
+            if field not in self.__dict__:
+                continue
+            if field not in self._tracked_values or self._tracked_values[field] != self.__dict__[field]:
+                changed.add(field)
+        return changed
+
+    def save(self, *args, **kwargs):
+        changed = self.get_changed_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            changed &= set(update_fields)
+        self.changed_fields = changed
+        self.previous_values = self.get_previous_values()
+
+        super().save(*args, **kwargs)
+
+        self._snapshot_tracked_fields()
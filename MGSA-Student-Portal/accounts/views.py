@@ -556,6 +556,7 @@ def register_tutorial(request):
             tutorial_id = request.POST.get('tutorial')
             
             from tutorials.models import Tutorial, TutorialRegistration
+            from tutorials.services import RegistrationError, register_student
             
             tutorial = Tutorial.objects.get(id=tutorial_id, is_active=True)
             
@@ -565,26 +566,23 @@ def register_tutorial(request):
                 tutorial=tutorial
             ).first()
             
-            if existing_registration:
-                if existing_registration.status == 'registered':
-                    messages.warning(request, 'You are already registered for this tutorial.')
-                elif existing_registration.status == 'cancelled':
-                    existing_registration.status = 'registered'
-                    existing_registration.save()
-                    messages.success(request, 'Tutorial registration re-activated!')
+            if existing_registration and existing_registration.status != 'cancelled':
+                messages.warning(request, 'You are already registered for this tutorial.')
                 return redirect('student-dashboard')
             
-            # Create new registration
-            TutorialRegistration.objects.create(
-                student=request.user,
-                tutorial=tutorial,
-                status='registered'
-            )
+            # Takes a seat, checking capacity and timetable clashes;
+            # a cancelled registration is re-activated
+            register_student(request.user, tutorial, allow_clash=bool(request.POST.get('allow_clash')))
             
-            messages.success(request, f'Successfully registered for {tutorial.title}!')
+            if existing_registration:
+                messages.success(request, 'Tutorial registration re-activated!')
+            else:
+                messages.success(request, f'Successfully registered for {tutorial.title}!')
             
         except Tutorial.DoesNotExist:
             messages.error(request, 'Tutorial not found or not available.')
+        except RegistrationError as e:
+            messages.error(request, str(e))
         except Exception as e:
             messages.error(request, f'Error registering for tutorial: {str(e)}')
         
@@ -597,6 +595,7 @@ def cancel_tutorial_registration(request, registration_id):
     """Cancel tutorial registration"""
     try:
         from tutorials.models import TutorialRegistration
+        from tutorials.services import transition_registration
         
         registration = TutorialRegistration.objects.get(
             id=registration_id, 
@@ -604,8 +603,8 @@ def cancel_tutorial_registration(request, registration_id):
             status='registered'
         )
         
-        registration.status = 'cancelled'
-        registration.save()
+        # Frees the seat and updates the tutorial's counters
+        transition_registration(registration, 'cancelled')
         
         messages.success(request, 'Tutorial registration cancelled successfully.')
         
@@ -12,13 +12,22 @@ from reportlab.lib.pagesizes import letter, A4
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
+import base64
+import binascii
 import io
 import json
 
 from accounts.models import User
 from posts.models import Post, Like, Comment
+from posts.trending import top_posts
 from resources.models import Resource
 from tutorials.models import Tutorial, TutorialRegistration
+from students.importers import StudentImporter, iter_spreadsheet_rows
+from students.models import Student
+from students.transcripts import get_transcript_pdf
+from tutorials.bulk import create_tutorials
+from .counters import last_report
+from .models import ContentIndex
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
@@ -71,22 +80,36 @@ def admin_dashboard(request):
         avg_likes_per_post=Count('likes') / Count('id', distinct=True)
     )
     
-    # Top posts by likes
-    top_posts = Post.objects.annotate(
-        like_count=Count('likes'),
-        comment_count=Count('comments')
-    ).select_related('author').order_by('-like_count')[:10]
-    
-    top_posts_data = []
-    for post in top_posts:
-        top_posts_data.append({
-            'id': post.id,
-            'title': post.title,
-            'author': f"{post.author.first_name} {post.author.last_name}",
-            'likes': post.like_count,
-            'comments': post.comment_count,
-            'created_at': post.created_at
-        })
+    # Hottest posts overall and per author role, from the in-memory top list
+    top_by_role = {role: top_posts.top(role, limit=10) for role in [None, 'Executive', 'Admin']}
+    top_post_ids = {post_id for ranked in top_by_role.values() for post_id, _ in ranked}
+    top_post_objects = Post.objects.select_related('author').in_bulk(top_post_ids)
+    engagement = {
+        entry['object_id']: entry
+        for entry in ContentIndex.objects.filter(
+            content_type='post', object_id__in=top_post_ids
+        ).values('object_id', 'like_count', 'comment_count')
+    }
+    
+    def top_posts_data_for(role):
+        data = []
+        for post_id, score in top_by_role[role]:
+            post = top_post_objects.get(post_id)
+            if post is None:
+                continue
+            data.append({
+                'id': post.id,
+                'title': post.title,
+                'author': f"{post.author.first_name} {post.author.last_name}",
+                'likes': engagement.get(post.id, {}).get('like_count', 0),
+                'comments': engagement.get(post.id, {}).get('comment_count', 0),
+                'views': post.view_count,
+                'hot_score': round(score, 2),
+                'created_at': post.created_at
+            })
+        return data
+    
+    top_posts_data = top_posts_data_for(None)
     
     # Resource Analytics
     resource_stats = Resource.objects.aggregate(
@@ -161,6 +184,9 @@ def admin_dashboard(request):
             },
             'top_content': {
                 'posts': top_posts_data,
+                'posts_by_author_role': {
+                    role: top_posts_data_for(role) for role in ['Executive', 'Admin']
+                },
                 'resources': popular_resources_data,
                 'tutorials': popular_tutorials_data,
             },
@@ -291,6 +317,100 @@ def user_management(request):
         }
     })
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_students(request):
+    """Bulk import students from an uploaded CSV or XLSX file"""
+    if request.user.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Admin privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({
+            'success': False,
+            'message': 'No file uploaded'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not upload.name.lower().endswith(('.csv', '.xlsx')):
+        return Response({
+            'success': False,
+            'message': 'Only CSV and XLSX files are supported'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+    importer = StudentImporter(dry_run=dry_run)
+    summary = importer.run(iter_spreadsheet_rows(upload.file, upload.name))
+    
+    return Response({
+        'success': True,
+        'message': f"{'Validated' if dry_run else 'Imported'} {summary['valid'] if dry_run else summary['created']} students",
+        'summary': summary
+    })
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_tutorials(request):
+    """Bulk create tutorials from an uploaded CSV or XLSX file"""
+    if request.user.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Admin privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    if not upload:
+        return Response({
+            'success': False,
+            'message': 'No file uploaded'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    if not upload.name.lower().endswith(('.csv', '.xlsx')):
+        return Response({
+            'success': False,
+            'message': 'Only CSV and XLSX files are supported'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+    skip_invalid = str(request.data.get('skip_invalid', '')).lower() in ['1', 'true', 'yes']
+    summary = create_tutorials(
+        iter_spreadsheet_rows(upload.file, upload.name),
+        request.user,
+        dry_run=dry_run,
+        skip_invalid=skip_invalid
+    )
+    
+    return Response({
+        'success': dry_run or bool(summary['created']) or not summary['invalid'],
+        'message': f"{'Validated' if dry_run else 'Created'} {summary['valid'] if dry_run else summary['created']} tutorials",
+        'summary': summary
+    })
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def student_transcript(request, user_id):
+    """Download any student's transcript as PDF"""
+    if request.user.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Admin privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        student = Student.objects.select_related('user').get(user_id=user_id)
+    except Student.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Student not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    filename, pdf = get_transcript_pdf(student)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def update_user_role(request, user_id):
@@ -507,6 +627,92 @@ def content_management(request):
         'content': response_data
     })
 
+def encode_timeline_cursor(entry):
+    """Encode the (created_at, id) position of a timeline entry"""
+    raw = f"{entry.created_at.isoformat()}|{entry.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_timeline_cursor(cursor):
+    """Decode a timeline cursor, returns (created_at, id) or None if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, entry_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(entry_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def content_timeline(request):
+    """Admin content timeline - posts, resources and tutorials merged by date"""
+    if request.user.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Admin privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    content_type = request.GET.get('type', 'all')  # posts, resources, tutorials, all
+    visibility = request.GET.get('visibility')  # public, private
+    cursor = request.GET.get('cursor')
+    try:
+        page_size = min(max(int(request.GET.get('page_size', 20)), 1), 100)
+    except ValueError:
+        page_size = 20
+    
+    entries = ContentIndex.objects.select_related('author')
+    
+    if content_type != 'all':
+        type_map = {'posts': 'post', 'resources': 'resource', 'tutorials': 'tutorial'}
+        if content_type not in type_map:
+            return Response({
+                'success': False,
+                'message': 'Invalid content type'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        entries = entries.filter(content_type=type_map[content_type])
+    
+    if visibility in ['public', 'private']:
+        entries = entries.filter(is_public=(visibility == 'public'))
+    
+    if cursor:
+        position = decode_timeline_cursor(cursor)
+        if position is None:
+            return Response({
+                'success': False,
+                'message': 'Invalid cursor'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        created_at, entry_id = position
+        entries = entries.filter(
+            Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=entry_id)
+        )
+    
+    # Fetch one extra row to know whether another page exists
+    page_entries = list(entries.order_by('-created_at', '-id')[:page_size + 1])
+    has_more = len(page_entries) > page_size
+    page_entries = page_entries[:page_size]
+    
+    timeline_data = []
+    for entry in page_entries:
+        timeline_data.append({
+            'type': entry.content_type,
+            'id': entry.object_id,
+            'title': entry.title,
+            'author': f"{entry.author.first_name} {entry.author.last_name}",
+            'author_role': entry.author.role,
+            'is_public': entry.is_public,
+            'likes_count': entry.like_count,
+            'comments_count': entry.comment_count,
+            'download_count': entry.download_count,
+            'registration_count': entry.registration_count,
+            'created_at': entry.created_at
+        })
+    
+    return Response({
+        'success': True,
+        'timeline': timeline_data,
+        'next_cursor': encode_timeline_cursor(page_entries[-1]) if has_more else None,
+        'page_size': page_size
+    })
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def delete_content(request, content_type, content_id):
@@ -833,6 +1039,21 @@ def export_posts_excel(posts):
     wb.save(response)
     return response
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def counter_drift(request):
+    """Drift found by the last reconcile_counters run"""
+    if request.user.role != 'Admin':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Admin privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    return Response({
+        'success': True,
+        'report': last_report()
+    })
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def system_settings(request):
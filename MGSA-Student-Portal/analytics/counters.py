@@ -0,0 +1,165 @@
+# analytics/counters.py
+"""
+Reconciliation of denormalized counters.
+
+Each app lists its counters in a ``counters`` module with ``register``,
+giving the model field and the aggregate that is its source of truth.
+Reconciling a counter is one grouped query that reads every row's stored
+value next to the recomputed one, then a bulk_update of just the rows that
+drifted. Each run is saved as a CounterDriftReport row, the last
+KEEP_REPORTS of them kept, so a counter that keeps drifting points at a
+code path that misses an update.
+"""
+import time
+
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from posts.models import Comment, Like
+from resources.models import Resource
+from tutorials.models import Tutorial
+
+from .models import ContentIndex, CounterDriftReport
+
+# Drifted row ids listed per counter in a report
+SAMPLE_SIZE = 20
+
+# Runs kept in CounterDriftReport
+KEEP_REPORTS = 100
+
+COUNTERS = {}
+
+
+class Counter:
+    def __init__(self, name, model, field, expected, queryset=None, on_repair=None):
+        self.name = name
+        self.model = model
+        self.field = field
+        self.expected = expected
+        self.queryset = queryset
+        self.on_repair = on_repair
+
+    def get_queryset(self):
+        return self.queryset() if self.queryset else self.model._default_manager.all()
+
+    def find_drift(self):
+        """[(pk, stored, expected)] of rows whose stored value is wrong"""
+        rows = self.get_queryset().annotate(
+            expected_value=self.expected
+        ).values_list('pk', self.field, 'expected_value').order_by()
+        checked = 0
+        drifted = []
+        for pk, stored, expected in rows.iterator(chunk_size=2000):
+            checked += 1
+            expected = expected or 0
+            if stored != expected:
+                drifted.append((pk, stored, expected))
+        return checked, drifted
+
+    def repair(self, drifted, batch_size=1000):
+        objects = []
+        for pk, _, expected in drifted:
+            obj = self.model(pk=pk)
+            setattr(obj, self.field, expected)
+            objects.append(obj)
+        with transaction.atomic():
+            self.model._default_manager.bulk_update(objects, [self.field], batch_size=batch_size)
+            if self.on_repair:
+                self.on_repair([pk for pk, _, _ in drifted])
+
+
+def register(name, model, field, expected, queryset=None, on_repair=None):
+    """
+    Register ``model.field`` as a counter. ``expected`` is an expression
+    annotated on the model's rows, usually a filtered Count; ``queryset``
+    optionally limits the rows checked and ``on_repair`` is called with the
+    repaired ids.
+    """
+    COUNTERS[name] = Counter(name, model, field, expected, queryset, on_repair)
+
+
+def autodiscover():
+    autodiscover_modules('counters')
+
+
+def reconcile(names=None, dry_run=False, batch_size=1000):
+    """
+    Check the named counters, or all of them, repairing drifted rows unless
+    ``dry_run``. Returns the drift report, which is also saved.
+    """
+    autodiscover()
+    unknown = set(names or []) - set(COUNTERS)
+    if unknown:
+        raise KeyError(f"Unknown counters: {', '.join(sorted(unknown))}")
+
+    ran_at = timezone.now()
+    report = {'ran_at': ran_at.isoformat(), 'dry_run': dry_run, 'counters': {}}
+    for name in names or sorted(COUNTERS):
+        counter = COUNTERS[name]
+        started = time.monotonic()
+        checked, drifted = counter.find_drift()
+        if drifted and not dry_run:
+            counter.repair(drifted, batch_size=batch_size)
+        report['counters'][name] = {
+            'checked': checked,
+            'drifted': len(drifted),
+            'repaired': 0 if dry_run else len(drifted),
+            'total_drift': sum(abs((stored or 0) - expected) for _, stored, expected in drifted),
+            'max_drift': max((abs((stored or 0) - expected) for _, stored, expected in drifted), default=0),
+            'sample': [
+                {'id': pk, 'stored': stored, 'expected': expected}
+                for pk, stored, expected in drifted[:SAMPLE_SIZE]
+            ],
+            'seconds': round(time.monotonic() - started, 3),
+        }
+
+    CounterDriftReport.objects.create(ran_at=ran_at, dry_run=dry_run, counters=report['counters'])
+    stale = CounterDriftReport.objects.values_list('pk', flat=True)[KEEP_REPORTS:]
+    CounterDriftReport.objects.filter(pk__in=list(stale)).delete()
+    return report
+
+
+def last_report():
+    """
+    The latest run, with the last results of counters it didn't check
+    carried over from earlier runs. None before the first run.
+    """
+    reports = list(CounterDriftReport.objects.all())
+    if not reports:
+        return None
+    counters = {}
+    for report in reversed(reports):
+        counters.update(report.counters)
+    return {'ran_at': reports[0].ran_at.isoformat(), 'dry_run': reports[0].dry_run, 'counters': counters}
+
+
+# The content index copies counters that are also changed by .update() and
+# F() expressions, which its post_save receivers never see
+def _count_of(model, field):
+    return Subquery(
+        model.objects.filter(**{field: OuterRef('object_id')}).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')[:1]
+    )
+
+
+def _value_of(model, field):
+    return Subquery(model.objects.filter(pk=OuterRef('object_id')).values(field)[:1])
+
+
+def _register_content_index():
+    for content_type, field, expected in [
+        ('post', 'like_count', _count_of(Like, 'post_id')),
+        ('post', 'comment_count', _count_of(Comment, 'post_id')),
+        ('resource', 'download_count', _value_of(Resource, 'download_count')),
+        ('tutorial', 'registration_count', _value_of(Tutorial, 'current_registrations')),
+    ]:
+        register(
+            f'content_index.{field}', ContentIndex, field, expected,
+            queryset=lambda content_type=content_type: ContentIndex.objects.filter(content_type=content_type)
+        )
+
+
+_register_content_index()
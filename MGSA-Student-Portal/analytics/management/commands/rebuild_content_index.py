@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from analytics.models import ContentIndex
+from posts.models import Post
+from resources.models import Resource
+from tutorials.models import Tutorial
+
+class Command(BaseCommand):
+    help = 'Rebuild the content timeline index from posts, resources and tutorials'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        sources = [
+            ('post', Post.objects.annotate(
+                like_total=Count('likes', distinct=True),
+                comment_total=Count('comments', distinct=True)
+            )),
+            ('resource', Resource.objects.all()),
+            ('tutorial', Tutorial.objects.all()),
+        ]
+        
+        with transaction.atomic():
+            ContentIndex.objects.all().delete()
+            
+            for content_type, queryset in sources:
+                entries = []
+                for instance in queryset.iterator(chunk_size=batch_size):
+                    values = ContentIndex.values_for(content_type, instance)
+                    if content_type == 'post':
+                        values['like_count'] = instance.like_total
+                        values['comment_count'] = instance.comment_total
+                    entries.append(ContentIndex(
+                        content_type=content_type,
+                        object_id=instance.pk,
+                        **values
+                    ))
+                ContentIndex.objects.bulk_create(entries, batch_size=batch_size)
+                
+                self.stdout.write(f"Indexed {len(entries)} {content_type}s")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Content index rebuilt. Total entries: {ContentIndex.objects.count()}')
+        )
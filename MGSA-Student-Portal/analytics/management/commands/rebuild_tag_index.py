@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from analytics.models import TaggedItem
+from analytics.tags import clear_tag_cloud, normalize, tag_ids
+from posts.models import Post
+from resources.models import Resource
+
+class Command(BaseCommand):
+    help = 'Rebuild the tag index from the tags of posts and resources'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        
+        sources = [
+            ('post', Post.objects.only('id', 'tags', 'is_public')),
+            ('resource', Resource.objects.only('id', 'tags', 'is_public')),
+        ]
+        
+        with transaction.atomic():
+            TaggedItem.objects.all().delete()
+            
+            for content_type, queryset in sources:
+                tagged = [
+                    (instance.pk, instance.is_public, normalize(instance.tags))
+                    for instance in queryset.iterator(chunk_size=batch_size)
+                ]
+                ids = tag_ids({slug: name for _, _, names in tagged for slug, name in names.items()})
+                items = [
+                    TaggedItem(tag_id=ids[slug], content_type=content_type, object_id=object_id, is_public=is_public)
+                    for object_id, is_public, names in tagged
+                    for slug in names
+                ]
+                TaggedItem.objects.bulk_create(items, batch_size=batch_size)
+                clear_tag_cloud(content_type)
+                
+                self.stdout.write(f"Indexed {len(items)} tags on {len(tagged)} {content_type}s")
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Tag index rebuilt. Total entries: {TaggedItem.objects.count()}')
+        )
@@ -0,0 +1,54 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+
+from analytics.counters import COUNTERS, autodiscover, reconcile
+
+class Command(BaseCommand):
+    help = 'Recompute denormalized counters from their source tables and repair the rows that drifted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('counters', nargs='*', help='Counters to check (default: all)')
+        parser.add_argument('--list', action='store_true', help='List the registered counters')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without repairing it')
+        parser.add_argument('--json', action='store_true', help='Print the drift report as JSON')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options['list']:
+            autodiscover()
+            for name, counter in sorted(COUNTERS.items()):
+                self.stdout.write(f'{name}  ({counter.model._meta.label}.{counter.field})')
+            return
+
+        started = time.monotonic()
+        try:
+            report = reconcile(
+                options['counters'] or None,
+                dry_run=options['dry_run'],
+                batch_size=options['batch_size']
+            )
+        except KeyError as e:
+            raise CommandError(e.args[0])
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, cls=DjangoJSONEncoder, indent=2))
+            return
+
+        drifted = 0
+        for name, result in report['counters'].items():
+            drifted += result['drifted']
+            line = f"{name}: {result['drifted']} of {result['checked']} rows drifted"
+            if result['drifted']:
+                line += f" (total {result['total_drift']}, max {result['max_drift']})"
+            self.stdout.write(self.style.WARNING(line) if result['drifted'] else line)
+
+        verb = 'Found' if options['dry_run'] else 'Repaired'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{verb} {drifted} drifted rows across {len(report['counters'])} counters "
+                f"in {time.monotonic() - started:.2f}s"
+            )
+        )
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:12
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentIndex',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('post', 'Post'), ('resource', 'Resource'), ('tutorial', 'Tutorial')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('title', models.CharField(max_length=200)),
+                ('is_public', models.BooleanField(default=True)),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('download_count', models.PositiveIntegerField(default=0)),
+                ('registration_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indexed_content', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Content Index Entry',
+                'verbose_name_plural': 'Content Index',
+                'ordering': ['-created_at', '-id'],
+                'indexes': [models.Index(fields=['-created_at', '-id'], name='analytics_c_created_422834_idx'), models.Index(fields=['content_type', '-created_at', '-id'], name='analytics_c_content_db283a_idx')],
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0002_contentindex'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('slug', models.SlugField(unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['slug'],
+            },
+        ),
+        migrations.CreateModel(
+            name='TaggedItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('content_type', models.CharField(choices=[('post', 'Post'), ('resource', 'Resource')], max_length=10)),
+                ('object_id', models.PositiveIntegerField()),
+                ('is_public', models.BooleanField(default=True)),
+                ('tag', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='analytics.tag')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['content_type', 'object_id'], name='analytics_t_content_77a36c_idx')],
+                'unique_together': {('content_type', 'tag', 'object_id')},
+            },
+        ),
+    ]
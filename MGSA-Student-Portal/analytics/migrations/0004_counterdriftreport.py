@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:16
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0003_tags'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CounterDriftReport',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ran_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('dry_run', models.BooleanField(default=False)),
+                ('counters', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+            ],
+            options={
+                'verbose_name': 'Counter Drift Report',
+                'verbose_name_plural': 'Counter Drift Reports',
+                'ordering': ['-ran_at', '-id'],
+            },
+        ),
+    ]
@@ -1,7 +1,15 @@
 from django.db import models
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.utils import timezone
 
+from posts.models import Post, Like, Comment
+from resources.models import Resource
+from tutorials.models import Tutorial
+
 class Feedback(models.Model):
     FEEDBACK_TYPES = [
         ('suggestion', 'Suggestion'),
@@ -234,3 +242,201 @@ class FeedbackResponseTemplate(models.Model):
     
     def __str__(self):
         return self.name
+
+class ContentIndex(models.Model):
+    """Lightweight index of posts, resources and tutorials for merged timelines"""
+    CONTENT_TYPES = [
+        ('post', 'Post'),
+        ('resource', 'Resource'),
+        ('tutorial', 'Tutorial'),
+    ]
+    
+    content_type = models.CharField(max_length=10, choices=CONTENT_TYPES)
+    object_id = models.PositiveIntegerField()
+    title = models.CharField(max_length=200)
+    author = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='indexed_content'
+    )
+    
+    # Posts and resources use is_public, tutorials use is_active
+    is_public = models.BooleanField(default=True)
+    
+    # Denormalized counters
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    download_count = models.PositiveIntegerField(default=0)
+    registration_count = models.PositiveIntegerField(default=0)
+    
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-created_at', '-id']
+        unique_together = ['content_type', 'object_id']
+        indexes = [
+            models.Index(fields=['-created_at', '-id']),
+            models.Index(fields=['content_type', '-created_at', '-id']),
+        ]
+        verbose_name = 'Content Index Entry'
+        verbose_name_plural = 'Content Index'
+    
+    def __str__(self):
+        return f"{self.get_content_type_display()} #{self.object_id} - {self.title}"
+    
+    @classmethod
+    def values_for(cls, content_type, instance):
+        """Build the indexed values for a post, resource or tutorial"""
+        if content_type == 'post':
+            return {
+                'title': instance.title,
+                'author_id': instance.author_id,
+                'is_public': instance.is_public,
+                'created_at': instance.created_at,
+            }
+        if content_type == 'resource':
+            return {
+                'title': instance.title,
+                'author_id': instance.uploaded_by_id,
+                'is_public': instance.is_public,
+                'download_count': instance.download_count,
+                'created_at': instance.created_at,
+            }
+        return {
+            'title': instance.title,
+            'author_id': instance.created_by_id,
+            'is_public': instance.is_active,
+            'registration_count': instance.current_registrations,
+            'created_at': instance.created_at,
+        }
+    
+    @classmethod
+    def sync(cls, content_type, instance):
+        """Create or refresh the index entry for a content object"""
+        cls.objects.update_or_create(
+            content_type=content_type,
+            object_id=instance.pk,
+            defaults=cls.values_for(content_type, instance)
+        )
+    
+    @classmethod
+    def adjust(cls, content_type, object_id, **deltas):
+        """Apply counter deltas, e.g. adjust('post', 1, like_count=1)"""
+        updates = {
+            field: Greatest(models.F(field) + delta, 0)
+            for field, delta in deltas.items()
+        }
+        cls.objects.filter(content_type=content_type, object_id=object_id).update(**updates)
+
+class Tag(models.Model):
+    """A post or resource tag, normalized by slug"""
+    name = models.CharField(max_length=50)
+    slug = models.SlugField(max_length=50, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['slug']
+    
+    def __str__(self):
+        return self.name
+
+class TaggedItem(models.Model):
+    """Index of the tags in Post.tags and Resource.tags, see analytics.tags"""
+    CONTENT_TYPES = [
+        ('post', 'Post'),
+        ('resource', 'Resource'),
+    ]
+    
+    tag = models.ForeignKey(Tag, on_delete=models.CASCADE, related_name='items')
+    content_type = models.CharField(max_length=10, choices=CONTENT_TYPES)
+    object_id = models.PositiveIntegerField()
+    is_public = models.BooleanField(default=True)
+    
+    class Meta:
+        unique_together = ['content_type', 'tag', 'object_id']
+        indexes = [
+            models.Index(fields=['content_type', 'object_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tag_id} on {self.content_type} #{self.object_id}"
+
+class CounterDriftReport(models.Model):
+    """Drift found by one reconcile_counters run, see analytics.counters"""
+    ran_at = models.DateTimeField(default=timezone.now)
+    dry_run = models.BooleanField(default=False)
+    # {counter name: {'checked', 'drifted', 'repaired', ...}}
+    counters = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    
+    class Meta:
+        ordering = ['-ran_at', '-id']
+        verbose_name = 'Counter Drift Report'
+        verbose_name_plural = 'Counter Drift Reports'
+    
+    def __str__(self):
+        drifted = sum(result.get('drifted', 0) for result in self.counters.values())
+        return f"{self.ran_at:%Y-%m-%d %H:%M} - {drifted} drifted rows"
+
+
+# Keep the content index in sync with posts, resources and tutorials
+def _sync_content_index(content_type):
+    def handler(sender, instance, **kwargs):
+        ContentIndex.sync(content_type, instance)
+    return handler
+
+def _remove_from_content_index(content_type):
+    def handler(sender, instance, **kwargs):
+        ContentIndex.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+    return handler
+
+for _content_type, _model in [('post', Post), ('resource', Resource), ('tutorial', Tutorial)]:
+    post_save.connect(
+        _sync_content_index(_content_type), sender=_model, weak=False,
+        dispatch_uid=f'content_index_sync_{_content_type}'
+    )
+    post_delete.connect(
+        _remove_from_content_index(_content_type), sender=_model, weak=False,
+        dispatch_uid=f'content_index_remove_{_content_type}'
+    )
+
+@receiver(post_save, sender=Like)
+def index_like_created(sender, instance, created, **kwargs):
+    if created:
+        ContentIndex.adjust('post', instance.post_id, like_count=1)
+
+@receiver(post_delete, sender=Like)
+def index_like_deleted(sender, instance, **kwargs):
+    ContentIndex.adjust('post', instance.post_id, like_count=-1)
+
+@receiver(post_save, sender=Comment)
+def index_comment_created(sender, instance, created, **kwargs):
+    if created:
+        ContentIndex.adjust('post', instance.post_id, comment_count=1)
+
+@receiver(post_delete, sender=Comment)
+def index_comment_deleted(sender, instance, **kwargs):
+    ContentIndex.adjust('post', instance.post_id, comment_count=-1)
+
+# Keep the tag index in sync with the tags of posts and resources
+def _sync_tag_index(content_type):
+    def handler(sender, instance, **kwargs):
+        from .tags import sync_tags
+        sync_tags(content_type, instance)
+    return handler
+
+def _remove_from_tag_index(content_type):
+    def handler(sender, instance, **kwargs):
+        from .tags import remove_tags
+        remove_tags(content_type, instance.pk)
+    return handler
+
+for _content_type, _model in [('post', Post), ('resource', Resource)]:
+    post_save.connect(
+        _sync_tag_index(_content_type), sender=_model, weak=False,
+        dispatch_uid=f'tag_index_sync_{_content_type}'
+    )
+    post_delete.connect(
+        _remove_from_tag_index(_content_type), sender=_model, weak=False,
+        dispatch_uid=f'tag_index_remove_{_content_type}'
+    )
@@ -0,0 +1,133 @@
+# analytics/tags.py
+"""
+Tag index for posts and resources.
+
+Post.tags and Resource.tags stay JSON lists, the source of truth. Each save
+syncs them into TaggedItem rows keyed by (content_type, tag, object_id), so
+filtering by tag is an index lookup on that key instead of parsing the JSON
+of every row. Tags are matched by slug: "Exam Tips" and "exam-tips" are the
+same tag. TagFilterBackend filters list views with ?tags=a,b (any of them)
+or ?tags=a,b&tag_match=all (all of them). Tag counts for the tag cloud are
+kept in the shared default cache, so every worker reads the same cloud,
+and dropped whenever an item's tags change.
+"""
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils.text import slugify
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Tag, TaggedItem
+
+MAX_FILTER_TAGS = 10
+
+TAG_CLOUD_TTL = 600
+TAG_CLOUD_KEY = 'tags:cloud:{}'
+
+
+def normalize(tags):
+    """{slug: name} of a tags value, a list or a comma separated string"""
+    if isinstance(tags, str):
+        tags = tags.split(',')
+    normalized = {}
+    for tag in tags or []:
+        name = str(tag).strip()[:50]
+        slug = slugify(name)[:50]
+        if slug and slug not in normalized:
+            normalized[slug] = name
+    return normalized
+
+
+def tag_ids(names):
+    """{slug: Tag id} for ``names`` ({slug: name}), creating missing tags"""
+    ids = dict(Tag.objects.filter(slug__in=names).values_list('slug', 'id'))
+    missing = [Tag(slug=slug, name=name) for slug, name in names.items() if slug not in ids]
+    if missing:
+        Tag.objects.bulk_create(missing, ignore_conflicts=True)
+        ids.update(Tag.objects.filter(slug__in=[tag.slug for tag in missing]).values_list('slug', 'id'))
+    return ids
+
+
+def sync_tags(content_type, instance):
+    """Make the index rows of a post or resource match its tags"""
+    wanted = normalize(instance.tags)
+    current = {
+        slug: (item_id, is_public)
+        for item_id, slug, is_public in TaggedItem.objects.filter(
+            content_type=content_type, object_id=instance.pk
+        ).values_list('id', 'tag__slug', 'is_public')
+    }
+    stale = [item_id for slug, (item_id, _) in current.items() if slug not in wanted]
+    added = {slug: name for slug, name in wanted.items() if slug not in current}
+    moved = [
+        item_id for slug, (item_id, is_public) in current.items()
+        if slug in wanted and is_public != instance.is_public
+    ]
+    if not (stale or added or moved):
+        return
+
+    with transaction.atomic():
+        if stale:
+            TaggedItem.objects.filter(id__in=stale).delete()
+        if moved:
+            TaggedItem.objects.filter(id__in=moved).update(is_public=instance.is_public)
+        if added:
+            TaggedItem.objects.bulk_create([
+                TaggedItem(tag_id=tag_id, content_type=content_type, object_id=instance.pk, is_public=instance.is_public)
+                for tag_id in tag_ids(added).values()
+            ], ignore_conflicts=True)
+    clear_tag_cloud(content_type)
+
+
+def remove_tags(content_type, object_id):
+    if TaggedItem.objects.filter(content_type=content_type, object_id=object_id).delete()[0]:
+        clear_tag_cloud(content_type)
+
+
+def parse_tag_filter(value):
+    """Slugs of a ?tags= value, at most MAX_FILTER_TAGS"""
+    return list(normalize(value))[:MAX_FILTER_TAGS]
+
+
+def filter_by_tags(queryset, content_type, slugs, match_all=False):
+    """``queryset`` narrowed to items tagged with any, or all, of ``slugs``"""
+    items = TaggedItem.objects.filter(content_type=content_type, tag__slug__in=slugs)
+    if match_all and len(slugs) > 1:
+        items = items.values('object_id').annotate(matched=Count('tag')).filter(matched=len(slugs))
+    return queryset.filter(pk__in=items.values('object_id'))
+
+
+class TagFilterBackend(BaseFilterBackend):
+    """
+    ?tags=a,b keeps posts or resources tagged with any of the tags,
+    ?tags=a,b&tag_match=all those tagged with all of them
+    """
+    def filter_queryset(self, request, queryset, view):
+        slugs = parse_tag_filter(request.query_params.get('tags', ''))
+        if not slugs:
+            return queryset
+        content_type = queryset.model._meta.model_name
+        match_all = request.query_params.get('tag_match') == 'all'
+        return filter_by_tags(queryset, content_type, slugs, match_all)
+
+
+def clear_tag_cloud(content_type):
+    cache.delete_many([TAG_CLOUD_KEY.format(content_type), TAG_CLOUD_KEY.format('all')])
+
+
+def tag_cloud(content_type=None):
+    """[{'name', 'slug', 'count'}] of tags on public posts and resources, most used first"""
+    key = TAG_CLOUD_KEY.format(content_type or 'all')
+    cloud = cache.get(key)
+    if cloud is None:
+        counted = Q(items__is_public=True)
+        if content_type:
+            counted &= Q(items__content_type=content_type)
+        cloud = [
+            {'name': name, 'slug': slug, 'count': count}
+            for name, slug, count in Tag.objects.annotate(
+                count=Count('items', filter=counted)
+            ).filter(count__gt=0).order_by('-count', 'slug').values_list('name', 'slug', 'count')
+        ]
+        cache.set(key, cloud, TAG_CLOUD_TTL)
+    return cloud
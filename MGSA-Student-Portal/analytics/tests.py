@@ -1,3 +1,215 @@
-from django.test import TestCase
+import datetime
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from accounts.models import User
+from posts.admin import PostAdmin
+from posts.models import Comment, Like, Post
+from resources.models import Resource
+from resources.recommendations import record_download
+from tutorials.models import Tutorial
+from tutorials.services import register_student
+from . import counters
+from .tags import tag_cloud
+from .models import ContentIndex, CounterDriftReport
+
+
+class CounterReconcileTests(TestCase):
+    def setUp(self):
+        executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.tutorial = Tutorial.objects.create(
+            title='Calculus', tutor='Tutor', department='Computer Science',
+            start_date=datetime.date(2026, 9, 1), end_date=datetime.date(2026, 12, 20),
+            days=['Monday'], time='14:00-16:00', max_students=10, created_by=executive
+        )
+        Tutorial.objects.filter(pk=self.tutorial.pk).update(current_registrations=3)
+
+    def test_drift_is_repaired_and_saved(self):
+        report = counters.reconcile(['tutorial.current_registrations'])
+
+        self.assertEqual(report['counters']['tutorial.current_registrations']['drifted'], 1)
+        self.assertEqual(Tutorial.objects.get(pk=self.tutorial.pk).current_registrations, 0)
+        saved = CounterDriftReport.objects.get()
+        self.assertEqual(saved.counters['tutorial.current_registrations']['sample'], [
+            {'id': self.tutorial.pk, 'stored': 3, 'expected': 0}
+        ])
+
+    def test_last_report_carries_over_counters_not_checked(self):
+        self.assertIsNone(counters.last_report())
+        counters.reconcile(['tutorial.current_registrations'], dry_run=True)
+        counters.reconcile(['tutorial.attended_count'])
+
+        report = counters.last_report()
+        self.assertFalse(report['dry_run'])
+        self.assertEqual(
+            set(report['counters']), {'tutorial.current_registrations', 'tutorial.attended_count'}
+        )
+        self.assertEqual(report['counters']['tutorial.current_registrations']['repaired'], 0)
+
+    def test_old_reports_are_pruned(self):
+        with mock.patch.object(counters, 'KEEP_REPORTS', 2):
+            for _ in range(4):
+                counters.reconcile(['tutorial.cancelled_count'])
+
+        self.assertEqual(CounterDriftReport.objects.count(), 2)
+
+
+# A private cache, as the shared file cache outlives test databases
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class TagCloudTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+
+    def test_cloud_is_cached_until_tags_change(self):
+        post = Post.objects.create(title='Post', content='Body', author=self.author, tags=['Exam Tips', 'Maths'])
+        self.assertEqual([tag['slug'] for tag in tag_cloud('post')], ['exam-tips', 'maths'])
+
+        with self.assertNumQueries(0):
+            tag_cloud('post')
+
+        post.tags = ['exam tips']
+        post.save()
+        self.assertEqual(tag_cloud('post'), [{'name': 'Exam Tips', 'slug': 'exam-tips', 'count': 1}])
+
+
+class ContentIndexTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            email='admin@example.com', password='secret-pass-123',
+            first_name='Admin', last_name='Test', gender='Female', role='Admin'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student'
+        )
+
+    def entry(self, content_type, instance):
+        return ContentIndex.objects.get(content_type=content_type, object_id=instance.pk)
+
+    def add_post(self, title='Notice'):
+        return Post.objects.create(title=title, content='Body', author=self.admin)
+
+    def add_resource(self):
+        return Resource.objects.create(
+            title='Notes', file_name='notes.pdf', file_type='pdf', file_size=1, uploaded_by=self.admin
+        )
+
+    def add_tutorial(self):
+        return Tutorial.objects.create(
+            title='Calculus', tutor='Tutor', department='Computer Science',
+            start_date=timezone.localdate(), end_date=timezone.localdate() + datetime.timedelta(days=60),
+            days=['Monday'], time='14:00-16:00', max_students=10, created_by=self.admin
+        )
+
+    def test_index_follows_posts_and_engagement(self):
+        post = self.add_post()
+        like = Like.objects.create(post=post, user=self.student)
+        Comment.objects.create(post=post, user=self.student, content='First')
+        post.title = 'Edited'
+        post.save()
+
+        entry = self.entry('post', post)
+        self.assertEqual((entry.title, entry.like_count, entry.comment_count), ('Edited', 1, 1))
+
+        like.delete()
+        self.assertEqual(self.entry('post', post).like_count, 0)
+
+        post.delete()
+        self.assertFalse(ContentIndex.objects.filter(content_type='post').exists())
+
+    def test_index_follows_downloads_and_registrations(self):
+        resource = self.add_resource()
+        tutorial = self.add_tutorial()
+
+        record_download(resource, self.student)
+        register_student(self.student, tutorial)
+
+        self.assertEqual(self.entry('resource', resource).download_count, 1)
+        self.assertEqual(self.entry('tutorial', tutorial).registration_count, 1)
+
+    def test_admin_visibility_actions_update_the_index(self):
+        post = self.add_post()
+
+        PostAdmin(Post, site).set_visibility(Post.objects.all(), False)
+
+        self.assertFalse(self.entry('post', post).is_public)
+
+    def test_reconcile_repairs_counters_changed_behind_the_receivers(self):
+        post = self.add_post()
+        resource = self.add_resource()
+        Like.objects.create(post=post, user=self.student)
+        Resource.objects.filter(pk=resource.pk).update(download_count=7)
+        ContentIndex.objects.filter(content_type='post').update(like_count=5, comment_count=2)
+
+        report = counters.reconcile([
+            'content_index.like_count', 'content_index.comment_count', 'content_index.download_count'
+        ])
+
+        self.assertEqual(
+            {name: result['drifted'] for name, result in report['counters'].items()},
+            {'content_index.like_count': 1, 'content_index.comment_count': 1, 'content_index.download_count': 1}
+        )
+        self.assertEqual((self.entry('post', post).like_count, self.entry('post', post).comment_count), (1, 0))
+        self.assertEqual(self.entry('resource', resource).download_count, 7)
+
+    def test_rebuild_recreates_the_index(self):
+        post = self.add_post()
+        Like.objects.create(post=post, user=self.student)
+        resource = self.add_resource()
+        tutorial = self.add_tutorial()
+        ContentIndex.objects.all().delete()
+
+        call_command('rebuild_content_index', stdout=StringIO())
+
+        self.assertEqual(ContentIndex.objects.count(), 3)
+        self.assertEqual(self.entry('post', post).like_count, 1)
+        self.assertEqual(self.entry('resource', resource).author_id, self.admin.pk)
+        self.assertTrue(self.entry('tutorial', tutorial).is_public)
+
+    def test_timeline_cursor_pages_through_everything_once(self):
+        posts = [self.add_post(f'Post {number}') for number in range(5)]
+        self.add_resource()
+        # Entries with equal timestamps are ordered by id
+        ContentIndex.objects.filter(object_id__in=[posts[1].pk, posts[2].pk]).update(
+            created_at=ContentIndex.objects.get(content_type='post', object_id=posts[1].pk).created_at
+        )
+        self.client.force_login(self.admin)
+
+        seen = []
+        params = {'page_size': 2}
+        while True:
+            response = self.client.get('/api/analytics/admin/content/timeline/', params, secure=True)
+            self.assertEqual(response.status_code, 200)
+            seen.extend((item['type'], item['id']) for item in response.data['timeline'])
+            if not response.data['next_cursor']:
+                break
+            params['cursor'] = response.data['next_cursor']
+
+        expected = list(ContentIndex.objects.order_by('-created_at', '-id').values_list('content_type', 'object_id'))
+        self.assertEqual(seen, expected)
+        self.assertEqual(len(seen), 6)
+
+    def test_timeline_filters_and_rejects_bad_cursors(self):
+        self.add_post()
+        self.add_resource()
+        self.client.force_login(self.admin)
+
+        posts = self.client.get('/api/analytics/admin/content/timeline/', {'type': 'posts'}, secure=True)
+        bad = self.client.get('/api/analytics/admin/content/timeline/', {'cursor': 'nope'}, secure=True)
+        self.client.force_login(self.student)
+        denied = self.client.get('/api/analytics/admin/content/timeline/', secure=True)
+
+        self.assertEqual([item['type'] for item in posts.data['timeline']], ['post'])
+        self.assertEqual(bad.status_code, 400)
+        self.assertEqual(denied.status_code, 403)
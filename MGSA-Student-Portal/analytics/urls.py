@@ -12,18 +12,25 @@ urlpatterns = [
     
     # User Management
     path('admin/users/', admin_views.user_management, name='user-management'),
+    path('admin/users/import/', admin_views.import_students, name='import-students'),
     path('admin/users/<int:user_id>/role/', admin_views.update_user_role, name='update-user-role'),
     path('admin/users/<int:user_id>/deactivate/', admin_views.deactivate_user, name='deactivate-user'),
     path('admin/users/<int:user_id>/activate/', admin_views.activate_user, name='activate-user'),
+    path('admin/users/<int:user_id>/transcript/', admin_views.student_transcript, name='admin-student-transcript'),
     
     # Content Management
     path('admin/content/', admin_views.content_management, name='content-management'),
+    path('admin/content/timeline/', admin_views.content_timeline, name='content-timeline'),
+    path('admin/content/tutorials/import/', admin_views.import_tutorials, name='import-tutorials'),
     path('admin/content/<str:content_type>/<int:content_id>/delete/', admin_views.delete_content, name='delete-content'),
     path('admin/content/<str:content_type>/<int:content_id>/visibility/', admin_views.toggle_content_visibility, name='toggle-content-visibility'),
     
     # Export Data
     path('admin/export/', admin_views.export_data, name='export-data'),
     
+    # Counter reconciliation
+    path('admin/counters/drift/', admin_views.counter_drift, name='counter-drift'),
+    
     # System Settings
     path('admin/settings/', admin_views.system_settings, name='system-settings'),
     path('admin/settings/update/', admin_views.update_system_settings, name='update-system-settings'),
@@ -39,4 +46,7 @@ urlpatterns = [
     
     # Feedback endpoints
     path('feedback/submit/', views.submit_feedback, name='submit_feedback'),
+    
+    # Tag cloud
+    path('tags/cloud/', views.tag_cloud, name='tag_cloud'),
 ]
\ No newline at end of file
@@ -9,6 +9,7 @@ from posts.models import Post, Like
 from resources.models import Resource
 from tutorials.models import Tutorial, TutorialRegistration
 from .models import Feedback, UserActivity, SystemAnalytics
+from .tags import tag_cloud as get_tag_cloud
 import openpyxl
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
@@ -290,4 +291,26 @@ def user_activity_logs(request):
         'success': True,
         'activities': activity_data,
         'total_count': len(activity_data)
-    })
\ No newline at end of file
+    })
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def tag_cloud(request):
+    """Tags on public posts and resources with their counts, most used first"""
+    content_type = request.GET.get('content_type') or None
+    if content_type not in (None, 'post', 'resource'):
+        return Response({
+            'success': False,
+            'message': 'content_type must be post or resource'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 50)), 1), 200)
+    except ValueError:
+        limit = 50
+    
+    tags = get_tag_cloud(content_type)
+    return Response({
+        'success': True,
+        'tags': tags[:limit],
+        'total_tags': len(tags)
+    })
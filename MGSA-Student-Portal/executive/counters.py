@@ -0,0 +1,39 @@
+# executive/counters.py
+from django.db.models import Count, F, Q
+
+from analytics.counters import register
+
+from .models import Executive, ExecutiveReport
+
+# Task statuses that still need doing
+OPEN_TASK_STATUSES = ['pending', 'in_progress', 'on_hold']
+
+
+register(
+    'executive.tasks_completed', Executive, 'tasks_completed',
+    Count('tasks', filter=Q(tasks__status='completed'))
+)
+register(
+    'executive.tasks_pending', Executive, 'tasks_pending',
+    Count('tasks', filter=Q(tasks__status__in=OPEN_TASK_STATUSES))
+)
+
+# Submitted reports are a record of their period and are left as they are
+register(
+    'executive_report.tasks_completed', ExecutiveReport, 'tasks_completed',
+    Count('executive__tasks', filter=Q(
+        executive__tasks__status='completed',
+        executive__tasks__completed_date__date__gte=F('period_start'),
+        executive__tasks__completed_date__date__lte=F('period_end')
+    )),
+    queryset=lambda: ExecutiveReport.objects.filter(is_submitted=False)
+)
+register(
+    'executive_report.meetings_attended', ExecutiveReport, 'meetings_attended',
+    Count('executive__meetingattendance', filter=Q(
+        executive__meetingattendance__attended=True,
+        executive__meetingattendance__meeting__meeting_date__date__gte=F('period_start'),
+        executive__meetingattendance__meeting__meeting_date__date__lte=F('period_end')
+    )),
+    queryset=lambda: ExecutiveReport.objects.filter(is_submitted=False)
+)
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
 
 class Executive(models.Model):
     EXECUTIVE_TITLES = [
@@ -444,4 +446,23 @@ class ExecutiveReport(models.Model):
         self.is_approved = True
         self.approved_by = approved_by_user
         self.approved_at = timezone.now()
-        self.save()
\ No newline at end of file
+        self.save()
+
+
+# Meetings appear in the calendar feeds of their organizer and attendees
+@receiver(post_save, sender=ExecutiveMeeting)
+@receiver(pre_delete, sender=ExecutiveMeeting)
+def invalidate_feeds_on_meeting_change(sender, instance, **kwargs):
+    from tutorials.calendar import invalidate_feeds
+
+    invalidate_feeds([
+        *Executive.objects.filter(pk=instance.organized_by_id).values_list('user_id', flat=True),
+        *instance.meetingattendance_set.values_list('executive__user_id', flat=True)
+    ])
+
+@receiver(post_save, sender=MeetingAttendance)
+@receiver(post_delete, sender=MeetingAttendance)
+def invalidate_feed_on_attendance_change(sender, instance, **kwargs):
+    from tutorials.calendar import invalidate_feeds
+
+    invalidate_feeds(Executive.objects.filter(pk=instance.executive_id).values_list('user_id', flat=True))
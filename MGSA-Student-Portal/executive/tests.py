@@ -1,3 +1,80 @@
+import json
+
 from django.test import TestCase
 
-# Create your tests here.
+from accounts.models import User
+from students.models import Student, StudentAttendance
+
+
+class RollCallTests(TestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.students = [
+            Student.objects.get(user=User.objects.create_user(
+                email=f'student{number}@example.com', password='secret-pass-123',
+                first_name='Student', last_name=str(number), gender='Female', role='Student'
+            ))
+            for number in range(2)
+        ]
+        self.client.force_login(self.executive)
+
+    def roll_call(self, attendance):
+        return self.client.post(
+            '/api/executive/attendance/roll-call/',
+            data=json.dumps({
+                'event_type': 'tutorial',
+                'event_title': 'Calculus revision',
+                'event_date': '2026-02-02T10:00:00',
+                'attendance': attendance,
+            }),
+            content_type='application/json',
+            secure=True,
+        )
+
+    def test_present_values_are_parsed(self):
+        response = self.roll_call([
+            {'student_id': self.students[0].student_id, 'present': 'false'},
+            [self.students[1].student_id, 'yes'],
+        ])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(
+            dict(StudentAttendance.objects.values_list('student_id', 'present')),
+            {self.students[0].pk: False, self.students[1].pk: True}
+        )
+
+    def test_unknown_present_value_is_rejected(self):
+        response = self.roll_call([{'student_id': self.students[0].student_id, 'present': 'maybe'}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('attendance', response.data['errors'])
+        self.assertFalse(StudentAttendance.objects.exists())
+
+    def test_students_must_be_a_list(self):
+        response = self.client.post(
+            '/api/executive/attendance/roll-call/',
+            data=json.dumps({
+                'event_type': 'tutorial',
+                'event_title': 'Calculus revision',
+                'event_date': '2026-02-02T10:00:00',
+                'students': self.students[0].student_id,
+            }),
+            content_type='application/json',
+            secure=True,
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'], {'students': 'Must be a list of student IDs.'})
+        self.assertFalse(StudentAttendance.objects.exists())
+
+    def test_resubmitted_roll_call_updates_rows(self):
+        self.roll_call([[self.students[0].student_id, 'absent']])
+
+        response = self.roll_call([[self.students[0].student_id, 'present']])
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['summary']['updated'], 1)
+        self.assertEqual(StudentAttendance.objects.get().present, True)
@@ -15,6 +15,14 @@ urlpatterns = [
     
     # Tutorial Management
     path('tutorials/', views.ExecutiveTutorialListCreate.as_view(), name='executive-tutorials'),
+    path('tutorials/bulk/', views.executive_bulk_create_tutorials, name='executive-bulk-create-tutorials'),
     path('tutorials/<int:pk>/', views.ExecutiveTutorialDetail.as_view(), name='executive-tutorial-detail'),
     path('tutorials/<int:tutorial_id>/registrations/', views.executive_tutorial_registrations, name='executive-tutorial-registrations'),
+    path('tutorials/<int:tutorial_id>/registrations/status/', views.executive_update_registration_status, name='executive-update-registration-status'),
+    
+    # Attendance
+    path('attendance/roll-call/', views.executive_roll_call, name='executive-roll-call'),
+    
+    # Study groups
+    path('study-groups/', views.executive_study_groups, name='executive-study-groups'),
 ]
\ No newline at end of file
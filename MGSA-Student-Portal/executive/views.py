@@ -1,18 +1,27 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Count, Q
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from datetime import timedelta
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from accounts.models import User
+from analytics.tags import TagFilterBackend
 from posts.models import Post, Comment
 from resources.models import Resource
 from tutorials.models import Tutorial, TutorialRegistration
 from posts.serializers import PostSerializer, PostCreateSerializer
 from resources.serializers import ResourceSerializer, ResourceCreateSerializer
 from tutorials.serializers import TutorialSerializer, TutorialCreateSerializer
+from students.attendance import parse_presence, record_roll_call
+from students.importers import iter_spreadsheet_rows
+from tutorials.bulk import clone_rows, create_tutorials
+from tutorials.services import InvalidTransition, transition_registrations
+from students.matching import shared_tokens, suggest_groups
+from students.models import Student, StudentAttendance
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -66,7 +75,9 @@ def executive_dashboard(request):
     # Tutorials created by this executive
     executive_tutorials = Tutorial.objects.filter(created_by=request.user).aggregate(
         total_tutorials=Count('id'),
-        total_registrations=Count('registrations'),
+        total_registrations=Coalesce(Sum('current_registrations'), 0),
+        total_attended=Coalesce(Sum('attended_count'), 0),
+        total_cancelled=Coalesce(Sum('cancelled_count'), 0),
         active_tutorials=Count('id', filter=Q(is_active=True))
     )
     
@@ -111,7 +122,9 @@ def executive_dashboard(request):
                         'id': tutorial.id,
                         'title': tutorial.title,
                         'created_at': tutorial.created_at,
-                        'registrations': tutorial.registrations.count()
+                        'registrations': tutorial.current_registrations,
+                        'attended': tutorial.attended_count,
+                        'cancelled': tutorial.cancelled_count
                     } for tutorial in recent_tutorials
                 ]
             },
@@ -127,8 +140,8 @@ def executive_dashboard(request):
 class ExecutivePostListCreate(generics.ListCreateAPIView):
     """Executives can create and view their posts"""
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['is_public', 'tags']
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
+    filterset_fields = ['is_public']
     
     def get_serializer_class(self):
         if self.request.method == 'POST':
@@ -162,7 +175,7 @@ class ExecutivePostDetail(generics.RetrieveUpdateDestroyAPIView):
 class ExecutiveResourceListCreate(generics.ListCreateAPIView):
     """Executives can upload and manage resources"""
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
     filterset_fields = ['category', 'file_type', 'is_public']
     
     def get_serializer_class(self):
@@ -259,7 +272,9 @@ def executive_tutorial_registrations(request, tutorial_id):
                 'id': tutorial.id,
                 'title': tutorial.title,
                 'max_students': tutorial.max_students,
-                'current_registrations': tutorial.current_registrations
+                'current_registrations': tutorial.current_registrations,
+                'attended_count': tutorial.attended_count,
+                'cancelled_count': tutorial.cancelled_count
             },
             'registrations': registration_data
         })
@@ -269,3 +284,253 @@ def executive_tutorial_registrations(request, tutorial_id):
             'success': False,
             'message': 'Tutorial not found or access denied'
         }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def executive_update_registration_status(request, tutorial_id):
+    """Mark registrations of a tutorial attended, cancelled or registered in bulk"""
+    if request.user.role not in ['Executive', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Access denied. Executive privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    tutorials = Tutorial.objects.all() if request.user.role == 'Admin' else Tutorial.objects.filter(created_by=request.user)
+    tutorial = tutorials.filter(id=tutorial_id).first()
+    if tutorial is None:
+        return Response({
+            'success': False,
+            'message': 'Tutorial not found or access denied'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    registrations = TutorialRegistration.objects.filter(tutorial=tutorial)
+    registration_ids = request.data.get('registration_ids')
+    if registration_ids is not None:
+        if not isinstance(registration_ids, list):
+            return Response({
+                'success': False,
+                'message': 'registration_ids must be a list'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        registrations = registrations.filter(id__in=registration_ids)
+    
+    try:
+        # Re-registering takes seats: refused when the tutorial is full or,
+        # without allow_clash, when it clashes with a student's timetable
+        result = transition_registrations(
+            registrations, request.data.get('status'), allow_clash=request.data.get('allow_clash') is True
+        )
+    except InvalidTransition as e:
+        return Response({
+            'success': False,
+            'message': str(e)
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    tutorial.refresh_from_db(fields=['current_registrations', 'attended_count', 'cancelled_count'])
+    return Response({
+        'success': True,
+        'message': f"Updated {result['updated']} registrations",
+        'result': result,
+        'tutorial': {
+            'id': tutorial.id,
+            'current_registrations': tutorial.current_registrations,
+            'attended_count': tutorial.attended_count,
+            'cancelled_count': tutorial.cancelled_count
+        }
+    })
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def executive_roll_call(request):
+    """Record attendance for a whole event in one request"""
+    if request.user.role not in ['Executive', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Access denied. Executive privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    data = request.data
+    errors = {}
+    
+    event_types = dict(StudentAttendance._meta.get_field('event_type').choices)
+    event_type = data.get('event_type')
+    if event_type not in event_types:
+        errors['event_type'] = f"Must be one of: {', '.join(event_types)}"
+    
+    event_title = (data.get('event_title') or '').strip()
+    if not event_title:
+        errors['event_title'] = 'This field is required.'
+    
+    event_date = parse_datetime(str(data.get('event_date', '')))
+    if event_date is None:
+        errors['event_date'] = 'Provide an ISO 8601 date and time.'
+    elif timezone.is_naive(event_date):
+        event_date = timezone.make_aware(event_date)
+    
+    try:
+        duration_minutes = int(data.get('duration_minutes') or 60)
+        if duration_minutes <= 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        errors['duration_minutes'] = 'Must be a positive number of minutes.'
+    
+    # Either a list of present student IDs, or present/absent pairs
+    students = data.get('students') or []
+    attendance = data.get('attendance') or []
+    if not isinstance(students, list) or not all(isinstance(student_id, (str, int)) for student_id in students):
+        errors['students'] = 'Must be a list of student IDs.'
+        students = []
+    if not isinstance(attendance, list):
+        errors['attendance'] = 'Must be a list of {"student_id": ..., "present": true/false} entries.'
+        attendance = []
+    
+    entries = [(student_id, True) for student_id in students]
+    for item in attendance:
+        try:
+            if isinstance(item, dict) and item.get('student_id'):
+                entries.append((item['student_id'], parse_presence(item.get('present', True))))
+            elif isinstance(item, (list, tuple)) and len(item) == 2:
+                entries.append((item[0], parse_presence(item[1])))
+            else:
+                raise ValueError
+        except ValueError:
+            errors['attendance'] = 'Each entry must be {"student_id": ..., "present": true/false}.'
+            break
+    
+    if not entries and not errors.keys() & {'students', 'attendance'}:
+        errors['students'] = 'Provide "students" or "attendance".'
+    
+    if errors:
+        return Response({
+            'success': False,
+            'message': 'Invalid roll call',
+            'errors': errors
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    summary = record_roll_call({
+        'event_type': event_type,
+        'event_title': event_title,
+        'event_date': event_date,
+        'duration_minutes': duration_minutes,
+        'notes': data.get('notes', ''),
+    }, entries, recorded_by=request.user)
+    
+    return Response({
+        'success': True,
+        'message': f"Recorded attendance for {summary['recorded'] + summary['updated']} students",
+        'summary': summary
+    }, status=status.HTTP_201_CREATED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def executive_study_groups(request):
+    """Suggested study groups for a department, optionally one year of study"""
+    if request.user.role not in ['Executive', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Access denied. Executive privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    department = request.GET.get('department', request.user.department)
+    year_of_study = request.GET.get('year_of_study')
+    try:
+        group_size = min(max(int(request.GET.get('group_size', 4)), 2), 10)
+        limit = min(max(int(request.GET.get('limit', 20)), 1), 200)
+        min_similarity = float(request.GET.get('min_similarity', 0.1))
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'group_size and limit must be integers, min_similarity a number'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    groups = suggest_groups(
+        department,
+        year_of_study=year_of_study,
+        group_size=group_size,
+        min_similarity=min_similarity,
+        limit=limit
+    )
+    students = Student.objects.select_related('user').in_bulk(
+        [pk for group in groups for pk in group['students']]
+    )
+    
+    return Response({
+        'success': True,
+        'department': department,
+        'year_of_study': year_of_study,
+        'groups': [{
+            'score': group['score'],
+            'members': [{
+                'name': students[pk].user.get_full_name(),
+                'student_id': students[pk].student_id,
+                'year_of_study': students[pk].year_of_study
+            } for pk in group['students']],
+            'shared': shared_tokens([students[pk] for pk in group['students']])
+        } for group in groups]
+    })
+
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticated])
+def executive_bulk_create_tutorials(request):
+    """
+    Create many tutorials at once from a JSON list, a CSV/XLSX upload or a
+    copy of earlier tutorials with shifted dates
+    """
+    if request.user.role not in ['Executive', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Access denied. Executive privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    upload = request.FILES.get('file')
+    clone = request.data.get('clone')
+    if upload:
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            return Response({
+                'success': False,
+                'message': 'Only CSV and XLSX files are supported'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        rows = iter_spreadsheet_rows(upload.file, upload.name)
+    elif isinstance(clone, dict):
+        source_from, source_to = parse_date(str(clone.get('from', ''))), parse_date(str(clone.get('to', '')))
+        if not source_from or not source_to:
+            return Response({
+                'success': False,
+                'message': 'clone needs "from" and "to" dates (YYYY-MM-DD)'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        new_start = parse_date(str(clone.get('new_start', '')))
+        try:
+            shift_days = (new_start - source_from).days if new_start else int(clone.get('shift_days'))
+        except (TypeError, ValueError):
+            return Response({
+                'success': False,
+                'message': 'clone needs "shift_days" or "new_start"'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        rows = enumerate(clone_rows(source_from, source_to, shift_days), start=1)
+    elif isinstance(request.data.get('tutorials'), list):
+        rows = enumerate(request.data['tutorials'], start=1)
+    else:
+        return Response({
+            'success': False,
+            'message': 'Provide a "tutorials" list, a "file" or a "clone" descriptor'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    dry_run = str(request.data.get('dry_run', '')).lower() in ['1', 'true', 'yes']
+    skip_invalid = str(request.data.get('skip_invalid', '')).lower() in ['1', 'true', 'yes']
+    summary = create_tutorials(rows, request.user, dry_run=dry_run, skip_invalid=skip_invalid)
+    
+    if dry_run:
+        message = f"Validated {summary['valid']} of {summary['total']} tutorials"
+    elif summary['invalid'] and not summary['created']:
+        return Response({
+            'success': False,
+            'message': f"{summary['invalid']} of {summary['total']} tutorials are invalid, nothing was created",
+            'summary': summary
+        }, status=status.HTTP_400_BAD_REQUEST)
+    else:
+        message = f"Created {summary['created']} tutorials"
+    
+    return Response({
+        'success': True,
+        'message': message,
+        'summary': summary
+    }, status=status.HTTP_201_CREATED if summary['created'] else status.HTTP_200_OK)
@@ -5,6 +5,7 @@ from django.http import JsonResponse, HttpResponse
 from tutorials.models import Tutorial, TutorialRegistration
 from resources.models import Resource
 from posts.models import Post, Comment, Like
+from posts.threads import link_tree, load_page
 from analytics.models import Feedback
 from accounts.models import User
 import json
@@ -258,19 +259,26 @@ def api_post_comments(request, post_id):
     """Get comments for a post"""
     if request.method == 'GET':
         post = get_object_or_404(Post, id=post_id)
-        comments = Comment.objects.filter(post=post).select_related('user').order_by('-created_at')
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+        roots, replies, _ = load_page(post.id, page=page, newest_first=True)
         
         comments_data = []
-        for comment in comments:
+        for comment in [*roots, *replies]:
             comments_data.append({
                 'id': comment.id,
+                'parent_comment': comment.parent_comment_id,
                 'content': comment.content,
                 'author_name': comment.user.get_full_name() or comment.user.email,
                 'created_at': comment.created_at.isoformat(),
-                'can_delete': comment.user == request.user
+                'can_delete': comment.user_id == request.user.id,
+                'reply_count': getattr(comment, 'reply_count', None),
+                'replies': []
             })
         
-        return JsonResponse(comments_data, safe=False)
+        return JsonResponse(link_tree(comments_data), safe=False)
     
     return JsonResponse({'error': 'Method not allowed'}, status=405)
 
@@ -1,4 +1,5 @@
 import os
+import sys
 from pathlib import Path
 from datetime import timedelta
 from decouple import config
@@ -102,6 +103,42 @@ DATABASES = {
     }
 }
 
+# ==================== CACHE CONFIGURATION ====================
+
+# File caches are shared by every worker process and management command on
+# the host, so work cached by one (feeds, recommendations, rendered PDFs) is
+# reused by the others and survives restarts
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'default',
+        'KEY_PREFIX': 'mgsa',
+        'VERSION': 1,
+        'OPTIONS': {
+            # Room for a calendar feed and feed token per user
+            'MAX_ENTRIES': 15000,
+        }
+    },
+    # Rendered transcript PDFs, keyed by a hash of their contents
+    'transcripts': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache' / 'transcripts',
+        'KEY_PREFIX': 'mgsa',
+        'VERSION': 1,
+        'TIMEOUT': 60 * 60 * 24 * 30,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+        }
+    },
+}
+
+# Test runs get private in-memory caches so throttle histories and cached
+# results never leak between runs or into the real cache directories
+if len(sys.argv) > 1 and sys.argv[1] == 'test':
+    for alias, cache_settings in CACHES.items():
+        cache_settings['BACKEND'] = 'django.core.cache.backends.locmem.LocMemCache'
+        cache_settings['LOCATION'] = f'mgsa-test-{alias}'
+
 
 # ==================== SECURITY CONFIGURATION ====================
 
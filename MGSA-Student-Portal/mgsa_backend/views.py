@@ -15,6 +15,8 @@ from accounts.models import User
 from posts.models import Post
 from resources.models import Resource
 from tutorials.models import Tutorial, TutorialRegistration
+from tutorials.services import RegistrationError, delete_registrations, register_student, transition_registration
+from resources.recommendations import record_download
 from django.shortcuts import render, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -569,7 +571,7 @@ def student_dashboard(request):
         user_feedback = Feedback.objects.filter(user=user).order_by('-created_at')[:5]
         
         # Stats - FIXED: Using student field
-        completed_tutorials = user_registrations.filter(status='completed').count()
+        completed_tutorials = user_registrations.filter(status='attended').count()
         
         context = {
             'user': user,
@@ -628,22 +630,13 @@ def register_tutorial(request):
         messages.warning(request, 'You are already registered for this tutorial')
         return redirect('student_dashboard') + '?section=tutorials'
     
-    # Check if tutorial is full
-    if tutorial.current_registrations >= tutorial.max_students:
-        messages.error(request, 'This tutorial is already full')
+    # Takes a seat, checking capacity and clashes with the tutorial locked
+    try:
+        register_student(request.user, tutorial)
+    except RegistrationError as e:
+        messages.error(request, str(e))
         return redirect('student_dashboard') + '?section=tutorials'
     
-    # Create registration
-    TutorialRegistration.objects.create(
-        student=request.user,
-        tutorial=tutorial,
-        status='registered'
-    )
-    
-    # Update tutorial registration count
-    tutorial.current_registrations += 1
-    tutorial.save()
-    
     messages.success(request, 'Successfully registered for tutorial!')
     return redirect('student_dashboard') + '?section=tutorials'
 
@@ -652,17 +645,13 @@ def cancel_tutorial(request):
     tutorial_id = request.POST.get('tutorial_id')
     tutorial = get_object_or_404(Tutorial, id=tutorial_id)
     
-    registration = TutorialRegistration.objects.filter(
+    registrations = TutorialRegistration.objects.filter(
         student=request.user,
         tutorial=tutorial
-    ).first()
+    )
     
-    if registration:
-        registration.delete()
-        # Ensure current_registrations doesn't go below 0
-        if tutorial.current_registrations > 0:
-            tutorial.current_registrations -= 1
-            tutorial.save()
+    # Takes the registration off the tutorial's counters
+    if delete_registrations(registrations):
         messages.success(request, 'Registration cancelled successfully')
     else:
         messages.error(request, 'Registration not found')
@@ -723,10 +712,9 @@ def submit_feedback(request):
 
 def download_resource(request):
     resource_id = request.POST.get('resource_id')
-    resource = get_object_or_404(Resource, id=resource_id)
+    resource = get_object_or_404(Resource.objects.select_related('uploaded_by'), id=resource_id)
     
-    resource.download_count += 1
-    resource.save()
+    record_download(resource, request.user)
     
     if resource.file:
         return redirect(resource.file.url)
@@ -1048,23 +1036,19 @@ def register_tutorial(request):
         tutorial_id = request.POST.get('tutorial_id')
         tutorial = Tutorial.objects.get(id=tutorial_id, is_active=True)
         
-        # Check if already registered
-        if TutorialRegistration.objects.filter(student=request.user, tutorial=tutorial).exists():
+        # Check if already registered; a cancelled registration is re-activated
+        if TutorialRegistration.objects.filter(student=request.user, tutorial=tutorial).exclude(status='cancelled').exists():
             messages.warning(request, 'You are already registered for this tutorial')
         else:
-            # Check if tutorial has available spots
-            if tutorial.max_students and tutorial.current_registrations >= tutorial.max_students:
-                messages.error(request, 'This tutorial is full')
-            else:
-                TutorialRegistration.objects.create(
-                    student=request.user,
-                    tutorial=tutorial,
-                    status='registered'
-                )
-                messages.success(request, 'Successfully registered for tutorial')
+            # Takes a seat, checking capacity and timetable clashes with
+            # the tutorial locked
+            register_student(request.user, tutorial, allow_clash=bool(request.POST.get('allow_clash')))
+            messages.success(request, 'Successfully registered for tutorial')
     
     except Tutorial.DoesNotExist:
         messages.error(request, 'Tutorial not found')
+    except RegistrationError as e:
+        messages.error(request, str(e))
     except Exception as e:
         messages.error(request, f'Registration failed: {str(e)}')
     
@@ -1080,8 +1064,7 @@ def cancel_tutorial_registration(request, registration_id):
             student=request.user,
             status='registered'
         )
-        registration.status = 'cancelled'
-        registration.save()
+        transition_registration(registration, 'cancelled')
         messages.success(request, 'Tutorial registration cancelled')
     except TutorialRegistration.DoesNotExist:
         messages.error(request, 'Registration not found')
@@ -165,13 +165,21 @@ class PostAdmin(admin.ModelAdmin):
     media_preview.short_description = 'Media Preview'
     
     # Custom actions
+    def set_visibility(self, queryset, is_public):
+        """Save each post, so the content index, timelines and tag index follow the change"""
+        posts = list(queryset.exclude(is_public=is_public))
+        for post in posts:
+            post.is_public = is_public
+            post.save(update_fields=['is_public', 'updated_at'])
+        return len(posts)
+    
     def make_public(self, request, queryset):
-        updated = queryset.update(is_public=True)
+        updated = self.set_visibility(queryset, True)
         self.message_user(request, f'{updated} posts marked as public.')
     make_public.short_description = "Mark selected posts as public"
     
     def make_private(self, request, queryset):
-        updated = queryset.update(is_public=False)
+        updated = self.set_visibility(queryset, False)
         self.message_user(request, f'{updated} posts marked as private.')
     make_private.short_description = "Mark selected posts as private"
     
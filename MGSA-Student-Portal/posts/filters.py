@@ -4,12 +4,23 @@ from django.db.models import JSONField
 from .models import Post
 
 class PostFilter(django_filters.FilterSet):
+    ordering = django_filters.ChoiceFilter(
+        choices=[('trending', 'Trending'), ('newest', 'Newest')],
+        method='filter_ordering'
+    )
+    
     class Meta:
         model = Post
-        fields = ['title', 'tags', 'author', 'is_public']
+        fields = ['title', 'author', 'is_public']
         filter_overrides = {
             JSONField: {
                 'filter_class': django_filters.CharFilter,  # treat JSONField as CharFilter
                 'extra': lambda f: {'lookup_expr': 'icontains'}  # search with icontains
             }
         }
+
+    
+    def filter_ordering(self, queryset, name, value):
+        if value == 'trending':
+            return queryset.order_by('-hot_score', '-created_at')
+        return queryset.order_by('-created_at')
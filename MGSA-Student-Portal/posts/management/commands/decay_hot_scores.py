@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.trending import decay_all
+
+class Command(BaseCommand):
+    help = 'Decay post hot scores to now; run every few minutes to keep trending ordering current'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        decayed = decay_all()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Decayed {decayed} hot scores in {time.monotonic() - started:.2f}s'
+            )
+        )
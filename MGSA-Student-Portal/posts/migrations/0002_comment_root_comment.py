@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def set_root_comments(apps, schema_editor):
+    Comment = apps.get_model('posts', 'Comment')
+
+    parents = dict(Comment.objects.filter(parent_comment__isnull=False).values_list('id', 'parent_comment_id'))
+    replies = []
+    for comment_id in parents:
+        root_id = parents[comment_id]
+        seen = {comment_id}
+        while root_id in parents and root_id not in seen:
+            seen.add(root_id)
+            root_id = parents[root_id]
+        replies.append(Comment(pk=comment_id, root_comment_id=root_id))
+    Comment.objects.bulk_update(replies, ['root_comment'], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='root_comment',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='posts.comment'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'parent_comment', 'created_at'], name='posts_comme_post_id_ac7472_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['root_comment', 'created_at'], name='posts_comme_root_co_6666b6_idx'),
+        ),
+        migrations.RunPython(set_root_comments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_comment_root_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostDailyViews',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('unique_viewers', models.PositiveIntegerField(default=0)),
+                ('sketch', models.BinaryField(default=bytes)),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_views', to='posts.post')),
+            ],
+            options={
+                'verbose_name': 'Post Daily Views',
+                'verbose_name_plural': 'Post Daily Views',
+                'ordering': ['-date'],
+                'unique_together': {('post', 'date')},
+            },
+        ),
+    ]
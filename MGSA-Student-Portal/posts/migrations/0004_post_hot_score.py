@@ -0,0 +1,50 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:45
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def score_existing_posts(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+
+    # Weights and half-life as in posts.trending when this was written
+    now = django.utils.timezone.now()
+    posts = Post.objects.annotate(
+        like_total=Count('likes', distinct=True),
+        comment_total=Count('comments', distinct=True)
+    )
+    scored = []
+    for post in posts:
+        weight = 3.0 + post.like_total + 2.0 * post.comment_total + 0.1 * post.view_count
+        post.hot_score = weight * 0.5 ** (max((now - post.created_at).total_seconds(), 0) / (24 * 3600))
+        post.hot_score_at = now
+        scored.append(post)
+    Post.objects.bulk_update(scored, ['hot_score', 'hot_score_at'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0003_postdailyviews'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='hot_score',
+            field=models.FloatField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='hot_score_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-created_at'], name='posts_post_hot_sco_93b8d8_idx'),
+        ),
+        migrations.RunPython(score_existing_posts, migrations.RunPython.noop),
+    ]
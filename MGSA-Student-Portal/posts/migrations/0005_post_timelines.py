@@ -0,0 +1,51 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0004_post_hot_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=210, unique=True)),
+                ('college', models.CharField(blank=True, max_length=100)),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['key'],
+            },
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='target_colleges',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='target_departments',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField()),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.post')),
+                ('timeline', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='posts.timeline')),
+            ],
+            options={
+                'verbose_name_plural': 'Timeline Entries',
+                'indexes': [models.Index(fields=['timeline', '-created_at', '-post'], name='posts_timel_timelin_5b5b9e_idx')],
+                'unique_together': {('timeline', 'post')},
+            },
+        ),
+    ]
@@ -1,5 +1,8 @@
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 
 class Post(models.Model):
     MEDIA_TYPE_CHOICES = [
@@ -18,20 +21,79 @@ class Post(models.Model):
     
     # Metadata
     tags = models.JSONField(default=list, blank=True)
+    
+    # Audience: posts with no targets go to everyone, otherwise to students
+    # of any listed college or department
+    target_colleges = models.JSONField(default=list, blank=True)
+    target_departments = models.JSONField(default=list, blank=True)
     is_public = models.BooleanField(default=True)
     view_count = models.PositiveIntegerField(default=0)
     share_count = models.PositiveIntegerField(default=0)
     
+    # Time-decayed engagement, maintained by posts.trending
+    hot_score = models.FloatField(default=0, editable=False)
+    hot_score_at = models.DateTimeField(default=timezone.now, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-hot_score', '-created_at']),
+        ]
     
     def __str__(self):
         return self.title
 
+class Timeline(models.Model):
+    """The precomputed feed of one college department, filled by posts.timelines"""
+    key = models.CharField(max_length=210, unique=True)
+    college = models.CharField(max_length=100, blank=True)
+    department = models.CharField(max_length=100, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['key']
+    
+    def __str__(self):
+        return self.key
+
+class TimelineEntry(models.Model):
+    timeline = models.ForeignKey(Timeline, on_delete=models.CASCADE, related_name='entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    # Copy of the post's created_at, so a feed page is one index range
+    created_at = models.DateTimeField()
+    
+    class Meta:
+        unique_together = ['timeline', 'post']
+        indexes = [
+            models.Index(fields=['timeline', '-created_at', '-post']),
+        ]
+        verbose_name_plural = 'Timeline Entries'
+    
+    def __str__(self):
+        return f"{self.post_id} in {self.timeline_id}"
+
+class PostDailyViews(models.Model):
+    """Views of a post on one day, written in batches by posts.viewcounts"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='daily_views')
+    date = models.DateField()
+    views = models.PositiveIntegerField(default=0)
+    # Estimated from the HyperLogLog registers in sketch
+    unique_viewers = models.PositiveIntegerField(default=0)
+    sketch = models.BinaryField(default=bytes)
+    
+    class Meta:
+        unique_together = ['post', 'date']
+        ordering = ['-date']
+        verbose_name = 'Post Daily Views'
+        verbose_name_plural = 'Post Daily Views'
+    
+    def __str__(self):
+        return f"{self.post_id} on {self.date}: {self.views} views"
+
 class Like(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='likes')
@@ -48,6 +110,16 @@ class Comment(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
     content = models.TextField()
     parent_comment = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Top-level comment of the thread, empty for top-level comments, so a
+    # whole thread is one indexed query
+    root_comment = models.ForeignKey(
+        'self',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='thread_replies'
+    )
     is_edited = models.BooleanField(default=False)
     
     # Timestamps
@@ -56,6 +128,49 @@ class Comment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['post', 'parent_comment', 'created_at']),
+            models.Index(fields=['root_comment', 'created_at']),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user.email} on {self.post.title}"
+    
+    def save(self, *args, **kwargs):
+        if self.parent_comment_id is None:
+            self.root_comment = None
+        else:
+            parent = self.parent_comment
+            self.root_comment_id = parent.root_comment_id or parent.pk
+        super().save(*args, **kwargs)
+
+
+# Posts are written to the timelines of their audience as they are saved
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, **kwargs):
+    from .timelines import fan_out
+
+    fan_out(instance, created=created)
+
+# New posts, likes and comments raise a post's hot score as they happen
+@receiver(post_save, sender=Post)
+def score_new_post(sender, instance, created, **kwargs):
+    if created:
+        from .trending import WEIGHTS, bump
+
+        bump(instance.pk, WEIGHTS['post'])
+
+@receiver(post_save, sender=Like)
+@receiver(post_save, sender=Comment)
+def score_engagement_added(sender, instance, created, **kwargs):
+    if created:
+        from .trending import WEIGHTS, bump
+
+        bump(instance.post_id, WEIGHTS['like' if sender is Like else 'comment'])
+
+@receiver(post_delete, sender=Like)
+@receiver(post_delete, sender=Comment)
+def score_engagement_removed(sender, instance, **kwargs):
+    from .trending import WEIGHTS, remove_engagement
+
+    remove_engagement(instance.post_id, WEIGHTS['like' if sender is Like else 'comment'], instance.created_at)
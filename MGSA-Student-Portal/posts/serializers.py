@@ -3,7 +3,7 @@ from .models import Post, Like, Comment
 from accounts.serializers import UserSerializer
 
 class CommentSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+    user = serializers.SerializerMethodField()
     replies = serializers.SerializerMethodField()
     
     class Meta:
@@ -11,17 +11,31 @@ class CommentSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('user', 'created_at', 'updated_at')
     
+    def get_user(self, obj):
+        # Authors are serialized once per response
+        users = self.context.setdefault('serialized_users', {})
+        if obj.user_id not in users:
+            users[obj.user_id] = UserSerializer(obj.user, context=self.context).data
+        return users[obj.user_id]
+    
     def get_replies(self, obj):
-        if obj.replies.exists():
-            return CommentSerializer(obj.replies.all(), many=True).data
-        return []
+        # posts.threads links the replies itself
+        if self.context.get('flat_replies'):
+            return []
+        from .threads import comment_thread
+        
+        if obj.parent_comment_id is None:
+            thread = comment_thread(obj.pk, self.context)
+            return thread['replies'] if thread else []
+        replies = obj.replies.select_related('user')
+        return CommentSerializer(replies, many=True, context=self.context).data
 
 class PostSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     likes_count = serializers.SerializerMethodField()
     comments_count = serializers.SerializerMethodField()
     has_liked = serializers.SerializerMethodField()
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
     
     class Meta:
         model = Post
@@ -34,10 +48,16 @@ class PostSerializer(serializers.ModelSerializer):
     def get_comments_count(self, obj):
         return obj.comments.count()
     
+    def get_comments(self, obj):
+        from .threads import serialize_tree
+        
+        return serialize_tree(obj.comments.all(), self.context)
+    
     def get_has_liked(self, obj):
         request = self.context.get('request')
         if request and request.user.is_authenticated:
-            return obj.likes.filter(user=request.user).exists()
+            # Reads the prefetched likes when the view loaded them
+            return any(like.user_id == request.user.pk for like in obj.likes.all())
         return False
     
     def create(self, validated_data):
@@ -45,9 +65,15 @@ class PostSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 class PostCreateSerializer(serializers.ModelSerializer):
+    target_colleges = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+    target_departments = serializers.ListField(child=serializers.CharField(max_length=100), required=False)
+    
     class Meta:
         model = Post
-        fields = ('title', 'content', 'media_url', 'media_type', 'tags', 'is_public')
+        fields = (
+            'title', 'content', 'media_url', 'media_type', 'tags', 'is_public',
+            'target_colleges', 'target_departments'
+        )
     
     def create(self, validated_data):
         validated_data['author'] = self.context['request'].user
@@ -64,6 +90,11 @@ class CommentCreateSerializer(serializers.ModelSerializer):
         model = Comment
         fields = ('content', 'parent_comment')
     
+    def validate_parent_comment(self, value):
+        if value is not None and value.post_id != self.context['post'].pk:
+            raise serializers.ValidationError('The comment being replied to is on another post.')
+        return value
+    
     def create(self, validated_data):
         validated_data['user'] = self.context['request'].user
         validated_data['post'] = self.context['post']
@@ -1,3 +1,223 @@
-from django.test import TestCase
+import datetime
+from unittest import mock
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from . import timelines, trending, viewcounts
+from .models import Comment, Like, Post, PostDailyViews, Timeline, TimelineEntry
+
+
+class PostListQueryTests(TestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.reader = User.objects.create_user(
+            email='reader@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student'
+        )
+        self.client.force_login(self.reader)
+
+    def add_posts(self, count):
+        for number in range(count):
+            post = Post.objects.create(title=f'Post {number}', content='Body', author=self.executive)
+            Like.objects.create(post=post, user=self.reader)
+            comment = Comment.objects.create(post=post, user=self.reader, content='First')
+            Comment.objects.create(post=post, user=self.executive, content='Reply', parent_comment=comment)
+
+    def list_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/posts/', secure=True)
+        self.assertEqual(response.status_code, 200)
+        return response, len(queries)
+
+    def test_query_count_does_not_grow_with_posts(self):
+        self.add_posts(5)
+        response, five = self.list_queries()
+        self.add_posts(5)
+        _, ten = self.list_queries()
+
+        self.assertEqual(five, ten)
+        post = response.data['results'][0]
+        self.assertEqual((post['likes_count'], post['comments_count'], post['has_liked']), (1, 2, True))
+        self.assertEqual(len(post['comments'][0]['replies']), 1)
+
+
+@override_settings(POST_VIEW_BUFFER_SIZE=2)
+class ViewCountTests(TestCase):
+    def setUp(self):
+        executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.posts = [
+            Post.objects.create(title=f'Post {number}', content='Body', author=executive) for number in range(3)
+        ]
+        # Flushes are driven by hand here, not by the background thread
+        patcher = mock.patch.object(viewcounts, 'start_flusher')
+        self.start_flusher = patcher.start()
+        self.addCleanup(patcher.stop)
+        viewcounts._take_buffer()
+        self.addCleanup(viewcounts._take_buffer)
+        viewcounts._wake.clear()
+        self.addCleanup(viewcounts._wake.clear)
+
+    def test_recording_never_writes_inline(self):
+        with self.assertNumQueries(0):
+            for post in self.posts:
+                viewcounts.record_view(post.pk, 'user:1', user_id=None)
+
+        self.assertTrue(self.start_flusher.called)
+        # A full buffer wakes the flusher instead of flushing in the request
+        self.assertTrue(viewcounts._wake.is_set())
+        self.assertFalse(PostDailyViews.objects.exists())
+
+    def test_flush_writes_buffered_views(self):
+        viewcounts.record_view(self.posts[0].pk, 'user:1')
+        viewcounts.record_view(self.posts[0].pk, 'user:2')
+        viewcounts.record_view(self.posts[0].pk, 'user:1')
+
+        self.assertEqual(viewcounts.flush(), 3)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).view_count, 3)
+        daily = PostDailyViews.objects.get(post=self.posts[0])
+        self.assertEqual((daily.views, daily.unique_viewers), (3, 2))
+        self.assertEqual(viewcounts.flush(), 0)
+
+
+class HotScoreTests(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.post = Post.objects.create(title='Post', content='Body', author=self.author)
+        trending.top_posts.clear()
+
+    def hot_score(self):
+        return Post.objects.get(pk=self.post.pk).hot_score
+
+    def test_removing_decayed_engagement_subtracts_its_decayed_weight(self):
+        like = Like.objects.create(post=self.post, user=self.author)
+        day_ago = timezone.now() - datetime.timedelta(hours=trending.HALF_LIFE_HOURS)
+        Like.objects.filter(pk=like.pk).update(created_at=day_ago)
+        Post.objects.filter(pk=self.post.pk).update(hot_score_at=day_ago)
+        trending.decay_all()
+        before = self.hot_score()
+
+        Like.objects.get(pk=like.pk).delete()
+
+        # One half-life later the like is worth half its weight
+        self.assertAlmostEqual(before - self.hot_score(), trending.WEIGHTS['like'] / 2, places=3)
+
+    def test_removing_engagement_since_the_last_decay_subtracts_full_weight(self):
+        comment = Comment.objects.create(post=self.post, user=self.author, content='Hi')
+        self.assertAlmostEqual(self.hot_score(), trending.WEIGHTS['post'] + trending.WEIGHTS['comment'], places=3)
+
+        comment.delete()
+        self.assertAlmostEqual(self.hot_score(), trending.WEIGHTS['post'], places=3)
+
+
+class TimelineTests(TestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.engineer = User.objects.create_user(
+            email='engineer@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student',
+            college='Engineering', department='Civil'
+        )
+        self.doctor = User.objects.create_user(
+            email='doctor@example.com', password='secret-pass-123',
+            first_name='Hawa', last_name='Ali', gender='Female', role='Student',
+            college='Health', department='Medicine'
+        )
+
+    def post(self, title, **kwargs):
+        return Post.objects.create(title=title, content='Body', author=self.executive, **kwargs)
+
+    def feed_titles(self, user):
+        entries, _ = timelines.feed_page(user)
+        return [entry.post.title for entry in entries]
+
+    def test_backfill_writes_existing_posts_of_the_audience(self):
+        self.post('Everyone')
+        self.post('Civil only', target_departments=['Civil'])
+        self.post('Health only', target_colleges=['Health'])
+        self.post('Hidden', is_public=False)
+
+        self.assertEqual(self.feed_titles(self.engineer), ['Civil only', 'Everyone'])
+        self.assertEqual(self.feed_titles(self.doctor), ['Health only', 'Everyone'])
+
+    def test_new_posts_fan_out_to_existing_timelines(self):
+        timelines.timeline_for(self.engineer)
+        timelines.timeline_for(self.doctor)
+
+        self.post('Everyone')
+        self.post('Civil only', target_departments=['Civil'])
+
+        self.assertEqual(self.feed_titles(self.engineer), ['Civil only', 'Everyone'])
+        self.assertEqual(self.feed_titles(self.doctor), ['Everyone'])
+
+    def test_edits_and_retargeting_move_entries(self):
+        timelines.timeline_for(self.engineer)
+        timelines.timeline_for(self.doctor)
+        post = self.post('Notice', target_departments=['Civil'])
+
+        post.target_departments = ['Medicine']
+        post.save()
+        self.assertEqual(self.feed_titles(self.engineer), [])
+        self.assertEqual(self.feed_titles(self.doctor), ['Notice'])
+
+        post.target_departments = []
+        post.save()
+        self.assertEqual(self.feed_titles(self.engineer), ['Notice'])
+
+        post.is_public = False
+        post.save()
+        self.assertFalse(TimelineEntry.objects.filter(post=post).exists())
+
+    def test_deleted_timeline_is_recreated(self):
+        self.post('Everyone')
+        timelines.timeline_for(self.engineer)
+        Timeline.objects.all().delete()
+
+        self.assertEqual(self.feed_titles(self.engineer), ['Everyone'])
+
+    def test_keyset_pages_cover_the_feed_once(self):
+        posts = [self.post(f'Post {number}') for number in range(7)]
+        # Equal timestamps are ordered by post id; the timeline is backfilled
+        # on first read, so its entries copy these timestamps
+        Post.objects.filter(pk__in=[posts[2].pk, posts[3].pk, posts[4].pk]).update(created_at=posts[2].created_at)
+
+        seen = []
+        position = None
+        while True:
+            entries, cursor = timelines.feed_page(self.engineer, position, page_size=3)
+            seen.extend(entry.post_id for entry in entries)
+            if cursor is None:
+                break
+            position = timelines.decode_cursor(cursor)
+
+        self.assertEqual(len(seen), 7)
+        self.assertEqual(set(seen), {post.pk for post in posts})
+        self.assertIsNone(timelines.decode_cursor('not a cursor'))
+
+    def test_student_views_apply_the_audience(self):
+        self.post('Everyone')
+        civil = self.post('Civil only', target_departments=['Civil'])
+        self.client.force_login(self.doctor)
+
+        dashboard = self.client.get('/api/student/dashboard/', secure=True)
+        listing = self.client.get('/api/student/posts/', secure=True)
+        detail = self.client.get(f'/api/student/posts/{civil.pk}/', secure=True)
+
+        self.assertEqual([post['title'] for post in dashboard.data['dashboard']['recent_posts']], ['Everyone'])
+        self.assertEqual([post['title'] for post in listing.data['results']], ['Everyone'])
+        self.assertEqual(detail.status_code, 404)
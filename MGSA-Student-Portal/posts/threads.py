@@ -0,0 +1,114 @@
+# posts/threads.py
+"""
+Comment threads.
+
+Every reply stores the top-level comment of its thread in root_comment, so
+all of a post's comments, or a page of its top-level threads with the first
+few replies of each, load with select_related('user') in one or two
+queries. Each comment is serialized once without recursion and the tree is
+assembled in memory in a single pass.
+"""
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+
+from .models import Comment
+from .serializers import CommentSerializer
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Replies shown under each top-level comment of a page
+DEFAULT_REPLY_PREVIEW = 3
+MAX_REPLY_PREVIEW = 50
+
+
+def link_tree(items):
+    """
+    Put each item dict (with 'id', 'parent_comment' and an empty 'replies'
+    list) under its parent. Items whose parent is not among them are
+    returned as the top level, in the order given.
+    """
+    by_id = {item['id']: item for item in items}
+    roots = []
+    for item in items:
+        parent = by_id.get(item['parent_comment'])
+        (parent['replies'] if parent else roots).append(item)
+    return roots
+
+
+def serialize_tree(comments, context=None):
+    """Nested CommentSerializer data for ``comments``"""
+    context = {**(context or {}), 'flat_replies': True, 'serialized_users': {}}
+    return link_tree(CommentSerializer(comments, many=True, context=context).data)
+
+
+def post_comments(post_id, context=None):
+    """Every comment of a post as a tree, in one query"""
+    comments = Comment.objects.filter(post_id=post_id).select_related('user').order_by('created_at', 'pk')
+    return serialize_tree(comments, context)
+
+
+def comment_thread(comment_id, context=None):
+    """A top-level comment with all of its replies, or None"""
+    comments = Comment.objects.filter(
+        Q(pk=comment_id) | Q(root_comment_id=comment_id)
+    ).select_related('user').order_by('created_at', 'pk')
+    roots = [item for item in serialize_tree(comments, context) if item['id'] == comment_id]
+    return roots[0] if roots else None
+
+
+def load_page(post_id, page=1, page_size=DEFAULT_PAGE_SIZE, reply_limit=DEFAULT_REPLY_PREVIEW, newest_first=False):
+    """
+    (top-level comments, their first ``reply_limit`` replies, has next page)
+    for one page of a post's threads. Top-level comments carry
+    ``reply_count``. Two queries.
+    """
+    ordering = ['-created_at', '-pk'] if newest_first else ['created_at', 'pk']
+    offset = (page - 1) * page_size
+    # One extra row tells whether there is a next page without a COUNT
+    roots = list(
+        Comment.objects.filter(post_id=post_id, parent_comment__isnull=True)
+        .select_related('user')
+        .annotate(reply_count=Count('thread_replies'))
+        .order_by(*ordering)[offset:offset + page_size + 1]
+    )
+    has_next = len(roots) > page_size
+    roots = roots[:page_size]
+
+    replies = []
+    if roots and reply_limit:
+        # Replies are created after their parents, so the first replies of
+        # a thread always include their parents
+        replies = list(
+            Comment.objects.filter(root_comment_id__in=[root.pk for root in roots])
+            .select_related('user')
+            .annotate(position=Window(
+                RowNumber(),
+                partition_by=[F('root_comment_id')],
+                order_by=[F('created_at').asc(), F('pk').asc()]
+            ))
+            .filter(position__lte=reply_limit)
+            .order_by('created_at', 'pk')
+        )
+    return roots, replies, has_next
+
+
+def thread_page(post_id, page=1, page_size=DEFAULT_PAGE_SIZE, reply_limit=DEFAULT_REPLY_PREVIEW,
+                newest_first=False, context=None):
+    """
+    One page of a post's top-level comments, each with its first replies as
+    a tree, its ``reply_count`` and whether there are more replies to load
+    """
+    roots, replies, has_next = load_page(post_id, page, page_size, reply_limit, newest_first)
+    reply_counts = {root.pk: root.reply_count for root in roots}
+    threads = serialize_tree([*roots, *replies], context)
+    for thread in threads:
+        thread['reply_count'] = reply_counts.get(thread['id'], 0)
+        thread['has_more_replies'] = thread['reply_count'] > reply_limit
+    return {
+        'page': page,
+        'page_size': page_size,
+        'has_next': has_next,
+        'next_page': page + 1 if has_next else None,
+        'results': threads,
+    }
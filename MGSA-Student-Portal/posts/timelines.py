@@ -0,0 +1,144 @@
+# posts/timelines.py
+"""
+Department timelines.
+
+Posts can target colleges and departments. Rather than filtering posts
+against the reader's department on every request, each (college,
+department) pair that has readers gets a Timeline. When a post is saved it
+is written to every timeline in its audience (fan-out on write), so a
+reader's feed, global and targeted posts together, is a keyset range scan
+of one timeline's entries. A timeline is created and backfilled the first
+time a reader from that department opens their feed. Readers without a
+department use the EVERYONE timeline, which only holds untargeted posts.
+"""
+import base64
+import binascii
+import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+from .models import Post, Timeline, TimelineEntry
+
+EVERYONE_KEY = '-:-'
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def timeline_key(college, department):
+    return f"{slugify(college or '') or '-'}:{slugify(department or '') or '-'}"
+
+
+def audience_of(post):
+    """(college slugs, department slugs) a post targets; both empty means everyone"""
+    return (
+        {slugify(college) for college in post.target_colleges or [] if slugify(college)},
+        {slugify(department) for department in post.target_departments or [] if slugify(department)},
+    )
+
+
+def reaches(post, key):
+    """Whether ``post`` belongs on the timeline with ``key``"""
+    if not post.is_public:
+        return False
+    colleges, departments = audience_of(post)
+    if not colleges and not departments:
+        return True
+    college, department = key.split(':', 1)
+    return college in colleges or department in departments
+
+
+def timeline_for(user):
+    """Id of the timeline ``user`` reads, creating and backfilling it if needed"""
+    key = timeline_key(user.college, user.department) if user.department else EVERYONE_KEY
+    timeline_id = Timeline.objects.filter(key=key).values_list('id', flat=True).first()
+    if timeline_id is not None:
+        return timeline_id
+    try:
+        with transaction.atomic():
+            timeline = Timeline.objects.create(
+                key=key,
+                college=user.college if key != EVERYONE_KEY else '',
+                department=user.department if key != EVERYONE_KEY else ''
+            )
+            backfill(timeline)
+    except IntegrityError:
+        # Another first reader created (and backfilled) it in the meantime
+        return Timeline.objects.get(key=key).pk
+    return timeline.pk
+
+
+def visible_posts(user):
+    """Posts on ``user``'s timeline, for views that page or filter with querysets"""
+    return Post.objects.filter(timeline_entries__timeline_id=timeline_for(user))
+
+
+def backfill(timeline):
+    """Write the existing posts of a new timeline's audience to it"""
+    posts = Post.objects.filter(is_public=True).only(
+        'id', 'is_public', 'created_at', 'target_colleges', 'target_departments'
+    )
+    entries = [
+        TimelineEntry(timeline=timeline, post_id=post.pk, created_at=post.created_at)
+        for post in posts.iterator(chunk_size=2000)
+        if reaches(post, timeline.key)
+    ]
+    TimelineEntry.objects.bulk_create(entries, batch_size=1000, ignore_conflicts=True)
+    return len(entries)
+
+
+def fan_out(post, created=False):
+    """Make the post's timeline entries match its audience"""
+    wanted = {
+        timeline_id
+        for timeline_id, key in Timeline.objects.values_list('id', 'key')
+        if reaches(post, key)
+    }
+    with transaction.atomic():
+        if not created:
+            current = set(post.timeline_entries.values_list('timeline_id', flat=True))
+            stale = current - wanted
+            if stale:
+                post.timeline_entries.filter(timeline_id__in=stale).delete()
+            wanted -= current
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(timeline_id=timeline_id, post=post, created_at=post.created_at) for timeline_id in wanted],
+            batch_size=1000,
+            ignore_conflicts=True
+        )
+
+
+def encode_cursor(entry):
+    raw = f"{entry.created_at.isoformat()}|{entry.post_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """(created_at, post id) of a feed cursor, None if invalid"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, post_id = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(created_at), int(post_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+def feed_page(user, position=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    (entries, next cursor) of ``user``'s feed after ``position``, newest
+    first. Entries have their post and its author selected.
+    """
+    entries = TimelineEntry.objects.filter(timeline_id=timeline_for(user))
+    if position is not None:
+        created_at, post_id = position
+        entries = entries.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, post_id__lt=post_id))
+
+    # One extra row tells whether there is another page
+    page = list(
+        entries.select_related('post__author').order_by('-created_at', '-post_id')[:page_size + 1]
+    )
+    has_more = len(page) > page_size
+    page = page[:page_size]
+    return page, encode_cursor(page[-1]) if has_more else None
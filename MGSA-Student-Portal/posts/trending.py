@@ -0,0 +1,130 @@
+# posts/trending.py
+"""
+Hot scores for posts.
+
+A post's hot score is the sum of its engagement weights, each halving every
+HALF_LIFE_HOURS. New engagement is added as it happens with one F()
+update; decay_hot_scores then multiplies every score by the decay since
+the post's last decay, one UPDATE per distinct hot_score_at. Engagement
+between two runs is counted at full weight until the next run, so the run
+interval bounds the error. Ordering by the indexed hot_score gives the
+trending feed.
+
+The admin dashboard's top posts come from TopPosts, a bounded in-memory
+list of the hottest posts per author role. It is refilled with one indexed
+query per role when stale and follows bumps to posts it holds in between.
+"""
+import heapq
+import threading
+import time
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Post
+
+HALF_LIFE_HOURS = 24
+
+WEIGHTS = {
+    'post': 3.0,
+    'like': 1.0,
+    'comment': 2.0,
+    'view': 0.1,
+}
+
+# Scores below this are set to zero so they stop being decayed
+MIN_SCORE = 0.01
+
+TOP_K = 50
+TOP_TTL = 60
+
+
+def decay_factor(seconds):
+    return 0.5 ** (seconds / (HALF_LIFE_HOURS * 3600))
+
+
+def initial_score(likes, comments, views, age_seconds):
+    """Score of an existing post, with all its engagement aged like the post"""
+    weight = WEIGHTS['post'] + WEIGHTS['like'] * likes + WEIGHTS['comment'] * comments + WEIGHTS['view'] * views
+    return weight * decay_factor(max(age_seconds, 0))
+
+
+def bump(post_id, delta):
+    """Add ``delta`` to a post's hot score"""
+    Post.objects.filter(pk=post_id).update(hot_score=Greatest(F('hot_score') + delta, 0.0))
+    top_posts.bump(post_id, delta)
+
+
+def remove_engagement(post_id, weight, created_at):
+    """
+    Take back engagement of ``weight`` made at ``created_at``. The score is
+    valued at hot_score_at, where that engagement is worth its weight
+    decayed since it was made, or its full weight if made after that.
+    """
+    scored_at = Post.objects.filter(pk=post_id).values_list('hot_score_at', flat=True).first()
+    if scored_at is None:
+        return
+    bump(post_id, -weight * decay_factor(max((scored_at - created_at).total_seconds(), 0)))
+
+
+def decay_all(now=None):
+    """Decay every hot score to ``now``. Returns the number of posts decayed."""
+    now = now or timezone.now()
+    decayed = 0
+    with transaction.atomic():
+        stamps = Post.objects.filter(hot_score__gt=0, hot_score_at__lt=now).values_list(
+            'hot_score_at', flat=True
+        ).distinct().order_by()
+        for stamp in list(stamps):
+            decayed += Post.objects.filter(hot_score__gt=0, hot_score_at=stamp).update(
+                hot_score=F('hot_score') * decay_factor((now - stamp).total_seconds()),
+                hot_score_at=now
+            )
+        Post.objects.filter(hot_score__gt=0, hot_score__lt=MIN_SCORE).update(hot_score=0)
+    top_posts.clear()
+    return decayed
+
+
+def trending(queryset=None):
+    return (queryset if queryset is not None else Post.objects.all()).order_by('-hot_score', '-created_at')
+
+
+class TopPosts:
+    """The TOP_K hottest posts per author role, kept in process memory"""
+
+    def __init__(self, size=TOP_K, ttl=TOP_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._roles = {}  # role or None -> (loaded_at, {post_id: score})
+
+    def _load(self, role):
+        posts = Post.objects.filter(hot_score__gt=0)
+        if role:
+            posts = posts.filter(author__role=role)
+        return dict(trending(posts).values_list('pk', 'hot_score')[:self.size])
+
+    def top(self, role=None, limit=10):
+        """[(post_id, score)] of the hottest posts, of authors with ``role`` if given"""
+        with self._lock:
+            entry = self._roles.get(role)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            entry = (time.monotonic(), self._load(role))
+            with self._lock:
+                self._roles[role] = entry
+        return heapq.nlargest(min(limit, self.size), entry[1].items(), key=lambda item: item[1])
+
+    def bump(self, post_id, delta):
+        with self._lock:
+            for _, scores in self._roles.values():
+                if post_id in scores:
+                    scores[post_id] = max(scores[post_id] + delta, 0)
+
+    def clear(self):
+        with self._lock:
+            self._roles.clear()
+
+
+top_posts = TopPosts()
@@ -3,8 +3,12 @@ from . import views
 
 urlpatterns = [
     path('', views.PostListView.as_view(), name='post-list'),
+    path('feed/', views.post_feed, name='post-feed'),
     path('<int:pk>/', views.PostDetailView.as_view(), name='post-detail'),
     path('<int:post_id>/like/', views.toggle_like, name='post-like'),
+    path('<int:post_id>/view/', views.record_post_view, name='post-view'),
+    path('<int:post_id>/views/', views.post_view_stats, name='post-view-stats'),
     path('<int:post_id>/comments/', views.CommentListView.as_view(), name='comment-list'),
     path('comments/<int:pk>/', views.CommentDetailView.as_view(), name='comment-detail'),
+    path('comments/<int:pk>/thread/', views.comment_thread_detail, name='comment-thread'),
 ]
\ No newline at end of file
@@ -0,0 +1,285 @@
+# posts/viewcounts.py
+"""
+Buffered post view counting.
+
+Views are counted in process memory instead of with a write per page load.
+Each (post, day) in the buffer keeps a view total and a HyperLogLog sketch
+of who viewed it: 2**PRECISION one-byte registers, about 3% error, however
+many viewers there are. A background thread, started with the first view,
+flushes the buffer every POST_VIEW_FLUSH_INTERVAL seconds, or sooner once
+it holds POST_VIEW_BUFFER_SIZE entries, and the process flushes once more
+at exit; requests never wait on a flush. A flush merges the totals and
+sketches into PostDailyViews, adds the views to Post.view_count and the hot
+score and logs one post_view activity per signed-in viewer, all as batch
+writes in one transaction. Sketches merge by taking the larger register,
+so flushes from several processes combine correctly and a post's unique
+viewers over any range of days is the estimate of the merged sketches.
+Only a process that is killed loses its buffered views, at most one
+interval's worth.
+"""
+import atexit
+import datetime
+import hashlib
+import math
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, connection, transaction
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+from django.utils import timezone
+
+PRECISION = 10
+REGISTER_COUNT = 1 << PRECISION
+
+# Signed-in viewers logged as post_view activities per post per flush
+MAX_LOGGED_VIEWERS = 500
+
+_lock = threading.Lock()
+_buffer = {}  # (post_id, date) -> [views, HyperLogLog]
+_viewers = {}  # post_id -> set of user ids
+
+_flusher = None
+_wake = threading.Event()
+
+
+class HyperLogLog:
+    """Approximate distinct count in REGISTER_COUNT bytes"""
+    __slots__ = ('registers',)
+
+    def __init__(self, registers=None):
+        registers = bytes(registers or b'')
+        self.registers = bytearray(registers) if len(registers) == REGISTER_COUNT else bytearray(REGISTER_COUNT)
+
+    def add(self, value):
+        hashed = int.from_bytes(hashlib.blake2b(str(value).encode(), digest_size=8).digest(), 'big')
+        index = hashed >> (64 - PRECISION)
+        rest = hashed & ((1 << (64 - PRECISION)) - 1)
+        rank = (64 - PRECISION) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        merged = np.maximum(
+            np.frombuffer(self.registers, dtype=np.uint8),
+            np.frombuffer(other.registers, dtype=np.uint8)
+        )
+        self.registers = bytearray(merged.tobytes())
+        return self
+
+    def estimate(self):
+        registers = np.frombuffer(self.registers, dtype=np.uint8)
+        alpha = 0.7213 / (1 + 1.079 / REGISTER_COUNT)
+        raw = alpha * REGISTER_COUNT ** 2 / float(np.sum(np.exp2(-registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(registers == 0))
+        if raw <= 2.5 * REGISTER_COUNT and zeros:
+            # Linear counting is more accurate for small counts
+            return round(REGISTER_COUNT * math.log(REGISTER_COUNT / zeros))
+        return round(raw)
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+
+def get_flush_interval():
+    return getattr(settings, 'POST_VIEW_FLUSH_INTERVAL', 60)
+
+
+def get_buffer_size():
+    return getattr(settings, 'POST_VIEW_BUFFER_SIZE', 500)
+
+
+def viewer_key(request):
+    """Who is viewing: the user, else the session, else the address and browser"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.pk}"
+    session_key = getattr(getattr(request, 'session', None), 'session_key', None)
+    if session_key:
+        return f"session:{session_key}"
+    return f"anon:{request.META.get('REMOTE_ADDR', '')}:{request.META.get('HTTP_USER_AGENT', '')}"
+
+
+def record_view(post_id, viewer, user_id=None):
+    """Count a view of a post; a full buffer wakes the flusher thread"""
+    key = (post_id, timezone.localdate())
+    with _lock:
+        entry = _buffer.get(key)
+        if entry is None:
+            entry = _buffer[key] = [0, HyperLogLog()]
+        entry[0] += 1
+        entry[1].add(viewer)
+        if user_id is not None:
+            viewers = _viewers.setdefault(post_id, set())
+            if len(viewers) < MAX_LOGGED_VIEWERS:
+                viewers.add(user_id)
+        full = len(_buffer) >= get_buffer_size()
+
+    if _flusher is None or not _flusher.is_alive():
+        start_flusher()
+    if full:
+        _wake.set()
+
+
+def record_request(request, post_id):
+    record_view(
+        post_id,
+        viewer_key(request),
+        user_id=request.user.pk if request.user.is_authenticated else None
+    )
+
+
+def start_flusher():
+    """Start this process's flusher thread unless it is running (threads don't survive a fork)"""
+    global _flusher
+
+    with _lock:
+        if _flusher is not None and _flusher.is_alive():
+            return
+        _flusher = threading.Thread(target=_flush_loop, name='post-view-flusher', daemon=True)
+        _flusher.start()
+
+
+def _flush_loop():
+    while True:
+        _wake.wait(get_flush_interval())
+        _wake.clear()
+        try:
+            flush()
+        except DatabaseError:
+            # The views stay buffered and go out with the next flush
+            pass
+        finally:
+            # The thread's own connection, opened by the flush
+            connection.close()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        flush()
+    except DatabaseError:
+        # Nothing to retry with at exit; these views are lost
+        pass
+
+
+def _take_buffer():
+    global _buffer, _viewers
+
+    with _lock:
+        buffer, viewers = _buffer, _viewers
+        _buffer, _viewers = {}, {}
+    return buffer, viewers
+
+
+def _restore_buffer(buffer, viewers):
+    """Put back views that failed to flush so the next flush retries them"""
+    with _lock:
+        for key, (views, sketch) in buffer.items():
+            entry = _buffer.get(key)
+            if entry is None:
+                _buffer[key] = [views, sketch]
+            else:
+                entry[0] += views
+                entry[1].merge(sketch)
+        for post_id, user_ids in viewers.items():
+            _viewers.setdefault(post_id, set()).update(user_ids)
+
+
+def flush():
+    """Write the buffered views to the database. Returns the views written."""
+    buffer, viewers = _take_buffer()
+    if not buffer:
+        return 0
+    try:
+        return _write(buffer, viewers)
+    except Exception:
+        _restore_buffer(buffer, viewers)
+        raise
+
+
+def _write(buffer, viewers):
+    from django.contrib.contenttypes.models import ContentType
+    from analytics.models import UserActivity
+    from .models import Post, PostDailyViews
+    from .trending import WEIGHTS, top_posts
+
+    post_ids = set(Post.objects.filter(pk__in={post_id for post_id, _ in buffer}).values_list('pk', flat=True))
+    buffer = {key: entry for key, entry in buffer.items() if key[0] in post_ids}
+    if not buffer:
+        return 0
+
+    with transaction.atomic():
+        # Make sure every row exists first, so processes flushing the same
+        # post and day lock the same row instead of racing to insert it
+        PostDailyViews.objects.bulk_create(
+            [PostDailyViews(post_id=post_id, date=date) for post_id, date in buffer],
+            batch_size=500,
+            ignore_conflicts=True
+        )
+        rows = PostDailyViews.objects.select_for_update().filter(
+            post_id__in={post_id for post_id, _ in buffer},
+            date__in={date for _, date in buffer}
+        )
+
+        updated = []
+        post_views = {}
+        for row in rows:
+            entry = buffer.get((row.post_id, row.date))
+            if entry is None:
+                continue
+            views, sketch = entry
+            sketch.merge(HyperLogLog(row.sketch))
+            row.views += views
+            row.sketch = sketch.to_bytes()
+            row.unique_viewers = sketch.estimate()
+            updated.append(row)
+            post_views[row.post_id] = post_views.get(row.post_id, 0) + views
+
+        PostDailyViews.objects.bulk_update(updated, ['views', 'unique_viewers', 'sketch'], batch_size=500)
+
+        Post.objects.filter(pk__in=post_views).update(
+            view_count=F('view_count') + Case(
+                *[When(pk=post_id, then=Value(views)) for post_id, views in post_views.items()],
+                default=Value(0),
+                output_field=IntegerField()
+            ),
+            hot_score=F('hot_score') + Case(
+                *[When(pk=post_id, then=Value(views * WEIGHTS['view'])) for post_id, views in post_views.items()],
+                default=Value(0.0),
+                output_field=FloatField()
+            )
+        )
+        for post_id, views in post_views.items():
+            top_posts.bump(post_id, views * WEIGHTS['view'])
+
+        post_type = ContentType.objects.get_for_model(Post)
+        UserActivity.objects.bulk_create([
+            UserActivity(
+                user_id=user_id,
+                activity_type='post_view',
+                description=f"Viewed post #{post_id}",
+                content_type=post_type,
+                object_id=post_id
+            )
+            for post_id, user_ids in viewers.items() if post_id in post_ids
+            for user_id in user_ids
+        ], batch_size=500)
+
+    return sum(post_views.values())
+
+
+def view_stats(post, days=30):
+    """Daily views and unique viewers of a post, with the unique viewers over the whole range"""
+    since = timezone.localdate() - datetime.timedelta(days=days - 1)
+    rows = list(post.daily_views.filter(date__gte=since).order_by('date'))
+    merged = HyperLogLog()
+    for row in rows:
+        merged.merge(HyperLogLog(row.sketch))
+    return {
+        'views': sum(row.views for row in rows),
+        'unique_viewers': merged.estimate(),
+        'daily': [
+            {'date': row.date, 'views': row.views, 'unique_viewers': row.unique_viewers}
+            for row in rows
+        ],
+    }
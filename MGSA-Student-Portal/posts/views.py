@@ -2,48 +2,31 @@ from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Count, Q
+from django.db.models import Count, Prefetch, Q
+from analytics.models import ContentIndex
+from analytics.tags import TagFilterBackend
 from .models import Post, Like, Comment
 from .serializers import (
     PostSerializer, PostCreateSerializer, LikeSerializer,
     CommentSerializer, CommentCreateSerializer
 )
 from .filters import PostFilter
+from . import timelines
+from .viewcounts import record_request, view_stats
+from .threads import (
+    DEFAULT_PAGE_SIZE, DEFAULT_REPLY_PREVIEW, MAX_PAGE_SIZE, MAX_REPLY_PREVIEW,
+    comment_thread, thread_page
+)
 
-class PostListView(generics.ListCreateAPIView):
-    permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['author', 'tags', 'is_public']
-    
-    def get_serializer_class(self):
-        if self.request.method == 'POST':
-            return PostCreateSerializer
-        return PostSerializer
-    
-    def get_queryset(self):
-        queryset = Post.objects.filter(is_public=True).select_related('author').prefetch_related('likes', 'comments')
-        
-        # If user is authenticated, show their private posts too
-        if self.request.user.is_authenticated:
-            queryset = queryset.filter(
-                Q(is_public=True) | Q(author=self.request.user)
-            )
-        
-        return queryset
-    
-    def perform_create(self, serializer):
-        # Only allow Executives and Admins to create posts
-        if self.request.user.role in ['Executive', 'Admin']:
-            serializer.save(author=self.request.user)
-        else:
-            raise permissions.PermissionDenied("Only executives and admins can create posts")
+# Comments with their authors, for PostSerializer's comment trees
+COMMENTS_PREFETCH = Prefetch('comments', queryset=Comment.objects.select_related('user'))
 
 class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
     def get_queryset(self):
-        queryset = Post.objects.select_related('author').prefetch_related('likes', 'comments')
+        queryset = Post.objects.select_related('author').prefetch_related('likes', COMMENTS_PREFETCH)
         
         # If user is authenticated, show their private posts too
         if self.request.user.is_authenticated:
@@ -52,6 +35,11 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
             )
         return queryset.filter(is_public=True)
     
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        record_request(request, int(kwargs['pk']))
+        return response
+    
     def update(self, request, *args, **kwargs):
         instance = self.get_object()
         
@@ -76,6 +64,57 @@ class PostDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         return super().destroy(request, *args, **kwargs)
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def post_feed(request):
+    """The reader's feed: posts for everyone and posts targeted at their college or department"""
+    position = None
+    cursor = request.GET.get('cursor')
+    if cursor:
+        position = timelines.decode_cursor(cursor)
+        if position is None:
+            return Response({
+                'success': False,
+                'message': 'Invalid cursor'
+            }, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page_size = min(max(int(request.GET.get('page_size', timelines.DEFAULT_PAGE_SIZE)), 1), timelines.MAX_PAGE_SIZE)
+    except ValueError:
+        page_size = timelines.DEFAULT_PAGE_SIZE
+    
+    entries, next_cursor = timelines.feed_page(request.user, position, page_size)
+    post_ids = [entry.post_id for entry in entries]
+    liked = set(Like.objects.filter(user=request.user, post_id__in=post_ids).values_list('post_id', flat=True))
+    counts = {
+        object_id: (like_count, comment_count)
+        for object_id, like_count, comment_count in ContentIndex.objects.filter(
+            content_type='post', object_id__in=post_ids
+        ).values_list('object_id', 'like_count', 'comment_count')
+    }
+    
+    return Response({
+        'success': True,
+        'posts': [{
+            'id': entry.post.id,
+            'title': entry.post.title,
+            'content': entry.post.content,
+            'media_url': entry.post.media_url,
+            'media_type': entry.post.media_type,
+            'tags': entry.post.tags,
+            'author': f"{entry.post.author.first_name} {entry.post.author.last_name}",
+            'author_role': entry.post.author.role,
+            'target_colleges': entry.post.target_colleges,
+            'target_departments': entry.post.target_departments,
+            'likes_count': counts.get(entry.post_id, (0, 0))[0],
+            'comments_count': counts.get(entry.post_id, (0, 0))[1],
+            'view_count': entry.post.view_count,
+            'has_liked': entry.post_id in liked,
+            'created_at': entry.post.created_at
+        } for entry in entries],
+        'next_cursor': next_cursor,
+        'page_size': page_size
+    })
+
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
 def toggle_like(request, post_id):
@@ -106,6 +145,53 @@ def toggle_like(request, post_id):
         'likes_count': likes_count
     })
 
+@api_view(['POST'])
+@permission_classes([permissions.IsAuthenticatedOrReadOnly])
+def record_post_view(request, post_id):
+    """Count a view of a post shown inline, e.g. in a feed"""
+    visible = Post.objects.filter(id=post_id).filter(
+        Q(is_public=True) | Q(author_id=request.user.id)
+    ).exists()
+    if not visible:
+        return Response({
+            'success': False,
+            'message': 'Post not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    record_request(request, post_id)
+    return Response({'success': True}, status=status.HTTP_202_ACCEPTED)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def post_view_stats(request, post_id):
+    """Daily views and unique viewers of a post for its author and executives"""
+    try:
+        post = Post.objects.get(id=post_id)
+    except Post.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Post not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    if post.author != request.user and request.user.role not in ['Executive', 'Admin']:
+        return Response({
+            'success': False,
+            'message': 'Access denied. Executive privileges required.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        days = min(max(int(request.GET.get('days', 30)), 1), 365)
+    except ValueError:
+        days = 30
+    
+    return Response({
+        'success': True,
+        'post_id': post.id,
+        'view_count': post.view_count,
+        'days': days,
+        **view_stats(post, days=days)
+    })
+
 class CommentListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     
@@ -118,13 +204,45 @@ class CommentListView(generics.ListCreateAPIView):
         return Comment.objects.filter(
             post_id=self.kwargs['post_id'],
             parent_comment__isnull=True
-        ).select_related('user').prefetch_related('replies')
+        ).select_related('user')
+    
+    def list(self, request, *args, **kwargs):
+        """A page of top-level threads, each with a preview of its replies"""
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+            page_size = min(max(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            reply_limit = min(max(int(request.GET.get('replies', DEFAULT_REPLY_PREVIEW)), 0), MAX_REPLY_PREVIEW)
+        except ValueError:
+            page, page_size, reply_limit = 1, DEFAULT_PAGE_SIZE, DEFAULT_REPLY_PREVIEW
+        
+        return Response(thread_page(
+            self.kwargs['post_id'],
+            page=page,
+            page_size=page_size,
+            reply_limit=reply_limit,
+            newest_first=request.GET.get('order') == 'newest',
+            context={'request': request}
+        ))
     
     def get_serializer_context(self):
         context = super().get_serializer_context()
         context['post'] = Post.objects.get(id=self.kwargs['post_id'])
         return context
 
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticatedOrReadOnly])
+def comment_thread_detail(request, pk):
+    """A top-level comment with every reply in its thread"""
+    comment = Comment.objects.filter(pk=pk).values('root_comment_id', 'post__is_public', 'post__author_id').first()
+    if comment is None or not (comment['post__is_public'] or comment['post__author_id'] == request.user.id):
+        return Response({
+            'success': False,
+            'message': 'Comment not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    thread = comment_thread(comment['root_comment_id'] or pk, {'request': request})
+    return Response(thread)
+
 class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
@@ -161,7 +279,7 @@ class CommentDetailView(generics.RetrieveUpdateDestroyAPIView):
         
         return super().destroy(request, *args, **kwargs)
 class PostListView(generics.ListAPIView):
-    queryset = Post.objects.all()
+    queryset = Post.objects.select_related('author').prefetch_related('likes', COMMENTS_PREFETCH)
     serializer_class = PostSerializer
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
     filterset_class = PostFilter    
\ No newline at end of file
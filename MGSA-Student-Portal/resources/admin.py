@@ -27,6 +27,7 @@ class ResourceAdmin(admin.ModelAdmin):
         'title',
         'description',
         'category',
+        'content__terms',
         'uploaded_by__email',
         'uploaded_by__first_name',
         'uploaded_by__last_name'
@@ -5,6 +5,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from .models import Resource
+from .recommendations import record_download
 
 @require_http_methods(["GET"])
 def api_get_resources(request):
@@ -45,9 +46,8 @@ def api_get_resources(request):
 def api_download_resource(request, resource_id):
     """Download a resource"""
     try:
-        resource = Resource.objects.get(id=resource_id)
-        resource.download_count += 1
-        resource.save()
+        resource = Resource.objects.select_related('uploaded_by').get(id=resource_id)
+        record_download(resource, request.user)
         
         return JsonResponse({
             'success': True,
@@ -0,0 +1,398 @@
+# resources/extraction.py
+"""
+Text extraction from uploaded resource files.
+
+Saving a resource with a new file queues a pending ResourceContent row; the
+request does no extraction. extract_resource_content works through the
+pending rows in a process pool. Each worker copies the file from storage to
+a temporary file in CHUNK_SIZE pieces while hashing it, then reads it with
+streaming readers: DOCX through its zip entry with iterparse, PDF with
+pypdf when it is installed and otherwise by scanning the memory mapped file
+for text operators, and legacy DOC by scanning for runs of text. Text stops
+at MAX_TEXT_CHARS, so memory is bounded whatever the file size.
+
+Rows are keyed by the SHA-256 of the file's content: a file whose content
+was already extracted, for this or any other resource, reuses that result
+instead of being read again. Text is stored zlib compressed next to its
+distinct words, which is what search matches against.
+"""
+import base64
+import binascii
+import hashlib
+import mmap
+import os
+import re
+import tempfile
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from xml.etree import ElementTree
+
+import django
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Resource, ResourceContent
+
+CHUNK_SIZE = 1 << 20
+MAX_TEXT_CHARS = 1_000_000
+# Decompressed bytes read from one PDF stream
+MAX_STREAM_BYTES = 16 << 20
+MAX_TERMS = 20_000
+
+EXTRACTORS = {}
+
+WORD = re.compile(r'\w+')
+
+# Common words of the languages resources are written in
+STOPWORDS = {
+    'en': {'the', 'and', 'of', 'to', 'in', 'is', 'that', 'for', 'it', 'with', 'as', 'are', 'this', 'be', 'on'},
+    'om': {'fi', 'kan', 'akka', 'irratti', 'keessa', 'ni', 'kana', 'isaa', 'keessatti', 'waan', 'yoo', 'jechuun'},
+}
+
+
+class TextCollector:
+    """Text pieces up to MAX_TEXT_CHARS"""
+
+    def __init__(self, limit=MAX_TEXT_CHARS):
+        self.limit = limit
+        self.pieces = []
+        self.length = 0
+
+    @property
+    def full(self):
+        return self.length >= self.limit
+
+    def add(self, text):
+        if text and not self.full:
+            text = text[:self.limit - self.length]
+            self.pieces.append(text)
+            self.length += len(text)
+
+    def text(self):
+        return re.sub(r'[ \t]*\n\s*', '\n', re.sub(r'[ \t\f\v]+', ' ', ''.join(self.pieces))).strip()
+
+
+def extractor(*kinds):
+    def register(function):
+        for kind in kinds:
+            EXTRACTORS[kind] = function
+        return function
+    return register
+
+
+def file_kind(resource):
+    """pdf, docx, doc or another type, from the file name and then file_type"""
+    extension = os.path.splitext(resource.file.name or '')[1].lower().lstrip('.')
+    return extension if extension in EXTRACTORS else resource.file_type
+
+
+def _mapped(file):
+    """The whole temporary file as a read-only memory map (bytes if empty)"""
+    if not os.fstat(file.fileno()).st_size:
+        return b''
+    return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@extractor('docx')
+def extract_docx(file, out):
+    with zipfile.ZipFile(file) as archive:
+        with archive.open('word/document.xml') as document:
+            for _, element in ElementTree.iterparse(document, events=('end',)):
+                tag = element.tag.rsplit('}', 1)[-1]
+                if tag == 't':
+                    out.add(element.text)
+                elif tag == 'tab':
+                    out.add('\t')
+                elif tag in ('br', 'cr'):
+                    out.add('\n')
+                elif tag == 'p':
+                    out.add('\n')
+                    element.clear()
+                if out.full:
+                    break
+        try:
+            properties = archive.read('docProps/app.xml')
+        except KeyError:
+            return None
+    pages = re.search(rb'<(?:\w+:)?Pages>(\d+)<', properties)
+    return int(pages.group(1)) if pages else None
+
+
+_PDF_PAGE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+_PDF_STREAM = re.compile(rb'(?<!end)stream\r?\n')
+_PDF_TEXT = re.compile(
+    rb'\[((?:\\.|[^\]\\])*)\]\s*TJ'
+    rb'|\(((?:\\.|[^)\\])*)\)\s*(?:Tj|\'|")'
+    rb'|\b(ET|T\*|Td|TD)\b'
+)
+_PDF_FILTER = re.compile(rb'/Filter\s*(\[[^\]]*\]|/\w+)')
+_PDF_ARRAY_ITEM = re.compile(rb'\(((?:\\.|[^)\\])*)\)|(-?\d+(?:\.\d+)?)')
+_PDF_ESCAPE = re.compile(rb'\\([0-7]{1,3}|.)', re.DOTALL)
+_PDF_ESCAPES = {b'n': b'\n', b'r': b'\r', b't': b'\t', b'b': b'', b'f': b'', b'\n': b'', b'\r': b''}
+
+
+def _pdf_string(raw):
+    def unescape(match):
+        code = match.group(1)
+        if code[:1].isdigit():
+            return bytes([int(code, 8) & 0xFF])
+        return _PDF_ESCAPES.get(code, code)
+    return _PDF_ESCAPE.sub(unescape, raw).decode('latin-1')
+
+
+def _pdf_decode(header, raw):
+    """A stream's data with its Flate and ASCII filters undone, None for other filters"""
+    match = _PDF_FILTER.search(header)
+    try:
+        for name in re.findall(rb'/(\w+)', match.group(1)) if match else []:
+            if name in (b'FlateDecode', b'Fl'):
+                raw = zlib.decompressobj().decompress(raw, MAX_STREAM_BYTES)
+            elif name in (b'ASCII85Decode', b'A85'):
+                raw = base64.a85decode(raw.split(b'~>', 1)[0].lstrip(b' \t\r\n').removeprefix(b'<~'))
+            elif name in (b'ASCIIHexDecode', b'AHx'):
+                digits = re.sub(rb'\s', b'', raw.split(b'>', 1)[0])
+                raw = binascii.unhexlify(digits + b'0' * (len(digits) % 2))
+            else:
+                return None
+    except (zlib.error, ValueError):
+        return None
+    return raw
+
+
+def _pdf_text_operators(content, out):
+    for match in _PDF_TEXT.finditer(content):
+        array, string, operator = match.groups()
+        if array is not None:
+            for item in _PDF_ARRAY_ITEM.finditer(array):
+                if item.group(1) is not None:
+                    out.add(_pdf_string(item.group(1)))
+                elif float(item.group(2)) < -200:
+                    # A wide negative offset between strings is a word gap
+                    out.add(' ')
+            out.add(' ')
+        elif string is not None:
+            out.add(_pdf_string(string) + ' ')
+        else:
+            out.add('\n')
+        if out.full:
+            return
+
+
+def _scan_pdf(file, out):
+    """Text of the content streams of a PDF that use no filters other than Flate and ASCII"""
+    data = _mapped(file)
+    try:
+        pages = sum(1 for _ in _PDF_PAGE.finditer(data))
+        for match in _PDF_STREAM.finditer(data):
+            end = data.find(b'endstream', match.end())
+            if end == -1:
+                break
+            header = data[max(match.start() - 512, 0):match.start()]
+            start = header.rfind(b'obj')
+            if start != -1:
+                header = header[start + 3:]
+            if b'/Subtype' in header and b'/Image' in header:
+                continue
+            content = _pdf_decode(header, data[match.end():min(end, match.end() + MAX_STREAM_BYTES)])
+            if content and b'BT' in content:
+                _pdf_text_operators(content, out)
+            if out.full:
+                break
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    return pages
+
+
+@extractor('pdf')
+def extract_pdf(file, out):
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        return _scan_pdf(file, out)
+
+    reader = PdfReader(file)
+    for page in reader.pages:
+        out.add(page.extract_text() or '')
+        out.add('\n')
+        if out.full:
+            break
+    return len(reader.pages)
+
+
+_DOC_UTF16_RUN = re.compile(rb'(?:[\x20-\x7e\t\r]\x00){4,}')
+_DOC_ANSI_RUN = re.compile(rb'[\x20-\x7e\t\r]{8,}')
+
+
+@extractor('doc')
+def extract_doc(file, out):
+    """Runs of text in a Word 97-2003 file, which stores it as UTF-16 or 8-bit"""
+    data = _mapped(file)
+    try:
+        for match in _DOC_UTF16_RUN.finditer(data):
+            out.add(match.group().decode('utf-16-le').replace('\r', '\n') + '\n')
+            if out.full:
+                break
+        if out.length < 200:
+            for match in _DOC_ANSI_RUN.finditer(data):
+                out.add(match.group().decode('latin-1').replace('\r', '\n') + '\n')
+                if out.full:
+                    break
+    finally:
+        if isinstance(data, mmap.mmap):
+            data.close()
+    return None
+
+
+def guess_language(text):
+    """ISO 639-1 code of the likely language of ``text``, '' if unclear"""
+    sample = text[:20000]
+    letters = sum(1 for char in sample if char.isalpha())
+    if not letters:
+        return ''
+    if sum(1 for char in sample if '\u1200' <= char <= '\u137f') > letters / 2:
+        return 'am'
+    words = [word.lower() for word in WORD.findall(sample)]
+    hits = {language: sum(1 for word in words if word in stopwords) for language, stopwords in STOPWORDS.items()}
+    language, count = max(hits.items(), key=lambda item: item[1])
+    return language if count >= max(3, len(words) // 50) else ''
+
+
+def index_terms(text):
+    terms = {}
+    for match in WORD.finditer(text):
+        word = match.group().lower()
+        if len(word) > 1 and word not in terms:
+            terms[word] = None
+            if len(terms) >= MAX_TERMS:
+                break
+    return ' '.join(terms)
+
+
+def _spool(field):
+    """(temporary file, SHA-256) of a stored file, copied in CHUNK_SIZE pieces"""
+    digest = hashlib.sha256()
+    spooled = tempfile.TemporaryFile()
+    with field.open('rb') as source:
+        for chunk in source.chunks(CHUNK_SIZE):
+            digest.update(chunk)
+            spooled.write(chunk)
+    spooled.seek(0)
+    return spooled, digest.hexdigest()
+
+
+def extract_resource(resource_id):
+    """
+    Extract one resource's file. Runs in a worker process and returns the
+    values for its ResourceContent row, or the id of a row to copy them from.
+    """
+    resource = Resource.objects.filter(pk=resource_id).first()
+    if resource is None or not resource.file:
+        return {'resource_id': resource_id, 'status': 'failed', 'error': 'Resource has no file'}
+
+    kind = file_kind(resource)
+    values = {'resource_id': resource_id, 'source_name': resource.file.name}
+    try:
+        spooled, content_hash = _spool(resource.file)
+    except (OSError, ValueError) as exc:
+        return {**values, 'status': 'failed', 'error': f'Could not read file: {exc}'}
+    values['content_hash'] = content_hash
+
+    with spooled:
+        # Any extraction of the same content, including this resource's own
+        # from before its file was replaced, is reused
+        source = ResourceContent.objects.filter(content_hash=content_hash).filter(
+            Q(status='done') | Q(resource_id=resource_id)
+        ).exclude(compressed_text=b'').order_by('pk').first()
+        if source is not None:
+            return {**values, 'copy_from': source.pk}
+        if kind not in EXTRACTORS:
+            return {**values, 'status': 'unsupported'}
+
+        out = TextCollector()
+        try:
+            page_count = EXTRACTORS[kind](spooled, out)
+        except Exception as exc:
+            # Corrupt or mislabelled files are recorded, not retried
+            return {**values, 'status': 'failed', 'error': f'{type(exc).__name__}: {exc}'}
+
+    text = out.text()
+    return {
+        **values,
+        'status': 'done',
+        'compressed_text': zlib.compress(text.encode(), 6),
+        'terms': index_terms(text),
+        'page_count': page_count,
+        'word_count': sum(1 for _ in WORD.finditer(text)),
+        'language': guess_language(text),
+        'error': '',
+    }
+
+
+def queue_extraction(resource):
+    """Queue a resource's file for extraction unless it is already queued or extracted"""
+    if not resource.file:
+        ResourceContent.objects.filter(resource=resource).delete()
+        return
+    content, created = ResourceContent.objects.get_or_create(
+        resource=resource, defaults={'source_name': resource.file.name}
+    )
+    if not created and content.source_name != resource.file.name:
+        ResourceContent.objects.filter(pk=content.pk).update(source_name=resource.file.name, status='pending')
+
+
+COPIED_FIELDS = ['compressed_text', 'terms', 'page_count', 'word_count', 'language']
+
+
+def save_result(values):
+    """Write a worker's result unless the file was replaced meanwhile. Returns the status saved."""
+    values = dict(values)
+    copy_from = values.pop('copy_from', None)
+    if copy_from is not None:
+        source = ResourceContent.objects.filter(pk=copy_from).values(*COPIED_FIELDS).first()
+        if source is None:
+            return None
+        values.update(source, status='done', error='')
+    resource_id = values.pop('resource_id')
+    source_name = values.pop('source_name', None)
+
+    rows = ResourceContent.objects.filter(resource_id=resource_id, status='pending')
+    if source_name is not None:
+        rows = rows.filter(source_name=source_name)
+    if not rows.update(**values, extracted_at=timezone.now()):
+        return None
+    return values['status']
+
+
+def pending_ids(batch_size):
+    return list(
+        ResourceContent.objects.filter(status='pending').order_by('resource_id').values_list(
+            'resource_id', flat=True
+        )[:batch_size]
+    )
+
+
+def run_extraction(workers=None, batch_size=100):
+    """Extract every pending resource. Returns {status: count}."""
+    workers = workers or os.cpu_count() or 1
+    counts = {}
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers > 1 else None
+    try:
+        seen = set()
+        while True:
+            ids = [resource_id for resource_id in pending_ids(batch_size) if resource_id not in seen]
+            if not ids:
+                break
+            seen.update(ids)
+            results = executor.map(extract_resource, ids) if executor is not None else map(extract_resource, ids)
+            for values in results:
+                with transaction.atomic():
+                    status = save_result(values)
+                if status:
+                    counts[status] = counts.get(status, 0) + 1
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return counts
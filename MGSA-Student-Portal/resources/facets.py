@@ -0,0 +1,136 @@
+# resources/facets.py
+"""
+Facet counts for resource browsing.
+
+ResourceFacetCount holds how many public resources have each category,
+file type, tag and uploader department. Saving or deleting a resource
+moves only the counts of the facet values it gained or lost, so reading
+every facet is one query on a table with a row per distinct value instead
+of a GROUP BY per facet. Private resources are only counted for their
+uploader, from their own uploads. A change of an uploader's department is
+not followed; rebuild_resource_facets recounts everything.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import Greatest
+
+from analytics.tags import normalize
+
+from .models import Resource, ResourceFacetCount
+
+FACETS = [facet for facet, _ in ResourceFacetCount.FACET_CHOICES]
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def visible_to(user):
+    """Resources ``user`` can browse: the public ones and their own uploads"""
+    return Q(is_public=True) | Q(uploaded_by=user)
+
+
+def facets_of(resource):
+    """{(facet, value): label} of a public resource, empty for a private one"""
+    if not resource.is_public:
+        return {}
+    facets = {('file_type', resource.file_type): resource.get_file_type_display()}
+    if resource.category.strip():
+        facets['category', resource.category.strip()[:100]] = resource.category.strip()[:100]
+    department = resource.uploaded_by.department
+    if department:
+        facets['department', department[:100]] = department[:100]
+    for slug, name in normalize(resource.tags).items():
+        facets['tag', slug] = name
+    return facets
+
+
+def stored_facets(resource_id):
+    """facets_of() the saved version of a resource"""
+    if resource_id is None:
+        return {}
+    resource = Resource.objects.select_related('uploaded_by').filter(pk=resource_id).first()
+    return facets_of(resource) if resource else {}
+
+
+def _matching(keys):
+    query = Q()
+    for facet, value in keys:
+        query |= Q(facet=facet, value=value)
+    return ResourceFacetCount.objects.filter(query)
+
+
+def update_counts(before, after):
+    """Move the counts of a resource whose facets went from ``before`` to ``after``"""
+    added = [key for key in after if key not in before]
+    removed = [key for key in before if key not in after]
+    if not (added or removed):
+        return
+    with transaction.atomic():
+        if added:
+            ResourceFacetCount.objects.bulk_create(
+                [ResourceFacetCount(facet=facet, value=value, label=after[facet, value]) for facet, value in added],
+                ignore_conflicts=True
+            )
+            _matching(added).update(count=F('count') + 1)
+        if removed:
+            _matching(removed).update(count=Greatest(F('count') - 1, 0))
+
+
+def facet_counts(user=None):
+    """
+    {facet: [{'value', 'label', 'count'}]} of the resources ``user`` can
+    see (visible_to), most common values first. The counts are of the whole
+    visible collection, not narrowed by any filters a listing applies.
+    """
+    counts = {
+        (facet, value): [label, count]
+        for facet, value, label, count in ResourceFacetCount.objects.filter(count__gt=0).values_list(
+            'facet', 'value', 'label', 'count'
+        )
+    }
+    if user is not None and user.is_authenticated:
+        for resource in Resource.objects.filter(uploaded_by=user, is_public=False).select_related('uploaded_by'):
+            resource.is_public = True
+            for key, label in facets_of(resource).items():
+                counts.setdefault(key, [label, 0])[1] += 1
+
+    grouped = {facet: [] for facet in FACETS}
+    for (facet, value), (label, count) in counts.items():
+        grouped[facet].append({'value': value, 'label': label, 'count': count})
+    for values in grouped.values():
+        values.sort(key=lambda item: (-item['count'], item['value']))
+    return grouped
+
+
+def rebuild_counts():
+    """Recount every facet value from the public resources. Returns the number of values."""
+    from analytics.models import TaggedItem
+
+    public = Resource.objects.filter(is_public=True).order_by()
+    rows = {}
+    for category, count in public.exclude(category='').values_list('category').annotate(count=Count('id')):
+        value = category.strip()[:100]
+        if value:
+            row = rows.setdefault(('category', value), ResourceFacetCount(facet='category', value=value, label=value))
+            row.count += count
+    labels = dict(Resource.FILE_TYPE_CHOICES)
+    for file_type, count in public.values_list('file_type').annotate(count=Count('id')):
+        rows['file_type', file_type] = ResourceFacetCount(
+            facet='file_type', value=file_type, label=labels.get(file_type, file_type), count=count
+        )
+    for department, count in public.exclude(uploaded_by__department='').values_list(
+        'uploaded_by__department'
+    ).annotate(count=Count('id')):
+        if department:
+            rows['department', department[:100]] = ResourceFacetCount(
+                facet='department', value=department[:100], label=department[:100], count=count
+            )
+    for slug, name, count in TaggedItem.objects.filter(content_type='resource', is_public=True).values_list(
+        'tag__slug', 'tag__name'
+    ).annotate(count=Count('id')).order_by():
+        rows['tag', slug] = ResourceFacetCount(facet='tag', value=slug, label=name, count=count)
+
+    with transaction.atomic():
+        ResourceFacetCount.objects.all().delete()
+        ResourceFacetCount.objects.bulk_create(rows.values(), batch_size=1000)
+    return len(rows)
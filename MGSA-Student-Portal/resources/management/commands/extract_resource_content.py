@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resources.extraction import run_extraction
+from resources.models import ResourceContent
+
+class Command(BaseCommand):
+    help = 'Extract text and metadata from queued resource files in a worker pool; run every few minutes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+        parser.add_argument('--batch-size', type=int, default=100)
+        parser.add_argument('--retry-failed', action='store_true', help='Queue files that failed before again')
+        parser.add_argument('--all', '--force', action='store_true', dest='all', help='Queue every resource file again')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        
+        if options['all']:
+            # Forget the hashes so nothing is reused from earlier extractions
+            queued = ResourceContent.objects.update(status='pending', content_hash='')
+            self.stdout.write(f'Queued {queued} files')
+        elif options['retry_failed']:
+            queued = ResourceContent.objects.filter(status='failed').update(status='pending')
+            self.stdout.write(f'Queued {queued} failed files')
+        
+        counts = run_extraction(workers=options['workers'], batch_size=options['batch_size'])
+        summary = ', '.join(f'{count} {status}' for status, count in sorted(counts.items())) or 'nothing to do'
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Extracted resource content ({summary}) in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resources.facets import rebuild_counts
+
+class Command(BaseCommand):
+    help = 'Recount resource facet values from the public resources; run after importing resources or renaming departments'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        values = rebuild_counts()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Counted {values} facet values in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from resources.recommendations import department_key, refresh_recommendations
+
+class Command(BaseCommand):
+    help = 'Rebuild per-department resource recommendations from recent downloads; run nightly so old downloads age out'
+
+    def add_arguments(self, parser):
+        parser.add_argument('departments', nargs='*', help='Departments to rebuild (default: all)')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        departments = [department_key(department) for department in options['departments']] or None
+        refreshed = refresh_recommendations(departments)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Refreshed recommendations for {refreshed} departments in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0002_resource_file_alter_resource_file_url'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DepartmentResourceScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('recent_downloads', models.PositiveIntegerField(default=0)),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='department_scores', to='resources.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['department', '-score', '-resource'], name='resources_d_departm_8e7eab_idx')],
+                'unique_together': {('department', 'resource')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResourceDownload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(blank=True, max_length=100)),
+                ('downloaded_at', models.DateTimeField(auto_now_add=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='downloads', to='resources.resource')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='resource_downloads', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-downloaded_at'],
+                'indexes': [models.Index(fields=['downloaded_at'], name='resources_r_downloa_4287a6_idx')],
+            },
+        ),
+    ]
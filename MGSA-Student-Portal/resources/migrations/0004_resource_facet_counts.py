@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:53
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def count_existing_resources(apps, schema_editor):
+    # Same values as resources.facets.facets_of(), which needs the current models
+    Resource = apps.get_model('resources', 'Resource')
+    ResourceFacetCount = apps.get_model('resources', 'ResourceFacetCount')
+    file_types = dict(Resource._meta.get_field('file_type').choices)
+
+    rows = {}
+
+    def count(facet, value, label):
+        row = rows.setdefault((facet, value), ResourceFacetCount(facet=facet, value=value, label=label))
+        row.count += 1
+
+    for resource in Resource.objects.filter(is_public=True).select_related('uploaded_by').iterator(chunk_size=2000):
+        count('file_type', resource.file_type, file_types.get(resource.file_type, resource.file_type))
+        category = resource.category.strip()[:100]
+        if category:
+            count('category', category, category)
+        department = (resource.uploaded_by.department or '')[:100]
+        if department:
+            count('department', department, department)
+        tags = resource.tags.split(',') if isinstance(resource.tags, str) else resource.tags or []
+        slugs = set()
+        for tag in tags:
+            name = str(tag).strip()[:50]
+            slug = slugify(name)[:50]
+            if slug and slug not in slugs:
+                slugs.add(slug)
+                count('tag', slug, name)
+    ResourceFacetCount.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0003_department_resource_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceFacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(choices=[('category', 'Category'), ('file_type', 'File Type'), ('tag', 'Tag'), ('department', 'Uploader Department')], max_length=20)),
+                ('value', models.CharField(max_length=100)),
+                ('label', models.CharField(max_length=100)),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('facet', 'value')},
+            },
+        ),
+        migrations.RunPython(count_existing_resources, migrations.RunPython.noop),
+    ]
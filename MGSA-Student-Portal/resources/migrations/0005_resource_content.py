@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def queue_existing_files(apps, schema_editor):
+    Resource = apps.get_model('resources', 'Resource')
+    ResourceContent = apps.get_model('resources', 'ResourceContent')
+
+    ResourceContent.objects.bulk_create([
+        ResourceContent(resource_id=resource_id, source_name=name)
+        for resource_id, name in Resource.objects.exclude(file='').exclude(file__isnull=True).values_list('id', 'file')
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('resources', '0004_resource_facet_counts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResourceContent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_name', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('done', 'Done'), ('unsupported', 'Unsupported'), ('failed', 'Failed')], default='pending', max_length=15)),
+                ('content_hash', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('compressed_text', models.BinaryField(blank=True, default=b'')),
+                ('terms', models.TextField(blank=True)),
+                ('page_count', models.PositiveIntegerField(blank=True, null=True)),
+                ('word_count', models.PositiveIntegerField(default=0)),
+                ('language', models.CharField(blank=True, max_length=10)),
+                ('error', models.TextField(blank=True)),
+                ('extracted_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('resource', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='content', to='resources.resource')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['status', 'resource'], name='resources_r_status_80faa7_idx')],
+            },
+        ),
+        migrations.RunPython(queue_existing_files, migrations.RunPython.noop),
+    ]
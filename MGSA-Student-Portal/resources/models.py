@@ -1,5 +1,9 @@
+import zlib
+
 from django.db import models
 from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
 
 '''class Resource(models.Model):
     FILE_TYPE_CHOICES = [
@@ -66,4 +70,141 @@ class Resource(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return self.title        
\ No newline at end of file
+        return self.title
+
+
+class ResourceDownload(models.Model):
+    """One download, with the downloader's department at the time"""
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='downloads')
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='resource_downloads'
+    )
+    # resources.recommendations.department_key() of the downloader
+    department = models.CharField(max_length=100, blank=True)
+    downloaded_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-downloaded_at']
+        indexes = [
+            models.Index(fields=['downloaded_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource_id} downloaded at {self.downloaded_at}"
+
+
+class DepartmentResourceScore(models.Model):
+    """A resource's recommendation score for one department, see resources.recommendations"""
+    department = models.CharField(max_length=100)
+    resource = models.ForeignKey(Resource, on_delete=models.CASCADE, related_name='department_scores')
+    recent_downloads = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['department', 'resource']
+        indexes = [
+            models.Index(fields=['department', '-score', '-resource']),
+        ]
+    
+    def __str__(self):
+        return f"{self.resource_id} for {self.department}: {self.score:.2f}"
+
+
+class ResourceFacetCount(models.Model):
+    """Number of public resources with one facet value, see resources.facets"""
+    FACET_CHOICES = [
+        ('category', 'Category'),
+        ('file_type', 'File Type'),
+        ('tag', 'Tag'),
+        ('department', 'Uploader Department'),
+    ]
+    
+    facet = models.CharField(max_length=20, choices=FACET_CHOICES)
+    value = models.CharField(max_length=100)
+    label = models.CharField(max_length=100)
+    count = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['facet', 'value']
+    
+    def __str__(self):
+        return f"{self.facet}={self.value}: {self.count}"
+
+
+class ResourceContent(models.Model):
+    """Text and metadata extracted from a resource's file, see resources.extraction"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('unsupported', 'Unsupported'),
+        ('failed', 'Failed'),
+    ]
+    
+    resource = models.OneToOneField(Resource, on_delete=models.CASCADE, related_name='content')
+    # Storage name of the file the row was queued for
+    source_name = models.CharField(max_length=255)
+    status = models.CharField(max_length=15, choices=STATUS_CHOICES, default='pending')
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
+    
+    # zlib compressed UTF-8 text
+    compressed_text = models.BinaryField(blank=True, default=b'')
+    # Distinct lowercased words, in order of appearance, for search
+    terms = models.TextField(blank=True)
+    page_count = models.PositiveIntegerField(null=True, blank=True)
+    word_count = models.PositiveIntegerField(default=0)
+    language = models.CharField(max_length=10, blank=True)
+    error = models.TextField(blank=True)
+    
+    extracted_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'resource']),
+        ]
+    
+    def __str__(self):
+        return f"Content of {self.resource_id} ({self.status})"
+    
+    @property
+    def text(self):
+        return zlib.decompress(self.compressed_text).decode() if self.compressed_text else ''
+
+
+# Resources that stop being public leave other departments' recommendations
+@receiver(post_save, sender=Resource)
+def update_recommendations_on_resource_change(sender, instance, created, **kwargs):
+    from .recommendations import resource_changed
+
+    resource_changed(instance, created=created)
+
+# Facet counts follow public resources as they are added, edited and removed
+@receiver(pre_save, sender=Resource)
+def remember_resource_facets(sender, instance, **kwargs):
+    from .facets import stored_facets
+
+    instance._facets_before = stored_facets(instance.pk)
+
+@receiver(post_save, sender=Resource)
+def update_facet_counts_on_save(sender, instance, **kwargs):
+    from .facets import facets_of, update_counts
+
+    update_counts(getattr(instance, '_facets_before', set()), facets_of(instance))
+
+@receiver(post_delete, sender=Resource)
+def update_facet_counts_on_delete(sender, instance, **kwargs):
+    from .facets import facets_of, update_counts
+
+    update_counts(facets_of(instance), set())
+
+# New and replaced files are queued for text extraction
+@receiver(post_save, sender=Resource)
+def queue_content_extraction(sender, instance, **kwargs):
+    from .extraction import queue_extraction
+
+    queue_extraction(instance)
@@ -0,0 +1,180 @@
+# resources/recommendations.py
+"""
+Resource recommendations per department.
+
+Each department has up to CANDIDATES_PER_DEPARTMENT DepartmentResourceScore
+rows: public resources its students downloaded in the last RECENT_DAYS,
+the most downloaded public resources overall and the private resources
+uploaded from the department. A row's score is
+
+    recent downloads from the department + GLOBAL_WEIGHT * ln(1 + all downloads)
+
+A download bumps the downloader's department row and rescores the
+resource's rows in every department. refresh_recommendations rebuilds
+the rows from the download log so old downloads age out. The dashboard
+read is one index lookup on (department, -score).
+"""
+import datetime
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import DepartmentResourceScore, Resource, ResourceDownload
+
+RECENT_DAYS = 30
+GLOBAL_WEIGHT = 0.5
+CANDIDATES_PER_DEPARTMENT = 50
+
+
+def department_key(department):
+    return slugify(department or '') or '-'
+
+
+def global_score(download_count):
+    return GLOBAL_WEIGHT * math.log1p(download_count)
+
+
+def record_download(resource, user=None):
+    """Count a download of ``resource`` and update the recommendation scores. Returns the new total."""
+    from analytics.models import ContentIndex
+
+    department = department_key(user.department) if user is not None and user.is_authenticated else ''
+    # Downloads by users without a department count towards no department
+    if department == '-':
+        department = ''
+    with transaction.atomic():
+        Resource.objects.filter(pk=resource.pk).update(download_count=F('download_count') + 1)
+        # update() skips the post_save receiver that keeps the content index in sync
+        ContentIndex.adjust('resource', resource.pk, download_count=1)
+        download_count = Resource.objects.values_list('download_count', flat=True).get(pk=resource.pk)
+        ResourceDownload.objects.create(
+            resource=resource,
+            user=user if user is not None and user.is_authenticated else None,
+            department=department
+        )
+
+        if department and (resource.is_public or _uploaded_from(resource, department)):
+            DepartmentResourceScore.objects.get_or_create(department=department, resource=resource)
+            DepartmentResourceScore.objects.filter(department=department, resource=resource).update(
+                recent_downloads=F('recent_downloads') + 1
+            )
+        DepartmentResourceScore.objects.filter(resource=resource).update(
+            score=F('recent_downloads') + global_score(download_count)
+        )
+    resource.download_count = download_count
+    return download_count
+
+
+def _uploaded_from(resource, department):
+    return department_key(resource.uploaded_by.department) == department
+
+
+def resource_changed(resource, created=False):
+    """Keep a new or edited resource's rows in line with its visibility"""
+    uploader_department = department_key(resource.uploaded_by.department)
+    if not resource.is_public:
+        DepartmentResourceScore.objects.filter(resource=resource).exclude(department=uploader_department).delete()
+    if created:
+        # New resources start at the bottom of every department's list
+        departments = set(DepartmentResourceScore.objects.values_list('department', flat=True).distinct())
+        if not resource.is_public:
+            departments &= {uploader_department}
+        DepartmentResourceScore.objects.bulk_create(
+            [DepartmentResourceScore(department=department, resource=resource) for department in departments],
+            ignore_conflicts=True
+        )
+
+
+def _ranked(candidates):
+    """Top CANDIDATES_PER_DEPARTMENT of {resource_id: (recent, score)}, best first"""
+    return sorted(candidates.items(), key=lambda item: (-item[1][1], -item[0]))[:CANDIDATES_PER_DEPARTMENT]
+
+
+def refresh_recommendations(departments=None):
+    """
+    Rebuild the rows of ``departments`` (keys), or of every department
+    with students or recent downloads. Returns the number of departments.
+    """
+    from accounts.models import User
+
+    since = timezone.now() - datetime.timedelta(days=RECENT_DAYS)
+    recent = defaultdict(dict)
+    for row in ResourceDownload.objects.filter(downloaded_at__gte=since).exclude(department='').values(
+        'department', 'resource_id'
+    ).annotate(downloads=Count('id')).order_by():
+        recent[row['department']][row['resource_id']] = row['downloads']
+
+    counts = {}
+    popular = list(
+        Resource.objects.filter(is_public=True).order_by('-download_count', '-created_at').values_list(
+            'id', 'download_count'
+        )[:CANDIDATES_PER_DEPARTMENT]
+    )
+    counts.update(popular)
+
+    public = set()
+    private_by_department = defaultdict(list)
+    recent_ids = {resource_id for downloads in recent.values() for resource_id in downloads}
+    for resource_id, download_count, is_public in Resource.objects.filter(id__in=recent_ids).values_list(
+        'id', 'download_count', 'is_public'
+    ):
+        counts[resource_id] = download_count
+        if is_public:
+            public.add(resource_id)
+    for resource_id, download_count, uploader_department in Resource.objects.filter(is_public=False).values_list(
+        'id', 'download_count', 'uploaded_by__department'
+    ):
+        counts[resource_id] = download_count
+        private_by_department[department_key(uploader_department)].append(resource_id)
+    public.update(resource_id for resource_id, _ in popular)
+
+    if departments is None:
+        departments = {
+            department_key(department)
+            for department in User.objects.filter(role='Student').values_list('department', flat=True).distinct()
+        } | set(recent)
+    departments = set(departments) - {'-'}
+
+    with transaction.atomic():
+        DepartmentResourceScore.objects.filter(department__in=departments).delete()
+        rows = []
+        for department in departments:
+            own = recent.get(department, {})
+            candidates = {}
+            private = private_by_department[department]
+            for resource_id in [*(resource_id for resource_id, _ in popular), *own, *private]:
+                if resource_id not in public and resource_id not in private:
+                    continue
+                downloads = own.get(resource_id, 0)
+                candidates[resource_id] = (downloads, downloads + global_score(counts.get(resource_id, 0)))
+            rows.extend(
+                DepartmentResourceScore(
+                    department=department, resource_id=resource_id, recent_downloads=downloads, score=score
+                )
+                for resource_id, (downloads, score) in _ranked(candidates)
+            )
+        DepartmentResourceScore.objects.bulk_create(rows, batch_size=1000)
+    return len(departments)
+
+
+def recommended_resources(user, limit=8):
+    """The best scored resources for ``user``'s department, building its rows on first use"""
+    department = department_key(user.department)
+    scores = DepartmentResourceScore.objects.filter(department=department).select_related(
+        'resource__uploaded_by'
+    ).order_by('-score', '-resource_id')
+    page = list(scores[:limit])
+    if not page and department != '-':
+        refresh_recommendations([department])
+        page = list(scores[:limit])
+    if not page:
+        return list(
+            Resource.objects.filter(is_public=True).select_related('uploaded_by').order_by(
+                '-download_count', '-created_at'
+            )[:limit]
+        )
+    return [row.resource for row in page]
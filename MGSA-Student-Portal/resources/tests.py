@@ -1,3 +1,304 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
+import zipfile
+import zlib
+from unittest import mock
 
-# Create your tests here.
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from analytics.models import ContentIndex
+from . import extraction
+from .facets import facet_counts, rebuild_counts
+from .models import DepartmentResourceScore, Resource, ResourceContent, ResourceDownload, ResourceFacetCount
+from .recommendations import record_download
+
+
+class RecordDownloadTests(TestCase):
+    def setUp(self):
+        self.uploader = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive',
+            department='Computer Science'
+        )
+        self.resource = Resource.objects.create(
+            title='Calculus notes', file_name='notes.pdf', file_type='pdf', file_size=1024,
+            uploaded_by=self.uploader
+        )
+
+    def add_student(self, email, department):
+        return User.objects.create_user(
+            email=email, password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student',
+            department=department
+        )
+
+    def test_download_updates_resource_and_content_index(self):
+        record_download(self.resource, self.add_student('abdi@example.com', 'Computer Science'))
+
+        self.assertEqual(Resource.objects.get(pk=self.resource.pk).download_count, 1)
+        self.assertEqual(
+            ContentIndex.objects.get(content_type='resource', object_id=self.resource.pk).download_count, 1
+        )
+        score = DepartmentResourceScore.objects.get(resource=self.resource)
+        self.assertEqual((score.department, score.recent_downloads), ('computer-science', 1))
+
+    def test_download_without_department_creates_no_department_row(self):
+        record_download(self.resource, self.add_student('abdi@example.com', ''))
+
+        self.assertEqual(ResourceDownload.objects.get().department, '')
+        self.assertFalse(DepartmentResourceScore.objects.filter(department__in=['', '-']).exists())
+
+
+def make_docx(*paragraphs, pages=None):
+    body = ''.join(
+        f'<w:p><w:r><w:t>{text}</w:t></w:r></w:p>' for text in paragraphs
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        archive.writestr(
+            'word/document.xml',
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        )
+        if pages is not None:
+            archive.writestr('docProps/app.xml', f'<Properties><Pages>{pages}</Pages></Properties>')
+    return buffer.getvalue()
+
+
+def make_pdf(*contents, compress=False):
+    """A PDF with one page per content stream, Flate compressed if asked"""
+    parts = [b'%PDF-1.4\n']
+    for number, content in enumerate(contents, start=1):
+        data = zlib.compress(content) if compress else content
+        header = b'/Filter /FlateDecode ' if compress else b''
+        parts.append(b'%d 0 obj\n<< /Type /Page >>\nendobj\n' % (number * 2))
+        parts.append(
+            b'%d 0 obj\n<< %s/Length %d >>\nstream\n' % (number * 2 + 1, header, len(data))
+            + data + b'\nendstream\nendobj\n'
+        )
+    parts.append(b'%%EOF\n')
+    return b''.join(parts)
+
+
+def as_file(data):
+    file = tempfile.TemporaryFile()
+    file.write(data)
+    file.seek(0)
+    return file
+
+
+class ExtractorTests(TestCase):
+    def extract(self, function, data):
+        out = extraction.TextCollector()
+        with as_file(data) as file:
+            pages = function(file, out)
+        return out.text(), pages
+
+    def test_docx_paragraphs_and_page_count(self):
+        text, pages = self.extract(extraction.extract_docx, make_docx('Linear algebra', 'Week one', pages=3))
+
+        self.assertEqual((text, pages), ('Linear algebra\nWeek one', 3))
+
+    def test_pdf_text_operators(self):
+        data = make_pdf(b'BT /F1 12 Tf (Hello) Tj (world\\051) Tj ET', b'BT [(Lecture)-300(notes)] TJ ET')
+
+        text, pages = self.extract(extraction._scan_pdf, data)
+
+        self.assertEqual(pages, 2)
+        self.assertEqual(text, 'Hello world)\nLecture notes')
+
+    def test_flate_compressed_pdf_streams(self):
+        text, _ = self.extract(extraction._scan_pdf, make_pdf(b'BT (Compressed text) Tj ET', compress=True))
+
+        self.assertEqual(text, 'Compressed text')
+
+    def test_doc_text_runs(self):
+        data = b'\xd0\xcf\x11\xe0' + b'\x00' * 32 + 'Thermodynamics lecture'.encode('utf-16-le') + b'\x01\x02'
+
+        text, pages = self.extract(extraction.extract_doc, data)
+
+        self.assertIn('Thermodynamics lecture', text)
+        self.assertIsNone(pages)
+
+    def test_text_stops_at_the_limit(self):
+        out = extraction.TextCollector(limit=10)
+        with as_file(make_docx('a' * 8, 'b' * 8)) as file:
+            extraction.extract_docx(file, out)
+
+        self.assertEqual(out.length, 10)
+
+    def test_malformed_pdfs_do_not_raise(self):
+        truncated = make_pdf(b'BT (Cut off) Tj ET')[:-30]
+        corrupt = make_pdf(b'not zlib data', compress=False).replace(b'<< ', b'<< /Filter /FlateDecode ')
+
+        self.assertEqual(self.extract(extraction._scan_pdf, truncated)[0], '')
+        self.assertEqual(self.extract(extraction._scan_pdf, corrupt)[0], '')
+        self.assertEqual(self.extract(extraction._scan_pdf, b''), ('', 0))
+
+
+class ResourceExtractionTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.uploader = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+
+    def add_resource(self, name, data, file_type='docx'):
+        return Resource.objects.create(
+            title=name, file=ContentFile(data, name=name), file_name=name, file_type=file_type,
+            file_size=len(data), uploaded_by=self.uploader
+        )
+
+    def content(self, resource):
+        return ResourceContent.objects.get(resource=resource)
+
+    def counting_extractor(self, kind):
+        calls = []
+        original = extraction.EXTRACTORS[kind]
+
+        def counted(file, out):
+            calls.append(kind)
+            return original(file, out)
+        patcher = mock.patch.dict(extraction.EXTRACTORS, {kind: counted})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return calls
+
+    def test_new_files_are_queued_and_extracted(self):
+        resource = self.add_resource('algebra.docx', make_docx('Linear algebra', 'Matrices and vectors', pages=2))
+        self.assertEqual(self.content(resource).status, 'pending')
+
+        self.assertEqual(extraction.run_extraction(workers=1), {'done': 1})
+
+        content = self.content(resource)
+        self.assertEqual((content.status, content.page_count, content.word_count), ('done', 2, 5))
+        self.assertEqual(zlib.decompress(content.compressed_text).decode(), 'Linear algebra\nMatrices and vectors')
+        self.assertEqual(content.terms, 'linear algebra matrices and vectors')
+
+    def test_identical_content_is_extracted_once(self):
+        calls = self.counting_extractor('docx')
+        data = make_docx('Shared handout text')
+        first = self.add_resource('first.docx', data)
+        second = self.add_resource('second.docx', data)
+
+        extraction.run_extraction(workers=1)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.content(first).content_hash, self.content(second).content_hash)
+        self.assertEqual(bytes(self.content(second).compressed_text), bytes(self.content(first).compressed_text))
+        self.assertEqual(self.content(second).status, 'done')
+
+    def test_force_extracts_again(self):
+        calls = self.counting_extractor('docx')
+        resource = self.add_resource('notes.docx', make_docx('Lecture notes'))
+        call_command('extract_resource_content', workers=1, stdout=io.StringIO())
+        call_command('extract_resource_content', workers=1, stdout=io.StringIO())
+        self.assertEqual(len(calls), 1)
+
+        call_command('extract_resource_content', '--force', workers=1, stdout=io.StringIO())
+
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(self.content(resource).status, 'done')
+
+    def test_broken_files_are_recorded_not_raised(self):
+        truncated = self.add_resource('broken.docx', make_docx('Half a file')[:40])
+        garbage = self.add_resource('garbage.pdf', b'%PDF-1.4 stream\n\x00\xff', file_type='pdf')
+        video = self.add_resource('clip.mp4', b'\x00' * 16, file_type='video')
+
+        with mock.patch.dict('sys.modules', {'pypdf': None}):
+            counts = extraction.run_extraction(workers=1)
+
+        self.assertEqual(counts, {'failed': 1, 'done': 1, 'unsupported': 1})
+        self.assertIn('BadZipFile', self.content(truncated).error)
+        self.assertEqual(self.content(garbage).word_count, 0)
+        self.assertEqual(self.content(video).status, 'unsupported')
+
+
+class FacetCountTests(TestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive',
+            department='Computer Science'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student',
+            department='Civil'
+        )
+
+    def add_resource(self, title, uploaded_by=None, **fields):
+        return Resource.objects.create(
+            title=title, file_name=f'{title}.pdf', file_type=fields.pop('file_type', 'pdf'), file_size=1,
+            uploaded_by=uploaded_by or self.executive, **fields
+        )
+
+    def counts(self, facet, user=None):
+        return {item['value']: item['count'] for item in facet_counts(user)[facet]}
+
+    def stored(self):
+        return set(ResourceFacetCount.objects.filter(count__gt=0).values_list('facet', 'value', 'count'))
+
+    def test_counts_follow_saves_and_deletes(self):
+        notes = self.add_resource('Notes', category='Lecture', tags=['Math'])
+        self.add_resource('Slides', category='Lecture', file_type='docx')
+        self.assertEqual(self.counts('category'), {'Lecture': 2})
+        self.assertEqual(self.counts('file_type'), {'pdf': 1, 'docx': 1})
+        self.assertEqual(self.counts('tag'), {'math': 1})
+
+        notes.category = 'Exam'
+        notes.save()
+        self.assertEqual(self.counts('category'), {'Lecture': 1, 'Exam': 1})
+
+        notes.is_public = False
+        notes.save()
+        self.assertEqual(self.counts('category'), {'Lecture': 1})
+
+        notes.delete()
+        self.assertEqual(self.counts('file_type'), {'docx': 1})
+
+    def test_rebuild_matches_maintained_counts(self):
+        self.add_resource('Notes', category='Lecture', tags=['Math', 'Algebra'])
+        self.add_resource('Plans', category='Design', uploaded_by=self.student)
+        self.add_resource('Hidden', category='Private', is_public=False)
+        maintained = self.stored()
+
+        rebuild_counts()
+
+        self.assertEqual(self.stored(), maintained)
+
+    def test_counts_agree_with_browse_results(self):
+        self.add_resource('Notes', category='Lecture')
+        self.add_resource('Draft', category='Draft', uploaded_by=self.student, is_public=False)
+        self.add_resource('Other draft', category='Secret', is_public=False)
+        self.client.force_login(self.student)
+
+        response = self.client.get('/api/resources/browse/', secure=True)
+
+        self.assertEqual({resource['title'] for resource in response.data['results']}, {'Notes', 'Draft'})
+        self.assertEqual(
+            {item['value']: item['count'] for item in response.data['facets']['category']},
+            {'Lecture': 1, 'Draft': 1}
+        )
+
+    def test_counts_ignore_listing_filters(self):
+        self.add_resource('Notes', category='Lecture')
+        self.add_resource('Paper', category='Exam')
+        self.client.force_login(self.student)
+
+        response = self.client.get('/api/resources/browse/', {'category': 'Exam'}, secure=True)
+
+        self.assertEqual([resource['title'] for resource in response.data['results']], ['Paper'])
+        self.assertEqual(
+            {item['value']: item['count'] for item in response.data['facets']['category']},
+            {'Lecture': 1, 'Exam': 1}
+        )
@@ -3,6 +3,7 @@ from . import views
 
 urlpatterns = [
     path('', views.ResourceListView.as_view(), name='resource-list'),
+    path('browse/', views.browse_resources, name='resource-browse'),
     path('<int:pk>/', views.ResourceDetailView.as_view(), name='resource-detail'),
     path('<int:resource_id>/download/', views.increment_download_count, name='resource-download'),
 ]
\ No newline at end of file
@@ -3,12 +3,15 @@ from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from analytics.tags import TagFilterBackend, filter_by_tags, parse_tag_filter
+from .facets import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, facet_counts, visible_to
 from .models import Resource
+from .recommendations import record_download
 from .serializers import ResourceSerializer, ResourceCreateSerializer
 
 class ResourceListView(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
     filterset_fields = ['category', 'file_type', 'uploaded_by', 'is_public']
     
     def get_serializer_class(self):
@@ -76,9 +79,8 @@ class ResourceDetailView(generics.RetrieveUpdateDestroyAPIView):
 @permission_classes([permissions.IsAuthenticated])
 def increment_download_count(request, resource_id):
     try:
-        resource = Resource.objects.get(id=resource_id)
-        resource.download_count += 1
-        resource.save()
+        resource = Resource.objects.select_related('uploaded_by').get(id=resource_id)
+        record_download(resource, request.user)
         
         return Response({
             'success': True,
@@ -90,3 +92,54 @@ def increment_download_count(request, resource_id):
             'success': False,
             'message': 'Resource not found'
         }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def browse_resources(request):
+    """
+    Resources filtered by category, file_type, department, tags and a
+    search of their titles, descriptions and file text (q), with the facet
+    counts of everything the user can see, before any of those filters
+    """
+    queryset = Resource.objects.filter(
+        visible_to(request.user)
+    ).select_related('uploaded_by').order_by('-created_at', '-id')
+    
+    for param, lookup in [('category', 'category'), ('file_type', 'file_type'), ('department', 'uploaded_by__department')]:
+        value = request.GET.get(param)
+        if value:
+            queryset = queryset.filter(**{lookup: value})
+    
+    search = request.GET.get('q', '').strip()
+    if search:
+        queryset = queryset.filter(
+            Q(title__icontains=search) | Q(description__icontains=search) | Q(content__terms__contains=search.lower())
+        )
+    
+    slugs = parse_tag_filter(request.GET.get('tags', ''))
+    if slugs:
+        queryset = filter_by_tags(queryset, 'resource', slugs, request.GET.get('tag_match') == 'all')
+    
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        page_size = min(max(int(request.GET.get('page_size', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+    except ValueError:
+        return Response({
+            'success': False,
+            'message': 'page and page_size must be integers'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    # One extra row tells whether there is a next page without a COUNT
+    offset = (page - 1) * page_size
+    resources = list(queryset[offset:offset + page_size + 1])
+    has_next = len(resources) > page_size
+    
+    return Response({
+        'success': True,
+        'page': page,
+        'page_size': page_size,
+        'has_next': has_next,
+        'next_page': page + 1 if has_next else None,
+        'results': ResourceSerializer(resources[:page_size], many=True).data,
+        'facets': facet_counts(request.user)
+    })
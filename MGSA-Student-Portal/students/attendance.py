@@ -0,0 +1,173 @@
+# students/attendance.py
+"""
+Roll-call capture and running attendance summaries.
+
+A roll call upserts the StudentAttendance rows of one event with a single
+bulk_create against the (student, event) unique constraint and then moves
+the StudentAttendanceSummary counters of the students it changed, one F()
+UPDATE per distinct change. Single rows created,
+edited or deleted elsewhere go through apply_attendance_change() from the
+model receivers.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Student, StudentAttendance, StudentAttendanceSummary
+
+PRESENT_VALUES = {'1', 'true', 'yes', 'y', 'present', 'p'}
+ABSENT_VALUES = {'0', 'false', 'no', 'n', 'absent', 'a'}
+
+
+def ensure_summaries(student_pks):
+    StudentAttendanceSummary.objects.bulk_create(
+        [StudentAttendanceSummary(student_id=pk) for pk in student_pks],
+        ignore_conflicts=True
+    )
+
+
+def apply_attendance_change(old=None, new=None):
+    """
+    Apply the difference between two versions of an attendance row.
+    ``old``/``new`` are dicts with student_id, present and duration_minutes.
+    """
+    deltas = defaultdict(lambda: [0, 0, 0])
+    for values, sign in [(old, -1), (new, 1)]:
+        if not values or values.get('student_id') is None:
+            continue
+        delta = deltas[values['student_id']]
+        delta[0] += sign
+        if values['present']:
+            delta[1] += sign
+            delta[2] += sign * (values['duration_minutes'] or 0)
+
+    with transaction.atomic():
+        for student_pk, (recorded, present, minutes) in deltas.items():
+            if not (recorded or present or minutes):
+                continue
+            ensure_summaries([student_pk])
+            StudentAttendanceSummary.objects.filter(student_id=student_pk).update(
+                sessions_recorded=F('sessions_recorded') + recorded,
+                sessions_present=F('sessions_present') + present,
+                minutes_present=F('minutes_present') + minutes
+            )
+
+
+def resolve_student_ids(identifiers):
+    """Map MGSA or registrar student IDs to Student pks with one query"""
+    mapping = {}
+    students = Student.objects.filter(
+        Q(student_id__in=identifiers) | Q(user__student_id__in=identifiers)
+    ).values_list('pk', 'student_id', 'user__student_id')
+    for pk, student_id, registrar_id in students:
+        if registrar_id:
+            mapping[registrar_id] = pk
+        if student_id:
+            mapping[student_id] = pk
+    return mapping
+
+
+def parse_presence(value):
+    """True/False for a present flag (a bool, 0/1 or a word such as "absent"); ValueError otherwise"""
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower() if value is not None else ''
+    if text in PRESENT_VALUES:
+        return True
+    if text in ABSENT_VALUES:
+        return False
+    raise ValueError(f"Unrecognised present value: {value!r}")
+
+
+def record_roll_call(event, entries, recorded_by=None):
+    """
+    Record attendance for one event.
+
+    ``event`` holds event_type, event_title, event_date and optionally
+    duration_minutes and notes. ``entries`` is a list of
+    (student_identifier, present) pairs, see parse_presence() for the
+    accepted present values. Rows are upserted on (student, event), so a
+    roll call submitted again only changes the students whose presence or
+    duration differs. Returns a summary of what was written.
+    """
+    if not isinstance(entries, (list, tuple)):
+        raise TypeError('entries must be a list of (student_identifier, present) pairs')
+
+    presence = {}
+    for identifier, present in entries:
+        presence[str(identifier).strip()] = parse_presence(present)
+
+    mapping = resolve_student_ids(list(presence))
+    unknown = sorted(identifier for identifier in presence if identifier not in mapping)
+
+    # The same student may appear under both ID forms, the last entry wins
+    by_student = {}
+    for identifier, present in presence.items():
+        if identifier in mapping:
+            by_student[mapping[identifier]] = present
+
+    duration = event.get('duration_minutes') or 60
+    event_fields = {
+        'event_type': event['event_type'],
+        'event_title': event['event_title'],
+        'event_date': event['event_date'],
+    }
+    with transaction.atomic():
+        # Concurrent roll calls for the same students wait here, so each
+        # one reads the rows the other wrote before working out its deltas
+        list(Student.objects.select_for_update().filter(pk__in=list(by_student)).order_by('pk').values_list('pk'))
+        existing = {
+            student_pk: (present, minutes)
+            for student_pk, present, minutes in StudentAttendance.objects.filter(
+                student_id__in=list(by_student), **event_fields
+            ).values_list('student_id', 'present', 'duration_minutes')
+        }
+
+        rows = [
+            StudentAttendance(
+                student_id=student_pk,
+                duration_minutes=duration,
+                present=present,
+                notes=event.get('notes', ''),
+                recorded_by=recorded_by,
+                **event_fields
+            )
+            for student_pk, present in by_student.items()
+            if existing.get(student_pk) != (present, duration)
+        ]
+        StudentAttendance.objects.bulk_create(
+            rows,
+            batch_size=500,
+            update_conflicts=True,
+            unique_fields=['student', 'event_type', 'event_title', 'event_date'],
+            update_fields=['present', 'duration_minutes', 'notes', 'recorded_by']
+        )
+
+        # Students sharing a (recorded, present, minutes) delta take one UPDATE
+        by_delta = defaultdict(list)
+        for row in rows:
+            old = existing.get(row.student_id)
+            recorded = 0 if old else 1
+            present = row.present - (old[0] if old else 0)
+            minutes = row.present * duration - (old[0] * old[1] if old else 0)
+            by_delta[recorded, present, minutes].append(row.student_id)
+
+        ensure_summaries([row.student_id for row in rows])
+        for (recorded, present, minutes), student_pks in by_delta.items():
+            if recorded or present or minutes:
+                StudentAttendanceSummary.objects.filter(student_id__in=student_pks).update(
+                    sessions_recorded=F('sessions_recorded') + recorded,
+                    sessions_present=F('sessions_present') + present,
+                    minutes_present=F('minutes_present') + minutes
+                )
+
+    created = [row for row in rows if row.student_id not in existing]
+    return {
+        'recorded': len(created),
+        'updated': len(rows) - len(created),
+        'unchanged': len(by_student) - len(rows),
+        'present': sum(by_student.values()),
+        'absent': len(by_student) - sum(by_student.values()),
+        'unknown_student_ids': unknown,
+    }
@@ -0,0 +1,27 @@
+# students/counters.py
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from analytics.counters import register
+
+from .models import Student
+
+
+def _filled(field):
+    return Case(
+        When(Q(**{f'{field}__isnull': False}) & ~Q(**{field: ''}), then=Value(1)),
+        default=Value(0),
+        output_field=IntegerField()
+    )
+
+
+def profile_completion_expression():
+    """calculate_profile_completion() as SQL, truncated to a whole percent the same way"""
+    fields = [f'user__{field}' for field in Student.PROFILE_USER_FIELDS] + list(Student.PROFILE_STUDENT_FIELDS)
+    filled = sum((_filled(field) for field in fields[1:]), _filled(fields[0]))
+    return filled * Value(100) / Value(len(fields))
+
+
+register(
+    'student.profile_completion_percentage', Student, 'profile_completion_percentage',
+    profile_completion_expression()
+)
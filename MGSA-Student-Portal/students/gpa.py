@@ -0,0 +1,212 @@
+# students/gpa.py
+"""
+GPA engine over StudentAcademicRecord.
+
+Each Student keeps running sums of quality points (credit hours x grade
+points) and credit hours, and each term has a StudentTermSummary with the
+same sums. A record change applies its delta to both with F() updates, so
+recomputing GPA and CGPA costs a fixed number of queries however many records
+the student has. Transfer credits don't count towards GPA.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+ZERO = Decimal('0.00')
+
+# CGPA thresholds for academic status
+ACADEMIC_WARNING_CGPA = Decimal('2.00')
+ACADEMIC_PROBATION_CGPA = Decimal('1.75')
+
+# Statuses set by the registrar that GPA changes must not override
+MANUAL_STATUSES = ['suspended', 'graduated']
+
+SEMESTER_ORDER = {'1st': 1, '2nd': 2, '3rd': 3, 'Summer': 4}
+
+
+def term_sort_key(academic_year, semester):
+    return (academic_year, SEMESTER_ORDER.get(semester, 0), semester)
+
+
+def compute_gpa(quality_points, credit_hours):
+    if not credit_hours:
+        return ZERO
+    return (Decimal(quality_points) / Decimal(credit_hours)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def academic_status_for(cgpa, credit_hours, current_status):
+    if current_status in MANUAL_STATUSES:
+        return current_status
+    if not credit_hours:
+        return 'regular'
+    if cgpa < ACADEMIC_PROBATION_CGPA:
+        return 'probation'
+    if cgpa < ACADEMIC_WARNING_CGPA:
+        return 'warning'
+    return 'regular'
+
+
+def record_contribution(credit_hours, grade_points, is_transfer_credit):
+    """Quality points and credit hours a record adds to the GPA sums"""
+    if is_transfer_credit or credit_hours is None or grade_points is None:
+        return ZERO, 0
+    return Decimal(credit_hours) * Decimal(grade_points), credit_hours
+
+
+def apply_record_change(old=None, new=None):
+    """
+    Apply the difference between two versions of a record.
+
+    ``old`` and ``new`` are dicts with student_id, academic_year, semester,
+    credit_hours, grade_points and is_transfer_credit; ``old`` is None for a
+    new record and ``new`` is None for a deleted one.
+    """
+    deltas = defaultdict(lambda: [ZERO, 0])
+    for values, sign in [(old, -1), (new, 1)]:
+        if values is None:
+            continue
+        quality_points, credit_hours = record_contribution(
+            values['credit_hours'], values['grade_points'], values['is_transfer_credit']
+        )
+        key = (values['student_id'], values['academic_year'], values['semester'])
+        deltas[key][0] += sign * quality_points
+        deltas[key][1] += sign * credit_hours
+
+    with transaction.atomic():
+        students = set()
+        for (student_id, academic_year, semester), (quality_points, credit_hours) in deltas.items():
+            if not quality_points and not credit_hours:
+                continue
+            apply_term_delta(student_id, academic_year, semester, quality_points, credit_hours)
+            students.add(student_id)
+
+        for student_id in students:
+            refresh_student_gpa(student_id)
+
+
+def apply_term_delta(student_id, academic_year, semester, quality_points, credit_hours):
+    from .models import Student, StudentTermSummary
+
+    summary, _ = StudentTermSummary.objects.get_or_create(
+        student_id=student_id,
+        academic_year=academic_year,
+        semester=semester
+    )
+    StudentTermSummary.objects.filter(pk=summary.pk).update(
+        quality_points=F('quality_points') + quality_points,
+        credit_hours=F('credit_hours') + credit_hours
+    )
+    summary.refresh_from_db(fields=['quality_points', 'credit_hours'])
+    if summary.credit_hours <= 0:
+        summary.delete()
+    else:
+        StudentTermSummary.objects.filter(pk=summary.pk).update(
+            gpa=compute_gpa(summary.quality_points, summary.credit_hours)
+        )
+
+    Student.objects.filter(pk=student_id).update(
+        total_quality_points=F('total_quality_points') + quality_points,
+        total_credit_hours=F('total_credit_hours') + credit_hours
+    )
+
+
+def refresh_student_gpa(student_id):
+    """Derive gpa, cgpa and academic_status from the stored sums"""
+    from .models import Student, StudentTermSummary
+
+    student = Student.objects.filter(pk=student_id).only(
+        'total_quality_points', 'total_credit_hours', 'academic_status', 'cgpa'
+    ).first()
+    if student is None:
+        return
+
+    terms = StudentTermSummary.objects.filter(student_id=student_id).values_list(
+        'academic_year', 'semester', 'gpa'
+    )
+    latest = max(terms, key=lambda term: term_sort_key(term[0], term[1]), default=None)
+
+    cgpa = compute_gpa(student.total_quality_points, student.total_credit_hours)
+    Student.objects.filter(pk=student_id).update(
+        gpa=latest[2] if latest else ZERO,
+        cgpa=cgpa,
+        academic_status=academic_status_for(cgpa, student.total_credit_hours, student.academic_status)
+    )
+
+    if cgpa != student.cgpa:
+        from .rankings import update_student_rank
+
+        update_student_rank(student_id)
+
+
+def recompute_all(student_ids=None, batch_size=1000):
+    """
+    Rebuild term summaries and GPA fields from scratch with one grouped
+    aggregate over the records. Only students whose values changed are
+    written; returns how many were.
+    """
+    from .models import Student, StudentAcademicRecord, StudentTermSummary
+
+    records = StudentAcademicRecord.objects.filter(is_transfer_credit=False)
+    gpa_fields = ['total_quality_points', 'total_credit_hours', 'gpa', 'cgpa', 'academic_status']
+    students = Student.objects.only('id', *gpa_fields)
+    if student_ids is not None:
+        records = records.filter(student_id__in=student_ids)
+        students = students.filter(pk__in=student_ids)
+
+    term_totals = records.values('student_id', 'academic_year', 'semester').annotate(
+        quality_points=Sum(ExpressionWrapper(
+            F('credit_hours') * F('grade_points'),
+            output_field=DecimalField(max_digits=10, decimal_places=2)
+        )),
+        credits=Sum('credit_hours')
+    )
+
+    summaries = []
+    totals = defaultdict(lambda: [ZERO, 0, None])
+    for row in term_totals:
+        quality_points = Decimal(row['quality_points'] or 0).quantize(Decimal('0.01'))
+        term_gpa = compute_gpa(quality_points, row['credits'])
+        summaries.append(StudentTermSummary(
+            student_id=row['student_id'],
+            academic_year=row['academic_year'],
+            semester=row['semester'],
+            quality_points=quality_points,
+            credit_hours=row['credits'],
+            gpa=term_gpa
+        ))
+
+        total = totals[row['student_id']]
+        total[0] += quality_points
+        total[1] += row['credits']
+        key = term_sort_key(row['academic_year'], row['semester'])
+        if total[2] is None or key > total[2][0]:
+            total[2] = (key, term_gpa)
+
+    updated = []
+    for student in students.iterator(chunk_size=batch_size):
+        before = [getattr(student, field) for field in gpa_fields]
+        quality_points, credit_hours, latest = totals.get(student.pk, (ZERO, 0, None))
+        student.total_quality_points = quality_points
+        student.total_credit_hours = credit_hours
+        student.cgpa = compute_gpa(quality_points, credit_hours)
+        student.gpa = latest[1] if latest else ZERO
+        student.academic_status = academic_status_for(student.cgpa, credit_hours, student.academic_status)
+        if [getattr(student, field) for field in gpa_fields] != before:
+            updated.append(student)
+
+    with transaction.atomic():
+        existing = StudentTermSummary.objects.all()
+        if student_ids is not None:
+            existing = existing.filter(student_id__in=student_ids)
+        existing.delete()
+        StudentTermSummary.objects.bulk_create(summaries, batch_size=batch_size)
+        Student.objects.bulk_update(updated, gpa_fields, batch_size=batch_size)
+
+    if updated:
+        from .rankings import refresh_cohorts_for_students
+
+        refresh_cohorts_for_students([student.pk for student in updated])
+
+    return len(updated)
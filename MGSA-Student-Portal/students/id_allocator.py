@@ -0,0 +1,96 @@
+# students/id_allocator.py
+"""
+Sequence-backed student ID allocation.
+
+IDs look like ``MGSA{yy}{n:04d}``; ``n`` comes from the StudentIdSequence row
+for the year and simply grows past 9999 (``MGSA2610000``). Each process
+reserves a block of numbers with one locked UPDATE and hands them out from
+memory, so bulk imports need one query per block instead of one per ID.
+Numbers left in a block when a process exits are skipped, never reused.
+"""
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+_lock = threading.Lock()
+_blocks = {}  # year -> [next_value, end_value)
+
+
+def format_student_id(year, value):
+    return f"MGSA{year % 100:02d}{value:04d}"
+
+
+def is_allocated_format(student_id):
+    """Whether ``student_id`` looks like one this module hands out"""
+    return student_id.startswith('MGSA') and len(student_id) >= 10 and student_id[4:].isdigit()
+
+
+def get_block_size():
+    return getattr(settings, 'STUDENT_ID_BLOCK_SIZE', 50)
+
+
+def _initial_value(year):
+    """Start after the highest number already issued under the year's prefix"""
+    from .models import Student
+
+    prefix = f"MGSA{year % 100:02d}"
+    highest = 0
+    for student_id in Student.objects.filter(student_id__startswith=prefix).values_list('student_id', flat=True):
+        suffix = student_id[len(prefix):]
+        if suffix.isdigit():
+            highest = max(highest, int(suffix))
+    return highest + 1
+
+
+def _reserve(year, size):
+    """Advance the year's counter by ``size`` and return the reserved range"""
+    from .models import StudentIdSequence
+
+    with transaction.atomic():
+        sequence = StudentIdSequence.objects.select_for_update().filter(year=year).first()
+        if sequence is None:
+            StudentIdSequence.objects.get_or_create(year=year, defaults={'next_value': _initial_value(year)})
+            sequence = StudentIdSequence.objects.select_for_update().get(year=year)
+
+        start = sequence.next_value
+        StudentIdSequence.objects.filter(pk=sequence.pk).update(next_value=F('next_value') + size)
+    return start, start + size
+
+
+def allocate(count=1, year=None):
+    """Return ``count`` unused student IDs for ``year`` (defaults to this year)"""
+    if count <= 0:
+        return []
+
+    year = year or timezone.now().year
+    values = []
+
+    with _lock:
+        block = _blocks.get(year)
+        if block:
+            take = min(count, block[1] - block[0])
+            values.extend(range(block[0], block[0] + take))
+            block[0] += take
+            if block[0] >= block[1]:
+                del _blocks[year]
+
+        needed = count - len(values)
+        if needed:
+            start, end = _reserve(year, max(needed, get_block_size()))
+            values.extend(range(start, start + needed))
+            if start + needed < end:
+                remainder = [start + needed, end]
+                # A rolled back reservation must not leave numbers in memory
+                # that another process can reserve again
+                transaction.on_commit(lambda: _blocks.setdefault(year, remainder))
+
+    return [format_student_id(year, value) for value in values]
+
+
+def reset():
+    """Forget reserved blocks, e.g. between tests"""
+    with _lock:
+        _blocks.clear()
@@ -0,0 +1,448 @@
+# students/importers.py
+import csv
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+
+from .id_allocator import is_allocated_format
+from .models import Student, StudentAcademicRecord
+
+User = get_user_model()
+
+
+def iter_spreadsheet_rows(file_obj, filename):
+    """Yield (row_number, row_dict) from a CSV or XLSX file without loading it whole"""
+    if filename.lower().endswith('.xlsx'):
+        import openpyxl
+
+        workbook = openpyxl.load_workbook(file_obj, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                return
+            columns = [str(cell).strip().lower() if cell is not None else '' for cell in header]
+            for row_number, values in enumerate(rows, start=2):
+                if values is None or all(value is None for value in values):
+                    continue
+                yield row_number, {
+                    column: '' if value is None else str(value).strip()
+                    for column, value in zip(columns, values)
+                }
+        finally:
+            workbook.close()
+    else:
+        if isinstance(file_obj, io.TextIOBase):
+            text = file_obj
+        else:
+            text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+        reader = csv.DictReader(text)
+        if reader.fieldnames:
+            reader.fieldnames = [name.strip().lower() for name in reader.fieldnames]
+        for row_number, row in enumerate(reader, start=2):
+            if not any((value or '').strip() for value in row.values() if isinstance(value, str)):
+                continue
+            yield row_number, {
+                key: (value or '').strip()
+                for key, value in row.items() if key
+            }
+
+
+def _hash_passwords(passwords, workers=None):
+    """Hash passwords in a process pool, PBKDF2 is CPU bound"""
+    if not passwords:
+        return []
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 50:
+        return [make_password(password) for password in passwords]
+
+    chunksize = max(1, len(passwords) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as executor:
+        return list(executor.map(make_password, passwords, chunksize=chunksize))
+
+
+class StudentImporter:
+    """
+    Validate and bulk create student accounts from registrar spreadsheets.
+    A row's student_id, or an allocated one when it has none, is used for
+    both the user and their student profile.
+    """
+    REQUIRED_FIELDS = [
+        'email', 'first_name', 'last_name', 'gender', 'zone',
+        'woreda', 'college', 'department', 'year_of_study',
+    ]
+    OPTIONAL_FIELDS = ['middle_name', 'kebele', 'student_id', 'password']
+
+    def __init__(self, chunk_size=1000, workers=None, dry_run=False):
+        self.chunk_size = chunk_size
+        self.workers = workers
+        self.dry_run = dry_run
+        self.created = 0
+        self.errors = []
+        self._choices = {
+            'gender': dict(User.GENDER_CHOICES),
+            'zone': dict(User.ZONE_CHOICES),
+            'year_of_study': dict(User.YEAR_CHOICES),
+        }
+
+    def add_error(self, row_number, email, messages):
+        self.errors.append({
+            'row': row_number,
+            'email': email,
+            'errors': messages,
+        })
+
+    def validate_row(self, row_number, row):
+        """Return cleaned values for a row, or None after recording its errors"""
+        messages = []
+
+        for field in self.REQUIRED_FIELDS:
+            if not row.get(field):
+                messages.append(f'{field} is required')
+
+        email = User.objects.normalize_email(row.get('email', ''))
+        if email:
+            try:
+                validate_email(email)
+            except ValidationError:
+                messages.append(f'Invalid email: {email}')
+
+        for field, choices in self._choices.items():
+            value = row.get(field)
+            if value and value not in choices:
+                messages.append(f'Invalid {field}: {value}')
+
+        student_id = row.get('student_id', '')
+        if len(student_id) > 20:
+            messages.append('student_id longer than 20 characters')
+        elif student_id and is_allocated_format(student_id):
+            # It would collide with an ID the allocator hands out later
+            messages.append(f'student_id {student_id} is reserved for allocated IDs, leave it blank instead')
+
+        if messages:
+            self.add_error(row_number, email, messages)
+            return None
+
+        cleaned = {field: row.get(field, '') for field in self.REQUIRED_FIELDS + self.OPTIONAL_FIELDS}
+        cleaned['email'] = email
+        cleaned['student_id'] = cleaned['student_id'] or None
+        return cleaned
+
+    def run(self, rows):
+        """Import an iterable of (row_number, row_dict), returns the summary"""
+        valid_rows = []
+        seen_emails = {}
+        seen_student_ids = {}
+
+        for row_number, row in rows:
+            cleaned = self.validate_row(row_number, row)
+            if cleaned is None:
+                continue
+
+            email_key = cleaned['email'].lower()
+            if email_key in seen_emails:
+                self.add_error(row_number, cleaned['email'], [
+                    f"Duplicate email in file (row {seen_emails[email_key]})"
+                ])
+                continue
+            student_id = cleaned['student_id']
+            if student_id and student_id in seen_student_ids:
+                self.add_error(row_number, cleaned['email'], [
+                    f"Duplicate student_id in file (row {seen_student_ids[student_id]})"
+                ])
+                continue
+
+            seen_emails[email_key] = row_number
+            if student_id:
+                seen_student_ids[student_id] = row_number
+            valid_rows.append((row_number, cleaned))
+
+        # Set queries for uniqueness against existing accounts and profiles
+        existing_emails = set()
+        existing_student_ids = set()
+        if valid_rows:
+            existing = User.objects.filter(
+                Q(email__in=[cleaned['email'] for _, cleaned in valid_rows]) |
+                Q(student_id__in=list(seen_student_ids))
+            ).values_list('email', 'student_id')
+            for email, student_id in existing:
+                existing_emails.add(email.lower())
+                if student_id:
+                    existing_student_ids.add(student_id)
+            if seen_student_ids:
+                existing_student_ids.update(
+                    Student.objects.filter(student_id__in=list(seen_student_ids)).values_list('student_id', flat=True)
+                )
+
+        importable = []
+        for row_number, cleaned in valid_rows:
+            messages = []
+            if cleaned['email'].lower() in existing_emails:
+                messages.append('A user with this email already exists')
+            if cleaned['student_id'] and cleaned['student_id'] in existing_student_ids:
+                messages.append('A user with this student_id already exists')
+            if messages:
+                self.add_error(row_number, cleaned['email'], messages)
+            else:
+                importable.append((row_number, cleaned))
+
+        if not self.dry_run:
+            for start in range(0, len(importable), self.chunk_size):
+                self.write_chunk(importable[start:start + self.chunk_size])
+
+        return self.summary(len(importable))
+
+    def write_chunk(self, chunk):
+        """Create the users and student profiles of one chunk in a transaction"""
+        with_password = [cleaned['password'] for _, cleaned in chunk if cleaned['password']]
+        hashes = iter(_hash_passwords(with_password, self.workers))
+
+        users = []
+        for _, cleaned in chunk:
+            user = User(
+                email=cleaned['email'],
+                first_name=cleaned['first_name'],
+                middle_name=cleaned['middle_name'],
+                last_name=cleaned['last_name'],
+                gender=cleaned['gender'],
+                zone=cleaned['zone'],
+                woreda=cleaned['woreda'],
+                kebele=cleaned['kebele'],
+                college=cleaned['college'],
+                department=cleaned['department'],
+                year_of_study=cleaned['year_of_study'],
+                student_id=cleaned['student_id'],
+                role='Student',
+            )
+            if cleaned['password']:
+                user.password = next(hashes)
+            else:
+                user.set_unusable_password()
+            users.append(user)
+
+        try:
+            with transaction.atomic():
+                # Rows without a student_id get allocated ones
+                allocated = iter(Student.generate_student_ids(sum(1 for user in users if not user.student_id)))
+                for user in users:
+                    user.student_id = user.student_id or next(allocated)
+                User.objects.bulk_create(users)
+                if any(user.pk is None for user in users):
+                    # Backends that can't return ids from bulk inserts
+                    ids = dict(User.objects.filter(
+                        email__in=[user.email for user in users]
+                    ).values_list('email', 'id'))
+                    for user in users:
+                        user.pk = ids[user.email]
+
+                students = []
+                for user in users:
+                    student = Student(
+                        user=user,
+                        student_id=user.student_id,
+                        year_of_study=user.year_of_study,
+                    )
+                    student.calculate_profile_completion()
+                    students.append(student)
+                Student.objects.bulk_create(students)
+        except IntegrityError as e:
+            for row_number, cleaned in chunk:
+                self.add_error(row_number, cleaned['email'], [f'Database error: {e}'])
+            return
+
+        self.created += len(users)
+
+    def summary(self, valid_count):
+        return {
+            'created': self.created,
+            'valid': valid_count,
+            'rejected': len({error['row'] for error in self.errors}),
+            'dry_run': self.dry_run,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
+
+
+def write_error_report(path, errors):
+    """Write an importer's per-row errors to a CSV file"""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['row', 'key', 'errors'])
+        for error in errors:
+            writer.writerow([error['row'], error.get('email') or error.get('key', ''), '; '.join(error['errors'])])
+
+
+class AcademicRecordImporter:
+    """Upsert StudentAcademicRecord rows from registrar grade sheets"""
+    REQUIRED_FIELDS = ['student_id', 'course_code', 'course_name', 'credit_hours', 'grade', 'semester', 'academic_year']
+    UPDATE_FIELDS = ['course_name', 'credit_hours', 'grade', 'grade_points', 'is_transfer_credit', 'remarks']
+
+    # Letter grade to grade points, used when the sheet has no grade_points column
+    GRADE_POINTS = {
+        'A+': '4.00', 'A': '4.00', 'A-': '3.75',
+        'B+': '3.50', 'B': '3.00', 'B-': '2.75',
+        'C+': '2.50', 'C': '2.00', 'C-': '1.75',
+        'D': '1.00', 'F': '0.00',
+    }
+
+    def __init__(self, chunk_size=2000, dry_run=False):
+        self.chunk_size = chunk_size
+        self.dry_run = dry_run
+        self.inserted = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.errors = []
+        self.affected_students = set()
+        self._seen_keys = {}
+        self._student_map = None
+
+    def add_error(self, row_number, key, messages):
+        self.errors.append({'row': row_number, 'key': key, 'errors': messages})
+
+    def load_student_map(self):
+        """Map both MGSA student IDs and registrar IDs to Student pks in one query"""
+        student_map = {}
+        for pk, student_id, registrar_id in Student.objects.values_list('pk', 'student_id', 'user__student_id'):
+            if registrar_id:
+                student_map[registrar_id] = pk
+            if student_id:
+                student_map[student_id] = pk
+        return student_map
+
+    def validate_row(self, row_number, row):
+        messages = [f'{field} is required' for field in self.REQUIRED_FIELDS if not row.get(field)]
+        key = row.get('student_id', '')
+        if messages:
+            self.add_error(row_number, key, messages)
+            return None
+
+        student_pk = self._student_map.get(row['student_id'])
+        if student_pk is None:
+            messages.append(f"Unknown student_id: {row['student_id']}")
+
+        try:
+            credit_hours = int(row['credit_hours'])
+            if credit_hours <= 0:
+                raise ValueError
+        except ValueError:
+            messages.append(f"Invalid credit_hours: {row['credit_hours']}")
+
+        grade = row['grade'].upper()
+        raw_points = row.get('grade_points') or self.GRADE_POINTS.get(grade)
+        try:
+            grade_points = Decimal(raw_points).quantize(Decimal('0.01'))
+            if not Decimal('0') <= grade_points <= Decimal('4'):
+                raise InvalidOperation
+        except (InvalidOperation, TypeError):
+            messages.append(f"Invalid grade_points for grade {grade}: {row.get('grade_points', '')}")
+
+        for field, limit in [('course_code', 20), ('grade', 5), ('semester', 10), ('academic_year', 10)]:
+            if len(row[field]) > limit:
+                messages.append(f'{field} longer than {limit} characters')
+
+        if messages:
+            self.add_error(row_number, key, messages)
+            return None
+
+        record_key = (student_pk, row['course_code'], row['semester'], row['academic_year'])
+        if record_key in self._seen_keys:
+            self.add_error(row_number, key, [f'Duplicate record in file (row {self._seen_keys[record_key]})'])
+            return None
+        self._seen_keys[record_key] = row_number
+
+        return record_key, StudentAcademicRecord(
+            student_id=student_pk,
+            course_code=row['course_code'],
+            course_name=row['course_name'],
+            credit_hours=credit_hours,
+            grade=grade,
+            grade_points=grade_points,
+            semester=row['semester'],
+            academic_year=row['academic_year'],
+            is_transfer_credit=row.get('is_transfer_credit', '').lower() in ['1', 'true', 'yes', 'y'],
+            remarks=row.get('remarks', ''),
+        )
+
+    def run(self, rows):
+        from .gpa import recompute_all
+
+        self._student_map = self.load_student_map()
+
+        chunk = []
+        for row_number, row in rows:
+            validated = self.validate_row(row_number, row)
+            if validated is None:
+                continue
+            chunk.append((row_number, validated))
+            if len(chunk) >= self.chunk_size:
+                self.write_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.write_chunk(chunk)
+
+        # bulk_create skips the GPA receivers, recompute the touched students once
+        if self.affected_students and not self.dry_run:
+            recompute_all(list(self.affected_students))
+
+        return self.summary()
+
+    def write_chunk(self, chunk):
+        records = {record_key: (row_number, record) for row_number, (record_key, record) in chunk}
+
+        existing = {}
+        candidates = StudentAcademicRecord.objects.filter(
+            student_id__in={key[0] for key in records},
+            course_code__in={key[1] for key in records},
+        ).values_list('student_id', 'course_code', 'semester', 'academic_year', *self.UPDATE_FIELDS)
+        for values in candidates:
+            if values[:4] in records:
+                existing[values[:4]] = tuple(values[4:])
+
+        pending = []
+        inserted = updated = unchanged = 0
+        for record_key, (row_number, record) in records.items():
+            if record_key not in existing:
+                inserted += 1
+            elif existing[record_key] == tuple(getattr(record, field) for field in self.UPDATE_FIELDS):
+                unchanged += 1
+                continue
+            else:
+                updated += 1
+            pending.append(record)
+
+        if pending and not self.dry_run:
+            try:
+                with transaction.atomic():
+                    StudentAcademicRecord.objects.bulk_create(
+                        pending,
+                        update_conflicts=True,
+                        unique_fields=['student', 'course_code', 'semester', 'academic_year'],
+                        update_fields=self.UPDATE_FIELDS + ['updated_at'],
+                    )
+            except IntegrityError as e:
+                for row_number, (record_key, record) in chunk:
+                    self.add_error(row_number, '', [f'Database error: {e}'])
+                return
+            self.affected_students.update(record.student_id for record in pending)
+
+        self.inserted += inserted
+        self.updated += updated
+        self.unchanged += unchanged
+
+    def summary(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'rejected': len(self.errors),
+            'dry_run': self.dry_run,
+            'errors': sorted(self.errors, key=lambda error: error['row']),
+        }
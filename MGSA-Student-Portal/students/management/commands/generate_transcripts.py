@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.models import Student
+from students.transcripts import write_transcripts_zip
+
+class Command(BaseCommand):
+    help = 'Generate transcript PDFs for a cohort into a single ZIP file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the ZIP file to write')
+        parser.add_argument('--status', default='graduated',
+                            help="Academic status of the cohort, or 'all' (default: graduated)")
+        parser.add_argument('--department', help='Only students of this department')
+        parser.add_argument('--workers', type=int, default=None, help='Rendering processes (default: CPU count)')
+
+    def handle(self, *args, **options):
+        students = Student.objects.all()
+        if options['status'] != 'all':
+            students = students.filter(academic_status=options['status'])
+        if options['department']:
+            students = students.filter(user__department=options['department'])
+        
+        if not students.exists():
+            raise CommandError('No students match the given filters')
+        
+        started = time.monotonic()
+        with open(options['output'], 'wb') as output:
+            written, rendered = write_transcripts_zip(students, output, workers=options['workers'])
+        elapsed = time.monotonic() - started
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Wrote {written} transcripts to {options['output']} "
+                f"({rendered} rendered, {written - rendered} from cache) in {elapsed:.1f}s"
+            )
+        )
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.importers import AcademicRecordImporter, iter_spreadsheet_rows, write_error_report
+
+class Command(BaseCommand):
+    help = 'Import or update academic records from a registrar grade sheet (CSV or XLSX)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with one course result per row')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--dry-run', action='store_true', help='Validate and count without writing')
+        parser.add_argument('--report', help='Write rejected rows to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        importer = AcademicRecordImporter(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as f:
+                summary = importer.run(iter_spreadsheet_rows(f, path))
+        except FileNotFoundError:
+            raise CommandError(f'File not found: {path}')
+        elapsed = time.monotonic() - started
+        
+        for error in summary['errors'][:20]:
+            self.stdout.write(
+                self.style.WARNING(f"Row {error['row']} ({error['key']}): {'; '.join(error['errors'])}")
+            )
+        if len(summary['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(summary['errors']) - 20} more"))
+        
+        if options['report'] and summary['errors']:
+            write_error_report(options['report'], summary['errors'])
+            self.stdout.write(f"Error report written to {options['report']}")
+        
+        prefix = '[dry run] ' if summary['dry_run'] else ''
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{prefix}Inserted {summary['inserted']}, updated {summary['updated']}, "
+                f"unchanged {summary['unchanged']}, rejected {summary['rejected']} rows in {elapsed:.1f}s"
+            )
+        )
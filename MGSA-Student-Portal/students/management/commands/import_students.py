@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from students.importers import StudentImporter, iter_spreadsheet_rows, write_error_report
+
+class Command(BaseCommand):
+    help = 'Bulk import student accounts from a registrar CSV or XLSX file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV or XLSX file with one student per row')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--workers', type=int, default=None, help='Password hashing processes')
+        parser.add_argument('--dry-run', action='store_true', help='Validate without creating accounts')
+        parser.add_argument('--report', help='Write rejected rows to this CSV file')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        importer = StudentImporter(
+            chunk_size=options['chunk_size'],
+            workers=options['workers'],
+            dry_run=options['dry_run'],
+        )
+        
+        started = time.monotonic()
+        try:
+            with open(path, 'rb') as f:
+                summary = importer.run(iter_spreadsheet_rows(f, path))
+        except FileNotFoundError:
+            raise CommandError(f'File not found: {path}')
+        elapsed = time.monotonic() - started
+        
+        for error in summary['errors'][:20]:
+            self.stdout.write(
+                self.style.WARNING(f"Row {error['row']} ({error['email']}): {'; '.join(error['errors'])}")
+            )
+        if len(summary['errors']) > 20:
+            self.stdout.write(self.style.WARNING(f"... and {len(summary['errors']) - 20} more"))
+        
+        if options['report'] and summary['errors']:
+            write_error_report(options['report'], summary['errors'])
+            self.stdout.write(f"Error report written to {options['report']}")
+        
+        action = 'Validated' if summary['dry_run'] else 'Created'
+        count = summary['valid'] if summary['dry_run'] else summary['created']
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{action} {count} students, rejected {summary['rejected']} rows in {elapsed:.1f}s"
+            )
+        )
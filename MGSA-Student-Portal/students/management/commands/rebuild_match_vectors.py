@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from students.matching import rebuild_all
+
+class Command(BaseCommand):
+    help = 'Rebuild the study-group match vectors of every student'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        rebuilt = rebuild_all(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Rebuilt {rebuilt} match vectors in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from students.gpa import recompute_all
+from students.models import Student
+
+class Command(BaseCommand):
+    help = 'Recompute term GPA, GPA, CGPA and academic status from academic records'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--student', action='append', dest='student_ids', metavar='STUDENT_ID',
+                            help='Only recompute this student ID (may be repeated)')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        
+        student_pks = None
+        if options['student_ids']:
+            student_pks = list(
+                Student.objects.filter(student_id__in=options['student_ids']).values_list('pk', flat=True)
+            )
+        
+        updated = recompute_all(student_pks, batch_size=options['batch_size'])
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Recomputed GPA, {updated} students changed, in {time.monotonic() - started:.2f}s')
+        )
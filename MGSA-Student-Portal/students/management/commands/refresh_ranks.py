@@ -0,0 +1,20 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from students.rankings import refresh_all
+
+class Command(BaseCommand):
+    help = 'Recompute CGPA ranks and percentiles for every department/year cohort'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        ranked, cohorts = refresh_all(batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Ranked {ranked} students in {cohorts} cohorts in {time.monotonic() - started:.2f}s'
+            )
+        )
@@ -1,5 +1,9 @@
+import time
+
 from django.core.management.base import BaseCommand
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Q
 from students.models import Student
 
 User = get_user_model()
@@ -7,27 +11,80 @@ User = get_user_model()
 class Command(BaseCommand):
     help = 'Sync Student objects for existing users with Student role'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+        parser.add_argument('--repair-orphans', action='store_true',
+                            help='Deactivate profiles of non-student users and fill missing student IDs')
+        parser.add_argument('--batch-size', type=int, default=2000)
+
     def handle(self, *args, **options):
-        # Get all users with Student role
-        student_users = User.objects.filter(role='Student')
-        
-        self.stdout.write(f"Found {student_users.count()} users with Student role")
-        
+        dry_run = options['dry_run']
+        batch_size = options['batch_size']
+        started = time.monotonic()
+
+        # Anti-join: Student-role users without a profile
+        missing_users = User.objects.filter(role='Student', student_profile__isnull=True).only(
+            'id', 'first_name', 'last_name', 'email', 'gender', 'year_of_study'
+        )
+        missing_count = missing_users.count()
+        self.stdout.write(f"Found {missing_count} Student users without a profile")
+
         created_count = 0
-        for user in student_users:
-            # Create Student profile if it doesn't exist
-            student, created = Student.objects.get_or_create(user=user)
-            if created:
-                created_count += 1
-                self.stdout.write(
-                    self.style.SUCCESS(f'✓ Created Student profile for {user.email}')
-                )
-            else:
-                self.stdout.write(
-                    self.style.WARNING(f'→ Student profile already exists for {user.email}')
-                )
-        
+        if missing_count and not dry_run:
+            year_choices = dict(Student.YEAR_CHOICES)
+            with transaction.atomic():
+                batch = []
+                for user in missing_users.iterator(chunk_size=batch_size):
+                    student = Student(
+                        user=user,
+                        year_of_study=user.year_of_study if user.year_of_study in year_choices else 'Fresh',
+                    )
+                    student.calculate_profile_completion()
+                    batch.append(student)
+                    if len(batch) >= batch_size:
+                        created_count += self.create_profiles(batch)
+                        batch = []
+                if batch:
+                    created_count += self.create_profiles(batch)
+
+        if options['repair_orphans']:
+            self.repair_orphans(dry_run, batch_size)
+
         total_students = Student.objects.count()
+        elapsed = time.monotonic() - started
+        prefix = '[dry run] ' if dry_run else ''
         self.stdout.write(
-            self.style.SUCCESS(f'\nSuccessfully synced {created_count} new Student profiles. Total students: {total_students}')
-        )
\ No newline at end of file
+            self.style.SUCCESS(
+                f'{prefix}Successfully synced {created_count} new Student profiles. '
+                f'Total students: {total_students} ({elapsed:.2f}s)'
+            )
+        )
+
+    def create_profiles(self, students):
+        for student, student_id in zip(students, Student.generate_student_ids(len(students))):
+            student.student_id = student_id
+        Student.objects.bulk_create(students)
+        return len(students)
+
+    def repair_orphans(self, dry_run, batch_size):
+        # Profiles left behind after a user's role changed away from Student
+        orphaned = Student.objects.filter(is_active_student=True).filter(
+            ~Q(user__role='Student') | Q(user__is_active=False)
+        )
+        # Profiles that never got a student ID
+        without_id = Student.objects.filter(Q(student_id__isnull=True) | Q(student_id=''))
+
+        orphaned_count = orphaned.count()
+        without_id_count = without_id.count()
+
+        if not dry_run:
+            with transaction.atomic():
+                orphaned.update(is_active_student=False)
+
+                pending = list(without_id.only('id'))
+                for student, student_id in zip(pending, Student.generate_student_ids(len(pending))):
+                    student.student_id = student_id
+                Student.objects.bulk_update(pending, ['student_id'], batch_size=batch_size)
+
+        self.stdout.write(f"Orphaned profiles deactivated: {orphaned_count}")
+        self.stdout.write(f"Missing student IDs filled: {without_id_count}")
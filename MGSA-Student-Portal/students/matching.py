@@ -0,0 +1,264 @@
+# students/matching.py
+"""
+Study-group matching over Student interests, skills, preferred study methods
+and availability.
+
+Each student's lists are hashed into a fixed-width bitset, one band of bits
+per list, kept in StudentMatchVector and rebuilt when those fields change.
+A cohort is matched by unpacking the bitsets into a matrix, dropping the
+columns nobody in it uses and taking the pairwise overlaps from a matrix
+product. Similarity is the weighted Jaccard index of two students' tokens.
+"""
+import hashlib
+import re
+
+import numpy as np
+from django.utils import timezone
+
+from .models import Student, StudentMatchVector
+
+MATCH_FIELDS = ['interests', 'skills', 'preferred_study_methods', 'availability']
+
+# Bits and weight of each field's band, laid out in MATCH_FIELDS order.
+# Sharing a free slot matters more for a study group than sharing a hobby.
+BANDS = {
+    'interests': (192, 1.0),
+    'skills': (192, 1.0),
+    'preferred_study_methods': (64, 0.5),
+    'availability': (64, 1.5),
+}
+VECTOR_BITS = sum(bits for bits, _ in BANDS.values())
+
+BIT_WEIGHTS = np.concatenate([
+    np.full(BANDS[field][0], BANDS[field][1], dtype=np.float32) for field in MATCH_FIELDS
+])
+BAND_OFFSETS = dict(zip(MATCH_FIELDS, np.cumsum([0] + [BANDS[field][0] for field in MATCH_FIELDS])))
+
+
+def normalize_tokens(values):
+    """Lower-cased, whitespace-collapsed tokens of a JSON list (dict items are joined)"""
+    tokens = set()
+    for value in values or []:
+        if isinstance(value, dict):
+            value = ' '.join(str(part) for part in value.values())
+        token = re.sub(r'\s+', ' ', str(value)).strip().lower()
+        if token:
+            tokens.add(token)
+    return tokens
+
+
+def _bit_for(field, token):
+    digest = hashlib.blake2b(f"{field}:{token}".encode(), digest_size=8).digest()
+    return int(BAND_OFFSETS[field]) + int.from_bytes(digest, 'big') % BANDS[field][0]
+
+
+def encode_profile(profile):
+    """
+    Packed bitset and token count for a mapping (or object) holding the
+    MATCH_FIELDS lists.
+    """
+    bits = np.zeros(VECTOR_BITS, dtype=np.uint8)
+    token_count = 0
+    for field in MATCH_FIELDS:
+        values = profile[field] if isinstance(profile, dict) else getattr(profile, field)
+        for token in normalize_tokens(values):
+            bits[_bit_for(field, token)] = 1
+            token_count += 1
+    return np.packbits(bits).tobytes(), token_count
+
+
+def save_vectors(profiles, batch_size=1000):
+    """Upsert vectors for dicts with 'pk' and the MATCH_FIELDS lists"""
+    now = timezone.now()
+    vectors = []
+    for profile in profiles:
+        bits, token_count = encode_profile(profile)
+        vectors.append(StudentMatchVector(
+            student_id=profile['pk'],
+            bits=bits,
+            token_count=token_count,
+            updated_at=now
+        ))
+    StudentMatchVector.objects.bulk_create(
+        vectors,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=['bits', 'token_count', 'updated_at']
+    )
+    return len(vectors)
+
+
+def refresh_vector(student):
+    """Rebuild one student's vector, called when their profile lists change"""
+    return save_vectors([{'pk': student.pk, **{field: getattr(student, field) for field in MATCH_FIELDS}}])
+
+
+def rebuild_all(batch_size=1000):
+    profiles = Student.objects.values('pk', *MATCH_FIELDS)
+    batch = []
+    total = 0
+    for profile in profiles.iterator(chunk_size=batch_size):
+        batch.append(profile)
+        if len(batch) >= batch_size:
+            total += save_vectors(batch, batch_size)
+            batch = []
+    if batch:
+        total += save_vectors(batch, batch_size)
+    return total
+
+
+def _cohort_students(department, year_of_study=None):
+    students = Student.objects.filter(
+        user__department=department,
+        user__is_active=True,
+        is_active_student=True
+    )
+    if year_of_study:
+        students = students.filter(year_of_study=year_of_study)
+    return students
+
+
+def load_cohort(department, year_of_study=None):
+    """
+    (student pks, unpacked bit matrix) for a cohort. Students created in bulk
+    have no vector yet; theirs are built here on first use.
+    """
+    students = _cohort_students(department, year_of_study)
+    missing = list(students.filter(match_vector__isnull=True).values('pk', *MATCH_FIELDS))
+    if missing:
+        save_vectors(missing)
+
+    rows = list(
+        StudentMatchVector.objects.filter(student__in=students, token_count__gt=0).order_by('student_id').values_list('student_id', 'bits')
+    )
+    if not rows:
+        return np.empty(0, dtype=np.int64), np.empty((0, VECTOR_BITS), dtype=np.uint8)
+
+    pks = np.fromiter((pk for pk, _ in rows), dtype=np.int64, count=len(rows))
+    packed = np.frombuffer(b''.join(bytes(bits) for _, bits in rows), dtype=np.uint8).reshape(len(rows), -1)
+    return pks, np.unpackbits(packed, axis=1)[:, :VECTOR_BITS]
+
+
+def _weighted(bits, other=None):
+    """Dense float matrices and weighted sizes over the columns in use"""
+    used = bits.any(axis=0)
+    if other is not None:
+        used |= other.any(axis=0)
+    weights = BIT_WEIGHTS[used]
+    dense = bits[:, used].astype(np.float32)
+    return dense, weights, used
+
+
+def similarity_to(row, bits):
+    """Weighted Jaccard similarity of one bit row against every row of ``bits``"""
+    dense, weights, used = _weighted(bits, row[np.newaxis, :])
+    target = row[used].astype(np.float32)
+    overlap = dense @ (target * weights)
+    union = dense @ weights + (target @ weights) - overlap
+    return np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+
+
+def top_matches(bits, k=10, block_size=1000):
+    """
+    The ``k`` most similar other rows for every row, as (indices, scores)
+    arrays sorted by descending score. Rows are compared a block at a time so
+    memory stays at block_size x n.
+    """
+    size = len(bits)
+    k = min(k, size - 1)
+    if k <= 0:
+        return np.empty((size, 0), dtype=np.int64), np.empty((size, 0), dtype=np.float32)
+
+    dense, weights, _ = _weighted(bits)
+    weighted = dense * weights
+    totals = weighted.sum(axis=1)
+
+    indices = np.empty((size, k), dtype=np.int64)
+    scores = np.empty((size, k), dtype=np.float32)
+    for start in range(0, size, block_size):
+        stop = min(start + block_size, size)
+        overlap = weighted[start:stop] @ dense.T
+        union = totals[start:stop, np.newaxis] + totals[np.newaxis, :] - overlap
+        similarity = np.divide(overlap, union, out=np.zeros_like(overlap), where=union > 0)
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -1  # never match yourself
+
+        best = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(similarity, best, axis=1)
+        order = np.argsort(-best_scores, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(best, order, axis=1)
+        scores[start:stop] = np.take_along_axis(best_scores, order, axis=1)
+    return indices, scores
+
+
+def matches_for_student(student, limit=10, same_year=False):
+    """Most similar students in the same department as (student pk, score) pairs"""
+    pks, bits = load_cohort(student.department, student.year_of_study if same_year else None)
+    position = np.flatnonzero(pks == student.pk)
+    if not len(position):
+        return []
+
+    similarity = similarity_to(bits[position[0]], bits)
+    similarity[position[0]] = -1
+    limit = min(limit, len(pks) - 1)
+    if limit <= 0:
+        return []
+    best = np.argpartition(-similarity, limit - 1)[:limit]
+    best = best[np.argsort(-similarity[best], kind='stable')]
+    return [(int(pks[i]), round(float(similarity[i]), 4)) for i in best if similarity[i] > 0]
+
+
+def suggest_groups(department, year_of_study=None, group_size=4, min_similarity=0.1, limit=None):
+    """
+    Greedy study-group suggestions for a cohort, best groups first.
+
+    Students are taken in order of their best match; each unassigned student
+    seeds a group filled from their nearest unassigned neighbours. A group's
+    score is the mean pairwise similarity of its members.
+    """
+    pks, bits = load_cohort(department, year_of_study)
+    if len(pks) < 2:
+        return []
+
+    neighbours, scores = top_matches(bits, k=max(group_size * 3, 10))
+    assigned = np.zeros(len(pks), dtype=bool)
+    groups = []
+    for seed in np.argsort(-scores[:, 0], kind='stable'):
+        if assigned[seed]:
+            continue
+        members = [seed]
+        for neighbour, score in zip(neighbours[seed], scores[seed]):
+            if score < min_similarity:
+                break
+            if not assigned[neighbour] and neighbour != seed:
+                members.append(neighbour)
+                if len(members) >= group_size:
+                    break
+        if len(members) < 2:
+            continue
+
+        assigned[members] = True
+        member_bits = bits[members]
+        pairwise = [
+            similarity_to(member_bits[i], member_bits[i + 1:])
+            for i in range(len(members) - 1)
+        ]
+        groups.append({
+            'students': [int(pks[i]) for i in members],
+            'score': round(float(np.concatenate(pairwise).mean()), 4),
+        })
+
+    groups.sort(key=lambda group: -group['score'])
+    return groups[:limit] if limit else groups
+
+
+def shared_tokens(students):
+    """Tokens every one of ``students`` lists, per match field"""
+    shared = {}
+    for field in MATCH_FIELDS:
+        common = None
+        for student in students:
+            tokens = normalize_tokens(getattr(student, field))
+            common = tokens if common is None else common & tokens
+        shared[field] = sorted(common or [])
+    return shared
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_studentidsequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='total_credit_hours',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='total_quality_points',
+            field=models.DecimalField(decimal_places=2, default=0.0, max_digits=8),
+        ),
+        migrations.CreateModel(
+            name='StudentTermSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('academic_year', models.CharField(max_length=10)),
+                ('semester', models.CharField(max_length=10)),
+                ('quality_points', models.DecimalField(decimal_places=2, default=0.0, max_digits=8)),
+                ('credit_hours', models.IntegerField(default=0)),
+                ('gpa', models.DecimalField(decimal_places=2, default=0.0, max_digits=3)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='term_summaries', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Term Summary',
+                'verbose_name_plural': 'Term Summaries',
+                'ordering': ['-academic_year', 'semester'],
+                'unique_together': {('student', 'academic_year', 'semester')},
+            },
+        ),
+    ]
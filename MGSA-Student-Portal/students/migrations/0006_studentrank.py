@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_student_total_credit_hours_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentRank',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('department', models.CharField(max_length=100)),
+                ('year_of_study', models.CharField(max_length=10)),
+                ('cgpa', models.DecimalField(decimal_places=2, max_digits=3)),
+                ('rank', models.PositiveIntegerField()),
+                ('cohort_size', models.PositiveIntegerField()),
+                ('percentile', models.DecimalField(decimal_places=2, max_digits=5)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='rank', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Student Rank',
+                'verbose_name_plural': 'Student Ranks',
+                'ordering': ['department', 'year_of_study', 'rank'],
+                'indexes': [models.Index(fields=['department', 'year_of_study', 'rank'], name='students_st_departm_810ae8_idx')],
+            },
+        ),
+    ]
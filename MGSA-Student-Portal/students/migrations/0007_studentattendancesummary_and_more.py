@@ -0,0 +1,61 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Q, Sum
+
+
+def build_attendance_summaries(apps, schema_editor):
+    StudentAttendance = apps.get_model('students', 'StudentAttendance')
+    StudentAttendanceSummary = apps.get_model('students', 'StudentAttendanceSummary')
+
+    totals = StudentAttendance.objects.order_by().values('student_id').annotate(
+        recorded_count=Count('id'),
+        present_count=Count('id', filter=Q(present=True)),
+        present_minutes=Sum('duration_minutes', filter=Q(present=True)),
+    )
+    StudentAttendanceSummary.objects.bulk_create([
+        StudentAttendanceSummary(
+            student_id=row['student_id'],
+            sessions_recorded=row['recorded_count'],
+            sessions_present=row['present_count'],
+            minutes_present=row['present_minutes'] or 0,
+        )
+        for row in totals
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0006_studentrank'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentAttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sessions_recorded', models.IntegerField(default=0)),
+                ('sessions_present', models.IntegerField(default=0)),
+                ('minutes_present', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Attendance Summary',
+                'verbose_name_plural': 'Attendance Summaries',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='studentattendance',
+            index=models.Index(fields=['event_type', 'event_date', 'event_title'], name='students_st_event_t_22e311_idx'),
+        ),
+        migrations.AddField(
+            model_name='studentattendancesummary',
+            name='student',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summary', to='students.student'),
+        ),
+        migrations.RunPython(build_attendance_summaries, migrations.RunPython.noop),
+    ]
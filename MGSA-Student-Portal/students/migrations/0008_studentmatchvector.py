@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:29
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0007_studentattendancesummary_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentMatchVector',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bits', models.BinaryField()),
+                ('token_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match_vector', to='students.student')),
+            ],
+            options={
+                'verbose_name': 'Student Match Vector',
+                'verbose_name_plural': 'Student Match Vectors',
+            },
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-19 14:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+
+
+def remove_duplicate_attendance(apps, schema_editor):
+    """Keep the first row of each student and event, and recount the students that had extras"""
+    StudentAttendance = apps.get_model('students', 'StudentAttendance')
+    StudentAttendanceSummary = apps.get_model('students', 'StudentAttendanceSummary')
+
+    duplicates = StudentAttendance.objects.order_by().values(
+        'student_id', 'event_type', 'event_title', 'event_date'
+    ).annotate(first_id=Min('id'), rows=Count('id')).filter(rows__gt=1)
+
+    student_pks = set()
+    for group in duplicates:
+        StudentAttendance.objects.filter(
+            student_id=group['student_id'],
+            event_type=group['event_type'],
+            event_title=group['event_title'],
+            event_date=group['event_date'],
+        ).exclude(id=group['first_id']).delete()
+        student_pks.add(group['student_id'])
+
+    totals = StudentAttendance.objects.filter(student_id__in=student_pks).order_by().values('student_id').annotate(
+        recorded_count=Count('id'),
+        present_count=Count('id', filter=Q(present=True)),
+        present_minutes=Sum('duration_minutes', filter=Q(present=True)),
+    )
+    for row in totals:
+        StudentAttendanceSummary.objects.filter(student_id=row['student_id']).update(
+            sessions_recorded=row['recorded_count'],
+            sessions_present=row['present_count'],
+            minutes_present=row['present_minutes'] or 0,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0008_studentmatchvector'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_attendance, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='studentattendance',
+            constraint=models.UniqueConstraint(fields=('student', 'event_type', 'event_title', 'event_date'), name='unique_attendance_per_event'),
+        ),
+    ]
@@ -2,10 +2,12 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-class Student(models.Model):
+from accounts.tracking import TrackedFieldsMixin
+
+class Student(TrackedFieldsMixin, models.Model):
     YEAR_CHOICES = [
         ('Fresh', 'Fresh'),
         ('2nd Year', '2nd Year'),
@@ -37,6 +39,10 @@ class Student(models.Model):
     gpa = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     cgpa = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
     
+    # Running GPA sums maintained by students.gpa (excluding transfer credits)
+    total_quality_points = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    total_credit_hours = models.PositiveIntegerField(default=0)
+    
     # Academic Status
     is_active_student = models.BooleanField(default=True)
     academic_status = models.CharField(
@@ -92,6 +98,13 @@ class Student(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Fields counted by calculate_profile_completion()
+    PROFILE_USER_FIELDS = ('first_name', 'last_name', 'email', 'gender')
+    PROFILE_STUDENT_FIELDS = ('year_of_study', 'emergency_contact_name', 'emergency_contact_phone', 'bio')
+    
+    # Rebuild the study-group match vector, or the CGPA rank, when these change
+    tracked_fields = ('interests', 'skills', 'preferred_study_methods', 'availability', 'year_of_study')
+    
     class Meta:
         ordering = ['user__first_name', 'user__last_name']
         verbose_name = 'Student'
@@ -118,37 +131,30 @@ class Student(models.Model):
     
     def generate_student_id(self):
         """Generate a unique student ID"""
-        import random
-        import string
-        
-        # Format: MGSA + Year + Random numbers
-        year = timezone.now().year % 100  # Last two digits of year
-        random_part = ''.join(random.choices(string.digits, k=4))
-        
-        student_id = f"MGSA{year}{random_part}"
+        from .id_allocator import allocate
         
-        # Ensure uniqueness
-        while Student.objects.filter(student_id=student_id).exists():
-            random_part = ''.join(random.choices(string.digits, k=4))
-            student_id = f"MGSA{year}{random_part}"
-        
-        return student_id
-    
+        return allocate(1)[0]
+
+    @classmethod
+    def generate_student_ids(cls, count):
+        """Generate unique student IDs in bulk"""
+        from .id_allocator import allocate
+
+        return allocate(count)
+
     def calculate_profile_completion(self):
         """Calculate profile completion percentage"""
         total_fields = 0
         completed_fields = 0
         
         # User fields
-        user_fields = ['first_name', 'last_name', 'email', 'gender']
-        for field in user_fields:
+        for field in self.PROFILE_USER_FIELDS:
             total_fields += 1
             if getattr(self.user, field):
                 completed_fields += 1
         
         # Student fields
-        student_fields = ['year_of_study', 'emergency_contact_name', 'emergency_contact_phone', 'bio']
-        for field in student_fields:
+        for field in self.PROFILE_STUDENT_FIELDS:
             total_fields += 1
             if getattr(self, field):
                 completed_fields += 1
@@ -210,7 +216,7 @@ class Student(models.Model):
     def college(self):
         return self.user.college if hasattr(self.user, 'college') else None
 
-class StudentAcademicRecord(models.Model):
+class StudentAcademicRecord(TrackedFieldsMixin, models.Model):
     """Track student academic records"""
     student = models.ForeignKey(
         Student,
@@ -238,10 +244,64 @@ class StudentAcademicRecord(models.Model):
         verbose_name_plural = 'Academic Records'
         unique_together = ['student', 'course_code', 'semester', 'academic_year']
     
+    # Fields that feed the GPA sums, see students.gpa
+    tracked_fields = ('student_id', 'academic_year', 'semester', 'credit_hours', 'grade_points', 'is_transfer_credit')
+    
     def __str__(self):
         return f"{self.student.user.get_full_name()} - {self.course_code}"
 
-class StudentAttendance(models.Model):
+class StudentTermSummary(models.Model):
+    """Per-term GPA sums for a student, maintained by students.gpa"""
+    student = models.ForeignKey(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='term_summaries'
+    )
+    academic_year = models.CharField(max_length=10)
+    semester = models.CharField(max_length=10)
+    quality_points = models.DecimalField(max_digits=8, decimal_places=2, default=0.00)
+    credit_hours = models.IntegerField(default=0)
+    gpa = models.DecimalField(max_digits=3, decimal_places=2, default=0.00)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-academic_year', 'semester']
+        verbose_name = 'Term Summary'
+        verbose_name_plural = 'Term Summaries'
+        unique_together = ['student', 'academic_year', 'semester']
+    
+    def __str__(self):
+        return f"{self.student} - {self.academic_year} {self.semester}: {self.gpa}"
+
+class StudentRank(models.Model):
+    """CGPA rank of a student within their department and year, see students.rankings"""
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='rank'
+    )
+    department = models.CharField(max_length=100)
+    year_of_study = models.CharField(max_length=10)
+    cgpa = models.DecimalField(max_digits=3, decimal_places=2)
+    rank = models.PositiveIntegerField()
+    cohort_size = models.PositiveIntegerField()
+    percentile = models.DecimalField(max_digits=5, decimal_places=2)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['department', 'year_of_study', 'rank']
+        verbose_name = 'Student Rank'
+        verbose_name_plural = 'Student Ranks'
+        indexes = [
+            models.Index(fields=['department', 'year_of_study', 'rank']),
+        ]
+    
+    def __str__(self):
+        return f"{self.student} - #{self.rank} of {self.cohort_size}"
+
+class StudentAttendance(TrackedFieldsMixin, models.Model):
     """Track student attendance for tutorials/events"""
     student = models.ForeignKey(
         Student,
@@ -279,11 +339,69 @@ class StudentAttendance(models.Model):
         ordering = ['-event_date']
         verbose_name = 'Student Attendance'
         verbose_name_plural = 'Student Attendance Records'
+        indexes = [
+            models.Index(fields=['event_type', 'event_date', 'event_title']),
+        ]
+        constraints = [
+            # One row per student and event, roll calls upsert against it
+            models.UniqueConstraint(
+                fields=['student', 'event_type', 'event_title', 'event_date'],
+                name='unique_attendance_per_event'
+            ),
+        ]
+    
+    # Fields that feed StudentAttendanceSummary, see students.attendance
+    tracked_fields = ('student_id', 'present', 'duration_minutes')
     
     def __str__(self):
         status = "Present" if self.present else "Absent"
         return f"{self.student.user.get_full_name()} - {self.event_title} - {status}"
 
+class StudentAttendanceSummary(models.Model):
+    """Running attendance totals per student, maintained by students.attendance"""
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='attendance_summary'
+    )
+    sessions_recorded = models.IntegerField(default=0)
+    sessions_present = models.IntegerField(default=0)
+    minutes_present = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Attendance Summary'
+        verbose_name_plural = 'Attendance Summaries'
+    
+    def __str__(self):
+        return f"{self.student} - {self.attendance_rate}%"
+    
+    @property
+    def attendance_rate(self):
+        if not self.sessions_recorded:
+            return 0
+        return round(self.sessions_present * 100 / self.sessions_recorded, 1)
+
+class StudentMatchVector(models.Model):
+    """Hashed bitset of a student's interests, skills, study methods and availability, see students.matching"""
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.CASCADE,
+        related_name='match_vector'
+    )
+    bits = models.BinaryField()
+    token_count = models.PositiveIntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name = 'Student Match Vector'
+        verbose_name_plural = 'Student Match Vectors'
+    
+    def __str__(self):
+        return f"{self.student} - {self.token_count} tokens"
+
 class StudentAchievement(models.Model):
     """Track student achievements and awards"""
     ACHIEVEMENT_TYPES = [
@@ -322,21 +440,73 @@ class StudentAchievement(models.Model):
         return f"{self.student.user.get_full_name()} - {self.title}"
 
 
-# Signal to automatically create Student profile when User with Student role is created
-@receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def create_student_profile(sender, instance, created, **kwargs):
-    """
-    Automatically create Student profile when a user with Student role is created
-    """
-    if created and hasattr(instance, 'role') and instance.role == 'Student':
-        Student.objects.get_or_create(user=instance)
-        print(f"Created Student profile for {instance.email}")
+class StudentIdSequence(models.Model):
+    """Per-year counter backing student ID allocation"""
+    year = models.PositiveSmallIntegerField(unique=True)
+    next_value = models.PositiveIntegerField(default=1)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['-year']
+        verbose_name = 'Student ID Sequence'
+        verbose_name_plural = 'Student ID Sequences'
+    
+    def __str__(self):
+        return f"{self.year}: next {self.next_value}"
+
+
+# Keep GPA sums in step with academic records
+@receiver(post_save, sender=StudentAcademicRecord)
+def update_gpa_on_record_save(sender, instance, created, **kwargs):
+    from .gpa import apply_record_change
+
+    if created:
+        apply_record_change(new=instance.get_tracked_values())
+    elif instance.changed_fields:
+        apply_record_change(old=instance.previous_values, new=instance.get_tracked_values())
+
+@receiver(post_delete, sender=StudentAcademicRecord)
+def update_gpa_on_record_delete(sender, instance, **kwargs):
+    from .gpa import apply_record_change
+
+    apply_record_change(old=instance.get_previous_values() or instance.get_tracked_values())
+
+# Keep attendance summaries in step with single attendance rows (roll calls
+# created with bulk_create update the summaries themselves)
+@receiver(post_save, sender=StudentAttendance)
+def update_summary_on_attendance_save(sender, instance, created, **kwargs):
+    from .attendance import apply_attendance_change
+
+    if created:
+        apply_attendance_change(new=instance.get_tracked_values())
+    elif instance.changed_fields:
+        apply_attendance_change(old=instance.previous_values, new=instance.get_tracked_values())
+
+@receiver(post_delete, sender=StudentAttendance)
+def update_summary_on_attendance_delete(sender, instance, **kwargs):
+    from .attendance import apply_attendance_change
+
+    apply_attendance_change(old=instance.get_previous_values() or instance.get_tracked_values())
+
+# Keep the study-group match vector in step with the profile lists
+@receiver(post_save, sender=Student)
+def update_match_vector_on_student_save(sender, instance, created, **kwargs):
+    from .matching import MATCH_FIELDS, refresh_vector
+
+    if created or instance.changed_fields & set(MATCH_FIELDS):
+        refresh_vector(instance)
+
+# A student who moves department or year moves between leaderboard cohorts
+@receiver(post_save, sender=Student)
+def update_rank_on_student_save(sender, instance, created, **kwargs):
+    from .rankings import refresh_cohorts_for_students
+
+    if not created and 'year_of_study' in instance.changed_fields:
+        refresh_cohorts_for_students([instance.pk])
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def update_student_profile(sender, instance, **kwargs):
-    """
-    Update Student profile when User is updated
-    """
-    if hasattr(instance, 'role') and instance.role == 'Student':
-        # Ensure Student profile exists
-        Student.objects.get_or_create(user=instance)
\ No newline at end of file
+def update_rank_on_user_save(sender, instance, created, **kwargs):
+    from .rankings import refresh_cohorts_for_students
+
+    if not created and 'department' in getattr(instance, 'changed_fields', set()):
+        refresh_cohorts_for_students(Student.objects.filter(user=instance).values_list('pk', flat=True))
@@ -0,0 +1,183 @@
+# students/rankings.py
+"""
+Per-cohort CGPA leaderboards.
+
+A cohort is (User.department, Student.year_of_study) over active students
+with graded credits. Ranks use competition ranking (ties share a rank, the
+next rank skips), and percentile is the share of the cohort ranked at or
+below the student. StudentRank rows are rebuilt a cohort at a time in bulk;
+a single CGPA change only shifts the ranks between the old and new value.
+A student's rank and the cohort's top N are plain indexed lookups.
+"""
+from collections import defaultdict
+
+import numpy as np
+from django.db import transaction
+from django.db.models import DecimalField, F, Value
+from django.db.models.functions import Round
+from django.utils import timezone
+
+from .models import Student, StudentRank
+
+UPDATE_FIELDS = ['department', 'year_of_study', 'cgpa', 'rank', 'cohort_size', 'percentile', 'updated_at']
+
+
+def rank_cgpas(cgpas):
+    """
+    Competition ranks and percentiles for an array of CGPAs.
+    Values are compared in hundredths so equal CGPAs always tie.
+    """
+    points = np.rint(np.asarray(cgpas, dtype=float) * 100).astype(np.int64)
+    size = len(points)
+    if not size:
+        return np.empty(0, dtype=np.int64), np.empty(0)
+
+    # rank = 1 + number of students with a strictly higher CGPA
+    ordered = np.sort(points)
+    higher = size - np.searchsorted(ordered, points, side='right')
+    ranks = higher + 1
+    percentiles = np.round((size - ranks + 1) * 100.0 / size, 2)
+    return ranks, percentiles
+
+
+def _eligible_students():
+    return Student.objects.filter(
+        is_active_student=True,
+        total_credit_hours__gt=0,
+        user__is_active=True,
+    )
+
+
+def _build_ranks(rows):
+    """rows: list of (student_pk, department, year_of_study, cgpa) for one cohort"""
+    ranks, percentiles = rank_cgpas([row[3] for row in rows])
+    now = timezone.now()
+    return [
+        StudentRank(
+            student_id=pk,
+            department=department,
+            year_of_study=year_of_study,
+            cgpa=cgpa,
+            rank=int(rank),
+            cohort_size=len(rows),
+            percentile=f"{percentile:.2f}",
+            updated_at=now,
+        )
+        for (pk, department, year_of_study, cgpa), rank, percentile in zip(rows, ranks, percentiles)
+    ]
+
+
+def _save_ranks(ranks, batch_size=1000):
+    StudentRank.objects.bulk_create(
+        ranks,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['student'],
+        update_fields=UPDATE_FIELDS,
+    )
+
+
+def refresh_cohort(department, year_of_study):
+    """Recompute the ranks of one cohort; returns the cohort size"""
+    rows = list(
+        _eligible_students().filter(
+            user__department=department,
+            year_of_study=year_of_study
+        ).values_list('pk', 'user__department', 'year_of_study', 'cgpa')
+    )
+    with transaction.atomic():
+        StudentRank.objects.filter(department=department, year_of_study=year_of_study).exclude(
+            student__in=_eligible_students().filter(user__department=department, year_of_study=year_of_study)
+        ).delete()
+        _save_ranks(_build_ranks(rows))
+    return len(rows)
+
+
+def refresh_cohorts_for_students(student_ids):
+    """Recompute every cohort one of the given students belongs or belonged to"""
+    student_ids = list(student_ids)
+    cohorts = set()
+    for start in range(0, len(student_ids), 1000):
+        chunk = student_ids[start:start + 1000]
+        cohorts |= set(
+            Student.objects.filter(pk__in=chunk).values_list('user__department', 'year_of_study')
+        )
+        cohorts |= set(
+            StudentRank.objects.filter(student_id__in=chunk).values_list('department', 'year_of_study')
+        )
+    for department, year_of_study in cohorts:
+        refresh_cohort(department, year_of_study)
+    return len(cohorts)
+
+
+def update_student_rank(student_id):
+    """
+    Move one student to their new CGPA position. Only the cohort members
+    between the old and new CGPA change rank, so this costs a handful of
+    queries however large the cohort is.
+    """
+    current = _eligible_students().filter(pk=student_id).values_list(
+        'user__department', 'year_of_study', 'cgpa'
+    ).first()
+    entry = StudentRank.objects.filter(student_id=student_id).first()
+
+    if current is None or entry is None or (entry.department, entry.year_of_study) != tuple(current[:2]):
+        # Cohort membership changed, so every percentile in it moves
+        return refresh_cohorts_for_students([student_id])
+
+    old_cgpa, new_cgpa = entry.cgpa, current[2]
+    if old_cgpa == new_cgpa:
+        return 0
+
+    # rank = 1 + number of students with a higher CGPA, so students with a
+    # CGPA in [low, high) gain or lose exactly one student above them
+    low, high, delta = (old_cgpa, new_cgpa, 1) if new_cgpa > old_cgpa else (new_cgpa, old_cgpa, -1)
+    size = entry.cohort_size
+
+    with transaction.atomic():
+        cohort = StudentRank.objects.filter(
+            department=entry.department,
+            year_of_study=entry.year_of_study
+        ).exclude(student_id=student_id)
+
+        cohort.filter(cgpa__gte=low, cgpa__lt=high).update(
+            rank=F('rank') + delta,
+            percentile=Round(
+                (F('cohort_size') - F('rank') - delta + 1) * Value(100.0) / F('cohort_size'),
+                2,
+                output_field=DecimalField(max_digits=5, decimal_places=2)
+            ),
+            updated_at=timezone.now()
+        )
+
+        rank = cohort.filter(cgpa__gt=new_cgpa).count() + 1
+        StudentRank.objects.filter(pk=entry.pk).update(
+            cgpa=new_cgpa,
+            rank=rank,
+            percentile=f"{(size - rank + 1) * 100.0 / size:.2f}",
+            updated_at=timezone.now()
+        )
+    return 1
+
+
+def refresh_all(batch_size=1000):
+    """Recompute all cohorts from one query; returns (students ranked, cohorts)"""
+    cohorts = defaultdict(list)
+    for row in _eligible_students().values_list('pk', 'user__department', 'year_of_study', 'cgpa').iterator():
+        cohorts[(row[1], row[2])].append(row)
+
+    ranks = []
+    for rows in cohorts.values():
+        ranks.extend(_build_ranks(rows))
+
+    with transaction.atomic():
+        StudentRank.objects.exclude(student__in=_eligible_students()).delete()
+        _save_ranks(ranks, batch_size)
+    return len(ranks), len(cohorts)
+
+
+def leaderboard(department, year_of_study, limit=10):
+    return StudentRank.objects.filter(
+        department=department,
+        year_of_study=year_of_study
+    ).select_related('student__user').order_by('rank', 'student_id')[:limit]
@@ -1,3 +1,741 @@
-from django.test import TestCase
+import datetime
+import os
+import shutil
+import tempfile
+import threading
+from decimal import Decimal
+from io import BytesIO, StringIO
 
-# Create your tests here.
+import numpy as np
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from . import id_allocator
+from .attendance import record_roll_call
+from .gpa import recompute_all
+from .importers import AcademicRecordImporter, StudentImporter, iter_spreadsheet_rows
+from .matching import matches_for_student, similarity_to, suggest_groups, top_matches
+from .models import (
+    Student, StudentAcademicRecord, StudentAttendance, StudentAttendanceSummary, StudentIdSequence, StudentRank,
+    StudentTermSummary
+)
+
+# A past year, so IDs given to test users on creation don't interfere
+YEAR = 2019
+
+
+@override_settings(STUDENT_ID_BLOCK_SIZE=5)
+class StudentIdAllocatorTests(TestCase):
+    def setUp(self):
+        id_allocator.reset()
+        self.addCleanup(id_allocator.reset)
+
+    def allocate(self, count=1):
+        with self.captureOnCommitCallbacks(execute=True):
+            return id_allocator.allocate(count, year=YEAR)
+
+    def test_ids_come_from_the_reserved_block(self):
+        first = self.allocate()
+        self.assertEqual(first, ['MGSA190001'])
+        self.assertEqual(StudentIdSequence.objects.get(year=YEAR).next_value, 6)
+
+        # The rest of the block is handed out from memory
+        with self.assertNumQueries(0):
+            rest = id_allocator.allocate(4, year=YEAR)
+        self.assertEqual(rest, ['MGSA190002', 'MGSA190003', 'MGSA190004', 'MGSA190005'])
+
+    def test_exhausted_block_reserves_the_next_one(self):
+        self.allocate(4)
+        ids = self.allocate(3)
+
+        self.assertEqual(ids, ['MGSA190005', 'MGSA190006', 'MGSA190007'])
+        self.assertEqual(StudentIdSequence.objects.get(year=YEAR).next_value, 11)
+
+    def test_large_request_reserves_everything_at_once(self):
+        ids = self.allocate(12)
+
+        self.assertEqual(len(set(ids)), 12)
+        self.assertEqual(ids[-1], 'MGSA190012')
+        self.assertEqual(StudentIdSequence.objects.get(year=YEAR).next_value, 13)
+
+    def test_numbers_grow_past_four_digits(self):
+        StudentIdSequence.objects.create(year=YEAR, next_value=9999)
+
+        self.assertEqual(self.allocate(2), ['MGSA199999', 'MGSA1910000'])
+
+    def test_first_allocation_starts_after_existing_ids(self):
+        user = User.objects.create_user(
+            email='old@example.com', password='secret-pass-123',
+            first_name='Old', last_name='Student', gender='Male', role='Student'
+        )
+        Student.objects.filter(user=user).update(student_id='MGSA190417')
+
+        self.assertEqual(self.allocate(), ['MGSA190418'])
+
+    def test_rolled_back_reservation_is_not_reused_from_memory(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    id_allocator.allocate(1, year=YEAR)
+                    raise RuntimeError
+            except RuntimeError:
+                pass
+
+        self.assertEqual(id_allocator._blocks, {})
+        self.assertEqual(self.allocate(), ['MGSA190001'])
+
+
+@override_settings(STUDENT_ID_BLOCK_SIZE=7)
+class StudentIdAllocatorConcurrencyTests(TransactionTestCase):
+    def setUp(self):
+        id_allocator.reset()
+        self.addCleanup(id_allocator.reset)
+
+    def test_concurrent_allocations_are_unique(self):
+        results = []
+        errors = []
+
+        def worker():
+            try:
+                for _ in range(20):
+                    results.extend(id_allocator.allocate(1, year=YEAR))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(results), 160)
+        self.assertEqual(len(set(results)), 160)
+        self.assertGreaterEqual(StudentIdSequence.objects.get(year=YEAR).next_value, 161)
+
+
+class IncrementalGpaTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email='gpa@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student'
+        )
+        self.student = Student.objects.get(user=user)
+
+    def add_record(self, course_code, credit_hours, grade_points, semester='1st', academic_year='2024', **extra):
+        return StudentAcademicRecord.objects.create(
+            student=self.student,
+            course_code=course_code,
+            course_name=course_code,
+            credit_hours=credit_hours,
+            grade='X',
+            grade_points=Decimal(grade_points),
+            semester=semester,
+            academic_year=academic_year,
+            **extra
+        )
+
+    def assertGpa(self, gpa, cgpa, status='regular'):
+        student = Student.objects.get(pk=self.student.pk)
+        self.assertEqual(student.gpa, Decimal(gpa))
+        self.assertEqual(student.cgpa, Decimal(cgpa))
+        self.assertEqual(student.academic_status, status)
+
+    def test_records_update_term_and_cumulative_gpa(self):
+        self.add_record('MATH101', 3, '4.00')
+        self.add_record('PHYS101', 4, '3.00')
+        self.add_record('CHEM102', 3, '2.00', semester='2nd')
+
+        # Latest term 6/3, cumulative (12 + 12 + 6) / 10
+        self.assertGpa('2.00', '3.00')
+        first_term = StudentTermSummary.objects.get(student=self.student, semester='1st')
+        self.assertEqual(first_term.gpa, Decimal('3.43'))
+
+    def test_edited_record_applies_only_the_difference(self):
+        self.add_record('MATH101', 3, '4.00')
+        record = self.add_record('CHEM102', 3, '2.00', semester='2nd')
+
+        record.grade_points = Decimal('3.00')
+        record.save()
+        self.assertGpa('3.00', '3.50')
+
+        record.semester = '1st'
+        record.save()
+        self.assertGpa('3.50', '3.50')
+        self.assertFalse(StudentTermSummary.objects.filter(student=self.student, semester='2nd').exists())
+
+    def test_deleted_record_is_removed_from_the_sums(self):
+        self.add_record('MATH101', 3, '4.00')
+        record = self.add_record('PHYS101', 4, '1.00')
+        self.assertGpa('2.29', '2.29')
+
+        record.delete()
+        self.assertGpa('4.00', '4.00')
+
+        StudentAcademicRecord.objects.filter(student=self.student).get().delete()
+        self.assertGpa('0.00', '0.00')
+        self.assertFalse(StudentTermSummary.objects.filter(student=self.student).exists())
+
+    def test_transfer_credits_do_not_count(self):
+        self.add_record('MATH101', 3, '3.00')
+        self.add_record('TRAN100', 5, '1.00', is_transfer_credit=True)
+
+        self.assertGpa('3.00', '3.00')
+        self.assertEqual(Student.objects.get(pk=self.student.pk).total_credit_hours, 3)
+
+    def test_low_cgpa_sets_academic_status(self):
+        record = self.add_record('MATH101', 3, '1.50')
+        self.assertGpa('1.50', '1.50', status='probation')
+
+        record.grade_points = Decimal('1.90')
+        record.save()
+        self.assertGpa('1.90', '1.90', status='warning')
+
+    def test_recompute_matches_incremental_values(self):
+        self.add_record('MATH101', 3, '4.00')
+        self.add_record('PHYS101', 4, '2.50')
+        self.add_record('CHEM102', 3, '3.00', semester='2nd')
+        expected = Student.objects.values('gpa', 'cgpa', 'total_quality_points', 'total_credit_hours').get(
+            pk=self.student.pk
+        )
+
+        Student.objects.filter(pk=self.student.pk).update(gpa=0, cgpa=0, total_quality_points=0, total_credit_hours=0)
+        recompute_all()
+
+        self.assertEqual(
+            Student.objects.values('gpa', 'cgpa', 'total_quality_points', 'total_credit_hours').get(pk=self.student.pk),
+            expected
+        )
+
+
+class LeaderboardTests(TestCase):
+    def setUp(self):
+        self.students = [
+            self.add_student('abdi@example.com', 'Abdi', 'Computer Science', '3.50'),
+            self.add_student('chaltu@example.com', 'Chaltu', 'Computer Science', '3.80'),
+            self.add_student('hawi@example.com', 'Hawi', 'Medicine', '3.20'),
+        ]
+
+    def add_student(self, email, first_name, department, grade_points):
+        user = User.objects.create_user(
+            email=email, password='secret-pass-123',
+            first_name=first_name, last_name='Test', gender='Female', role='Student',
+            department=department
+        )
+        student = Student.objects.get(user=user)
+        Student.objects.filter(pk=student.pk).update(year_of_study='2nd')
+        StudentAcademicRecord.objects.create(
+            student=student, course_code='MATH101', course_name='Calculus', credit_hours=3,
+            grade='X', grade_points=Decimal(grade_points), semester='1st', academic_year='2024'
+        )
+        return Student.objects.get(pk=student.pk)
+
+    def get_leaderboard(self, user, **params):
+        self.client.force_login(user)
+        return self.client.get('/api/student/leaderboard/', params, secure=True)
+
+    def test_student_sees_own_cohort_without_student_ids(self):
+        response = self.get_leaderboard(self.students[0].user)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['department'], 'Computer Science')
+        self.assertEqual(
+            [entry['name'] for entry in response.data['leaderboard']],
+            [self.students[1].user.get_full_name(), self.students[0].user.get_full_name()]
+        )
+        self.assertNotIn('student_id', response.data['leaderboard'][0])
+
+    def test_student_cannot_pick_another_cohort(self):
+        response = self.get_leaderboard(self.students[0].user, department='Medicine')
+        self.assertEqual(response.status_code, 403)
+
+        response = self.get_leaderboard(self.students[0].user, year_of_study='1st')
+        self.assertEqual(response.status_code, 403)
+
+    def test_executive_can_pick_any_cohort(self):
+        executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        response = self.get_leaderboard(executive, department='Medicine', year_of_study='2nd')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [entry['name'] for entry in response.data['leaderboard']], [self.students[2].user.get_full_name()]
+        )
+
+    def test_department_change_moves_the_rank(self):
+        user = User.objects.get(pk=self.students[2].user_id)
+        user.department = 'Computer Science'
+        user.save()
+
+        rank = StudentRank.objects.get(student=self.students[2])
+        self.assertEqual((rank.department, rank.rank, rank.cohort_size), ('Computer Science', 3, 3))
+        self.assertEqual(StudentRank.objects.get(student=self.students[1]).cohort_size, 3)
+        self.assertFalse(StudentRank.objects.filter(department='Medicine').exists())
+
+    def test_year_change_moves_the_rank(self):
+        student = Student.objects.get(pk=self.students[1].pk)
+        student.year_of_study = '3rd'
+        student.save()
+
+        rank = StudentRank.objects.get(student=student)
+        self.assertEqual((rank.year_of_study, rank.rank, rank.cohort_size), ('3rd', 1, 1))
+        rank = StudentRank.objects.get(student=self.students[0])
+        self.assertEqual((rank.rank, rank.cohort_size), (1, 1))
+
+
+class StudyMatchTests(TestCase):
+    def setUp(self):
+        self.abdi = self.add_student('abdi', ['Algorithms', 'Chess'], ['Python'], ['Mon 18:00'])
+        self.chaltu = self.add_student('chaltu', ['algorithms', ' chess '], ['python'], ['mon 18:00'])
+        self.hawi = self.add_student('hawi', ['Algorithms', 'Football'], ['Java'], ['Mon 18:00'])
+        self.lensa = self.add_student('lensa', ['Poetry'], ['Drawing'], ['Sat 09:00'])
+        self.other = self.add_student('other', ['Algorithms', 'Chess'], ['Python'], ['Mon 18:00'], 'Medicine')
+
+    def add_student(self, name, interests, skills, availability, department='Computer Science'):
+        user = User.objects.create_user(
+            email=f'{name}@example.com', password='secret-pass-123',
+            first_name=name.title(), last_name='Test', gender='Female', role='Student',
+            department=department
+        )
+        student = Student.objects.get(user=user)
+        student.interests = interests
+        student.skills = skills
+        student.availability = availability
+        student.save()
+        return student
+
+    def test_matches_are_ranked_by_similarity(self):
+        matches = matches_for_student(self.abdi)
+
+        self.assertEqual([pk for pk, _ in matches], [self.chaltu.pk, self.hawi.pk])
+        # Same tokens after normalising case and whitespace
+        self.assertEqual(matches[0][1], 1.0)
+        self.assertTrue(0 < matches[1][1] < 1)
+
+    def test_matches_stay_in_the_department(self):
+        pks = [pk for pk, _ in matches_for_student(self.abdi, limit=10)]
+
+        self.assertNotIn(self.other.pk, pks)
+        self.assertNotIn(self.abdi.pk, pks)
+        # No shared tokens, no match
+        self.assertNotIn(self.lensa.pk, pks)
+
+    def test_profile_change_refreshes_the_vector(self):
+        self.lensa.interests = ['Algorithms', 'Chess']
+        self.lensa.skills = ['Python']
+        self.lensa.availability = ['Mon 18:00']
+        self.lensa.save()
+
+        self.assertEqual(matches_for_student(self.abdi)[:2], [(self.chaltu.pk, 1.0), (self.lensa.pk, 1.0)])
+
+    def test_groups_pair_the_closest_students(self):
+        groups = suggest_groups('Computer Science', group_size=2)
+
+        self.assertEqual(sorted(groups[0]['students']), sorted([self.abdi.pk, self.chaltu.pk]))
+        self.assertEqual(groups[0]['score'], 1.0)
+
+    def test_top_matches_agree_with_pairwise_similarity(self):
+        bits = np.random.default_rng(7).integers(0, 2, size=(30, 512), dtype=np.uint8)
+        indices, scores = top_matches(bits, k=3, block_size=8)
+
+        for row in range(len(bits)):
+            similarity = similarity_to(bits[row], bits)
+            similarity[row] = -1
+            np.testing.assert_allclose(scores[row], np.sort(similarity)[::-1][:3], rtol=1e-5)
+            np.testing.assert_allclose(similarity[indices[row]], scores[row], rtol=1e-5)
+
+
+STUDENT_COLUMNS = ['email', 'first_name', 'last_name', 'gender', 'zone', 'woreda', 'college', 'department', 'year_of_study', 'student_id']
+
+
+def student_row(number, **values):
+    row = {
+        'email': f'student{number}@example.com', 'first_name': 'Abdi', 'last_name': f'Kedir{number}',
+        'gender': 'Male', 'zone': 'West Hararghe', 'woreda': 'Chiro', 'college': 'Engineering',
+        'department': 'Civil', 'year_of_study': '2nd Year', 'student_id': '',
+    }
+    row.update(values)
+    return row
+
+
+def student_csv(rows):
+    lines = [','.join(STUDENT_COLUMNS)]
+    lines += [','.join(row[column] for column in STUDENT_COLUMNS) for row in rows]
+    return '\n'.join(lines).encode()
+
+
+class StudentImporterTests(TestCase):
+    def run_import(self, rows, **options):
+        importer = StudentImporter(workers=1, **options)
+        return importer.run(enumerate(rows, start=2))
+
+    def errors_by_row(self, summary):
+        return {error['row']: error['errors'] for error in summary['errors']}
+
+    def test_rows_are_written_in_chunks_with_one_student_id(self):
+        rows = [student_row(number) for number in range(5)]
+        rows[1]['student_id'] = 'UGR/1001/15'
+
+        summary = self.run_import(rows, chunk_size=2)
+
+        self.assertEqual((summary['created'], summary['rejected']), (5, 0))
+        for user in User.objects.filter(email__startswith='student').select_related('student_profile'):
+            self.assertTrue(user.student_id)
+            self.assertEqual(user.student_profile.student_id, user.student_id)
+        self.assertEqual(User.objects.get(email='student1@example.com').student_profile.student_id, 'UGR/1001/15')
+
+    def test_invalid_rows_are_reported(self):
+        summary = self.run_import([
+            student_row(0, email='not-an-email'),
+            student_row(1, first_name=''),
+            student_row(2, zone='Nowhere'),
+            student_row(3, student_id='MGSA260001'),
+            student_row(4),
+        ])
+
+        errors = self.errors_by_row(summary)
+        self.assertEqual((summary['created'], summary['rejected']), (1, 4))
+        self.assertEqual(errors[2], ['Invalid email: not-an-email'])
+        self.assertEqual(errors[3], ['first_name is required'])
+        self.assertEqual(errors[4], ['Invalid zone: Nowhere'])
+        self.assertIn('reserved', errors[5][0])
+
+    def test_duplicates_in_file_and_database_are_rejected(self):
+        existing = User.objects.create_user(
+            email='taken@example.com', password='secret-pass-123',
+            first_name='Old', last_name='Student', gender='Male', role='Student'
+        )
+        Student.objects.filter(user=existing).update(student_id='UGR/0001/15')
+
+        summary = self.run_import([
+            student_row(0, student_id='UGR/2000/15'),
+            student_row(1, email='STUDENT0@example.com'),
+            student_row(2, student_id='UGR/2000/15'),
+            student_row(3, email='taken@example.com'),
+            student_row(4, student_id='UGR/0001/15'),
+        ])
+
+        errors = self.errors_by_row(summary)
+        self.assertEqual(summary['created'], 1)
+        self.assertEqual(errors[3], ['Duplicate email in file (row 2)'])
+        self.assertEqual(errors[4], ['Duplicate student_id in file (row 2)'])
+        self.assertEqual(errors[5], ['A user with this email already exists'])
+        self.assertEqual(errors[6], ['A user with this student_id already exists'])
+
+    def test_dry_run_writes_nothing(self):
+        summary = self.run_import([student_row(0), student_row(1)], dry_run=True)
+
+        self.assertEqual((summary['valid'], summary['created']), (2, 0))
+        self.assertFalse(User.objects.filter(email__startswith='student').exists())
+
+    def test_command_imports_a_csv_file(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        path = os.path.join(directory, 'students.csv')
+        with open(path, 'wb') as f:
+            f.write(student_csv([student_row(0), student_row(1, gender='Other')]))
+
+        output = StringIO()
+        call_command('import_students', path, '--workers', '1', '--report', os.path.join(directory, 'errors.csv'), stdout=output)
+
+        self.assertIn('Created 1 students, rejected 1 rows', output.getvalue())
+        with open(os.path.join(directory, 'errors.csv')) as f:
+            self.assertIn('Invalid gender: Other', f.read())
+
+    def test_admin_upload_imports_students(self):
+        admin = User.objects.create_user(
+            email='admin@example.com', password='secret-pass-123',
+            first_name='Admin', last_name='Test', gender='Female', role='Admin'
+        )
+        self.client.force_login(admin)
+        upload = SimpleUploadedFile('students.csv', student_csv([student_row(0), student_row(1)]), content_type='text/csv')
+
+        response = self.client.post('/api/analytics/admin/users/import/', {'file': upload}, secure=True)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['summary']['created'], 2)
+        self.assertEqual(User.objects.filter(email__startswith='student', role='Student').count(), 2)
+
+    def test_only_admins_can_upload(self):
+        student = User.objects.create_user(
+            email='plain@example.com', password='secret-pass-123',
+            first_name='Plain', last_name='Student', gender='Male', role='Student'
+        )
+        self.client.force_login(student)
+        upload = SimpleUploadedFile('students.csv', student_csv([student_row(0)]), content_type='text/csv')
+
+        response = self.client.post('/api/analytics/admin/users/import/', {'file': upload}, secure=True)
+
+        self.assertEqual(response.status_code, 403)
+
+
+GRADE_SHEET = """student_id,course_code,course_name,credit_hours,grade,semester,academic_year
+{id},MATH101,Calculus,3,A,1st,2024
+{id},PHYS101,Physics,4,B,1st,2024
+{id},CHEM102,Chemistry,3,C,2nd,2024
+"""
+
+
+class AcademicRecordImporterTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user(
+            email='grades@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student'
+        )
+        self.student = Student.objects.get(user=user)
+
+    def run_import(self, sheet=None, **options):
+        sheet = sheet or GRADE_SHEET.format(id=self.student.student_id)
+        importer = AcademicRecordImporter(**options)
+        return importer.run(iter_spreadsheet_rows(BytesIO(sheet.encode()), 'grades.csv'))
+
+    def counts(self, summary):
+        return summary['inserted'], summary['updated'], summary['unchanged'], summary['rejected']
+
+    def gpa(self):
+        return Student.objects.values_list('gpa', 'cgpa').get(pk=self.student.pk)
+
+    def test_import_inserts_records_and_refreshes_gpa(self):
+        summary = self.run_import()
+
+        self.assertEqual(self.counts(summary), (3, 0, 0, 0))
+        self.assertEqual(StudentAcademicRecord.objects.filter(student=self.student).count(), 3)
+        # Latest term 6/3, cumulative (12 + 12 + 6) / 10
+        self.assertEqual(self.gpa(), (Decimal('2.00'), Decimal('3.00')))
+
+    def test_reimporting_the_same_file_changes_nothing(self):
+        self.run_import()
+        first = list(StudentAcademicRecord.objects.order_by('pk').values_list('pk', 'grade_points', 'updated_at'))
+
+        summary = self.run_import(chunk_size=1)
+
+        self.assertEqual(self.counts(summary), (0, 0, 3, 0))
+        self.assertEqual(
+            list(StudentAcademicRecord.objects.order_by('pk').values_list('pk', 'grade_points', 'updated_at')), first
+        )
+        self.assertEqual(self.gpa(), (Decimal('2.00'), Decimal('3.00')))
+
+    def test_changed_rows_are_updated_and_gpa_refreshed(self):
+        self.run_import()
+        sheet = GRADE_SHEET.format(id=self.student.student_id).replace('CHEM102,Chemistry,3,C', 'CHEM102,Chemistry,3,A')
+
+        summary = self.run_import(sheet, chunk_size=2)
+
+        self.assertEqual(self.counts(summary), (0, 1, 2, 0))
+        self.assertEqual(StudentAcademicRecord.objects.get(course_code='CHEM102').grade_points, Decimal('4.00'))
+        self.assertEqual(self.gpa(), (Decimal('4.00'), Decimal('3.60')))
+
+    def test_registrar_ids_are_accepted(self):
+        User.objects.filter(pk=self.student.user_id).update(student_id='UGR/1001/15')
+
+        summary = self.run_import(GRADE_SHEET.format(id='UGR/1001/15'))
+
+        self.assertEqual(summary['inserted'], 3)
+
+    def test_invalid_and_duplicate_rows_are_rejected(self):
+        student_id = self.student.student_id
+        sheet = GRADE_SHEET.format(id=student_id) + (
+            f"{student_id},MATH101,Calculus again,3,B,1st,2024\n"
+            "NOBODY,MATH101,Calculus,3,A,1st,2024\n"
+            f"{student_id},BIO101,Biology,0,A,1st,2024\n"
+            f"{student_id},ART101,Art,2,Z,1st,2024\n"
+        )
+
+        summary = self.run_import(sheet)
+
+        errors = {error['row']: error['errors'] for error in summary['errors']}
+        self.assertEqual(self.counts(summary), (3, 0, 0, 4))
+        self.assertEqual(errors[5], ['Duplicate record in file (row 2)'])
+        self.assertEqual(errors[6], ['Unknown student_id: NOBODY'])
+        self.assertEqual(errors[7], ['Invalid credit_hours: 0'])
+        self.assertEqual(errors[8], ['Invalid grade_points for grade Z: '])
+
+    def test_dry_run_counts_without_writing(self):
+        summary = self.run_import(dry_run=True)
+
+        self.assertEqual(self.counts(summary), (3, 0, 0, 0))
+        self.assertFalse(StudentAcademicRecord.objects.exists())
+        self.assertEqual(self.gpa(), (Decimal('0.00'), Decimal('0.00')))
+
+
+class SyncStudentsTests(TestCase):
+    YEARS = ['2nd Year', 'Graduate', '', 'Year 9']
+
+    def add_students(self, count, start=0):
+        return [
+            User.objects.create_user(
+                email=f'sync{number}@example.com', password='secret-pass-123',
+                first_name='Abdi', last_name='Kedir' if number % 2 else '', gender='Male', role='Student',
+                year_of_study=self.YEARS[number % len(self.YEARS)]
+            )
+            for number in range(start, start + count)
+        ]
+
+    def profiles(self):
+        return {
+            student.user_id: (student.year_of_study, student.profile_completion_percentage, student.is_active_student)
+            for student in Student.objects.all()
+        }
+
+    def sync(self, *args):
+        out = StringIO()
+        call_command('sync_students', *args, stdout=out)
+        return out.getvalue()
+
+    def test_sync_creates_the_profiles_the_per_user_path_creates(self):
+        self.add_students(8)
+        # Profiles made one user at a time when the users were created
+        expected = self.profiles()
+        Student.objects.all().delete()
+
+        output = self.sync()
+
+        self.assertIn('Successfully synced 8 new Student profiles', output)
+        self.assertEqual(self.profiles(), expected)
+        student_ids = list(Student.objects.values_list('student_id', flat=True))
+        self.assertEqual(len(set(student_ids)), 8)
+        self.assertTrue(all(id_allocator.is_allocated_format(student_id) for student_id in student_ids))
+
+    def test_sync_leaves_existing_profiles_and_other_roles_alone(self):
+        kept = self.add_students(2)
+        Student.objects.filter(user=kept[0]).update(year_of_study='4th Year')
+        missing = self.add_students(1, start=2)[0]
+        Student.objects.filter(user=missing).delete()
+        User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+
+        self.assertIn('[dry run] Successfully synced 0', self.sync('--dry-run'))
+        self.assertFalse(Student.objects.filter(user=missing).exists())
+
+        self.sync()
+
+        self.assertEqual(Student.objects.count(), 3)
+        self.assertEqual(Student.objects.get(user=kept[0]).year_of_study, '4th Year')
+        self.assertEqual(Student.objects.get(user=missing).year_of_study, 'Fresh')
+
+    def test_query_count_does_not_grow_with_missing_profiles(self):
+        queries = []
+        for start, count in [(0, 3), (3, 30)]:
+            users = self.add_students(count, start=start)
+            Student.objects.filter(user__in=users).delete()
+            with CaptureQueriesContext(connection) as context:
+                self.sync()
+            queries.append(len(context.captured_queries))
+
+        self.assertEqual(Student.objects.count(), 33)
+        self.assertEqual(queries[0], queries[1])
+
+    def test_repair_orphans(self):
+        users = self.add_students(2)
+        User.objects.filter(pk=users[0].pk).update(role='Executive')
+        Student.objects.filter(user=users[1]).update(student_id='')
+
+        output = self.sync('--repair-orphans')
+
+        self.assertIn('Orphaned profiles deactivated: 1', output)
+        self.assertIn('Missing student IDs filled: 1', output)
+        self.assertFalse(Student.objects.get(user=users[0]).is_active_student)
+        self.assertTrue(Student.objects.get(user=users[1]).student_id)
+
+
+class RollCallTests(TestCase):
+    EVENT = {
+        'event_type': 'tutorial',
+        'event_title': 'Calculus revision',
+        'event_date': datetime.datetime(2026, 2, 2, 10, tzinfo=datetime.timezone.utc),
+        'duration_minutes': 90,
+    }
+
+    def setUp(self):
+        self.students = [
+            Student.objects.get(user=User.objects.create_user(
+                email=f'roll{number}@example.com', password='secret-pass-123',
+                first_name='Student', last_name=str(number), gender='Female', role='Student'
+            ))
+            for number in range(3)
+        ]
+
+    def summaries(self):
+        return {
+            summary.student_id: (summary.sessions_recorded, summary.sessions_present, summary.minutes_present)
+            for summary in StudentAttendanceSummary.objects.all()
+        }
+
+    def roll_call(self, presence, **event):
+        entries = [(self.students[number].student_id, present) for number, present in presence]
+        return record_roll_call({**self.EVENT, **event}, entries)
+
+    def test_roll_call_records_rows_and_summaries(self):
+        User.objects.filter(pk=self.students[2].user_id).update(student_id='UGR/1001/15')
+
+        result = record_roll_call(self.EVENT, [
+            (self.students[0].student_id, 'present'),
+            (self.students[1].student_id, 0),
+            ('UGR/1001/15', True),
+            ('NOBODY', True),
+        ])
+
+        self.assertEqual(
+            (result['recorded'], result['updated'], result['present'], result['absent']), (3, 0, 2, 1)
+        )
+        self.assertEqual(result['unknown_student_ids'], ['NOBODY'])
+        self.assertEqual(self.summaries(), {
+            self.students[0].pk: (1, 1, 90),
+            self.students[1].pk: (1, 0, 0),
+            self.students[2].pk: (1, 1, 90),
+        })
+
+    def test_resubmitting_a_roll_call_upserts(self):
+        self.roll_call([(0, True), (1, False)])
+
+        result = self.roll_call([(0, True), (1, True), (2, False)])
+
+        self.assertEqual((result['recorded'], result['updated'], result['unchanged']), (1, 1, 1))
+        self.assertEqual(StudentAttendance.objects.count(), 3)
+        self.assertEqual(self.summaries(), {
+            self.students[0].pk: (1, 1, 90),
+            self.students[1].pk: (1, 1, 90),
+            self.students[2].pk: (1, 0, 0),
+        })
+
+        self.roll_call([(0, False), (1, True)], duration_minutes=60)
+
+        self.assertEqual(self.summaries()[self.students[0].pk], (1, 0, 0))
+        self.assertEqual(self.summaries()[self.students[1].pk], (1, 1, 60))
+
+    def test_summaries_match_a_recount_after_roll_calls_and_edits(self):
+        self.roll_call([(0, True), (1, False), (2, True)])
+        self.roll_call([(0, False), (1, True)], event_title='Physics lab')
+        row = StudentAttendance.objects.get(student=self.students[2])
+        row.present = False
+        row.save()
+        StudentAttendance.objects.get(student=self.students[0], event_title='Physics lab').delete()
+
+        expected = {}
+        for row in StudentAttendance.objects.all():
+            recorded, present, minutes = expected.get(row.student_id, (0, 0, 0))
+            expected[row.student_id] = (
+                recorded + 1, present + row.present, minutes + row.present * row.duration_minutes
+            )
+        self.assertEqual(self.summaries(), expected)
+
+    def test_one_row_per_student_and_event(self):
+        self.roll_call([(0, True)])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            StudentAttendance.objects.create(student=self.students[0], **self.EVENT)
+
+    def test_entries_must_be_a_list(self):
+        with self.assertRaises(TypeError):
+            record_roll_call(self.EVENT, self.students[0].student_id)
@@ -0,0 +1,209 @@
+# students/transcripts.py
+"""
+Transcript PDFs built with reportlab.
+
+A transcript is rendered from a plain payload (student details, records and
+GPA figures) and stored in the shared 'transcripts' file cache under a hash
+of that payload, so a student whose records haven't changed gets the stored
+PDF back, whichever process rendered it. Batch generation renders
+cache misses in a process pool and streams them into one ZIP file.
+"""
+import hashlib
+import io
+import json
+import os
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape
+
+import django
+from django.core.cache import caches
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+from .gpa import term_sort_key
+from .models import StudentAcademicRecord
+
+CACHE_TIMEOUT = 60 * 60 * 24 * 30  # thirty days
+
+
+def build_payloads(students):
+    """Plain, picklable transcript payloads for a list of students (one records query)"""
+    records_by_student = defaultdict(list)
+    records = StudentAcademicRecord.objects.filter(student__in=students).values(
+        'student_id', 'course_code', 'course_name', 'credit_hours', 'grade',
+        'grade_points', 'semester', 'academic_year', 'is_transfer_credit'
+    )
+    for record in records:
+        records_by_student[record['student_id']].append(record)
+
+    payloads = []
+    for student in students:
+        terms = defaultdict(list)
+        for record in records_by_student[student.pk]:
+            terms[(record['academic_year'], record['semester'])].append([
+                record['course_code'],
+                record['course_name'],
+                record['credit_hours'],
+                record['grade'],
+                str(record['grade_points']),
+                record['is_transfer_credit'],
+            ])
+
+        payloads.append({
+            'student_pk': student.pk,
+            'student_id': student.student_id or '',
+            'name': student.user.get_full_name(),
+            'college': student.user.college,
+            'department': student.user.department,
+            'year_of_study': student.year_of_study,
+            'academic_status': student.get_academic_status_display(),
+            'cgpa': str(student.cgpa),
+            'total_credit_hours': student.total_credit_hours,
+            'terms': [
+                {
+                    'academic_year': academic_year,
+                    'semester': semester,
+                    'courses': sorted(courses),
+                }
+                for (academic_year, semester), courses in sorted(
+                    terms.items(), key=lambda item: term_sort_key(*item[0])
+                )
+            ],
+        })
+    return payloads
+
+
+def payload_hash(payload):
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def cache_key(payload):
+    return f"transcript:{payload['student_pk']}:{payload_hash(payload)}"
+
+
+def transcript_filename(payload):
+    return f"transcript_{payload['student_id'] or payload['student_pk']}.pdf"
+
+
+def render_transcript_pdf(payload):
+    """Render a transcript payload to PDF bytes, safe to call in a worker process"""
+    buffer = io.BytesIO()
+    # invariant keeps the output identical for identical payloads
+    doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=1, title=f"Transcript - {payload['name']}")
+    styles = getSampleStyleSheet()
+    elements = [
+        Paragraph("MGSA Academic Transcript", styles['Title']),
+        Paragraph(f"<b>Name:</b> {escape(payload['name'])}", styles['Normal']),
+        Paragraph(f"<b>Student ID:</b> {escape(payload['student_id'])}", styles['Normal']),
+        Paragraph(
+            f"<b>College:</b> {escape(payload['college'])} | <b>Department:</b> {escape(payload['department'])}",
+            styles['Normal']
+        ),
+        Paragraph(f"<b>Year of Study:</b> {payload['year_of_study']} | <b>Status:</b> {payload['academic_status']}", styles['Normal']),
+        Spacer(1, 12),
+    ]
+
+    for term in payload['terms']:
+        elements.append(Paragraph(f"{term['academic_year']} - {term['semester']} Semester", styles['Heading3']))
+
+        table_data = [['Code', 'Course', 'Credits', 'Grade', 'Points']]
+        for code, name, credits, grade, points, is_transfer in term['courses']:
+            table_data.append([code, name, credits, grade + (' (T)' if is_transfer else ''), points])
+
+        table = Table(table_data, colWidths=[60, 220, 50, 60, 50])
+        table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.black)
+        ]))
+        elements.append(table)
+        elements.append(Spacer(1, 8))
+
+    if not payload['terms']:
+        elements.append(Paragraph("No academic records on file.", styles['Normal']))
+
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph(
+        f"<b>Total Credit Hours:</b> {payload['total_credit_hours']} | <b>CGPA:</b> {payload['cgpa']}",
+        styles['Normal']
+    ))
+    elements.append(Paragraph("(T) Transfer credit, not included in CGPA", styles['Italic']))
+
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def get_transcript_pdf(student):
+    """Transcript PDF bytes for one student, from the cache when records are unchanged"""
+    payload = build_payloads([student])[0]
+    key = cache_key(payload)
+
+    cache = caches['transcripts']
+    pdf = cache.get(key)
+    if pdf is None:
+        pdf = render_transcript_pdf(payload)
+        cache.set(key, pdf, CACHE_TIMEOUT)
+    return transcript_filename(payload), pdf
+
+
+def write_transcripts_zip(students, output, workers=None, batch_size=200):
+    """
+    Write transcripts for ``students`` (a queryset) into a ZIP file object.
+    Cached PDFs are reused; the rest are rendered across a process pool.
+    Returns (written, rendered) counts.
+    """
+    workers = workers or os.cpu_count() or 1
+    students = students.select_related('user').order_by('pk')
+    written = rendered = 0
+
+    executor = ProcessPoolExecutor(max_workers=workers, initializer=django.setup) if workers > 1 else None
+    try:
+        with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+            batch = []
+            for student in students.iterator(chunk_size=batch_size):
+                batch.append(student)
+                if len(batch) >= batch_size:
+                    counts = _write_batch(archive, batch, executor)
+                    written, rendered = written + counts[0], rendered + counts[1]
+                    batch = []
+            if batch:
+                counts = _write_batch(archive, batch, executor)
+                written, rendered = written + counts[0], rendered + counts[1]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    return written, rendered
+
+
+def _write_batch(archive, students, executor):
+    payloads = build_payloads(students)
+    keys = [cache_key(payload) for payload in payloads]
+    cache = caches['transcripts']
+    cached = cache.get_many(keys)
+
+    missing = [payload for payload, key in zip(payloads, keys) if key not in cached]
+    if executor is not None:
+        pdfs = executor.map(render_transcript_pdf, missing, chunksize=max(1, len(missing) // 16))
+    else:
+        pdfs = map(render_transcript_pdf, missing)
+
+    fresh = {}
+    for payload, pdf in zip(missing, pdfs):
+        fresh[cache_key(payload)] = pdf
+        archive.writestr(transcript_filename(payload), pdf)
+    cache.set_many(fresh, CACHE_TIMEOUT)
+
+    for payload, key in zip(payloads, keys):
+        if key in cached:
+            archive.writestr(transcript_filename(payload), cached[key])
+
+    return len(payloads), len(missing)
@@ -17,6 +17,15 @@ urlpatterns = [
     
     # Tutorials
     path('tutorials/', views.StudentTutorialList.as_view(), name='student-tutorials'),
+    path('tutorials/recommended/', views.student_recommended_tutorials, name='student-recommended-tutorials'),
     path('tutorials/registrations/', views.StudentTutorialRegistrationList.as_view(), name='student-tutorial-registrations'),
     path('tutorials/registrations/<int:registration_id>/cancel/', views.student_cancel_registration, name='student-cancel-registration'),
+    path('timetable/', views.student_timetable, name='student-timetable'),
+    
+    # Academic
+    path('transcript/', views.student_transcript, name='student-transcript'),
+    path('rank/', views.student_rank, name='student-rank'),
+    path('leaderboard/', views.student_leaderboard, name='student-leaderboard'),
+    path('attendance/', views.student_attendance_summary, name='student-attendance-summary'),
+    path('study-matches/', views.student_study_matches, name='student-study-matches'),
 ]
\ No newline at end of file
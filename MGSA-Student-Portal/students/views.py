@@ -1,16 +1,27 @@
 from rest_framework import status, generics, permissions
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
-from django.db.models import Count, Q
+from django.db.models import Count, prefetch_related_objects
+from django.http import HttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 
 from accounts.models import User
+from analytics.tags import TagFilterBackend
 from posts.models import Post, Like, Comment
-from resources.models import Resource
+from posts.timelines import feed_page, visible_posts
+from resources.models import Resource, ResourceDownload
+from resources.recommendations import recommended_resources, record_download
 from tutorials.models import Tutorial, TutorialRegistration
 from posts.serializers import PostSerializer, CommentSerializer
 from resources.serializers import ResourceSerializer
-from tutorials.serializers import TutorialSerializer, TutorialRegistrationSerializer
+from tutorials.recommendations import recommend_tutorials
+from tutorials.schedule import weekly_timetable
+from tutorials.services import transition_registration
+from tutorials.serializers import TutorialSerializer, TutorialRegistrationSerializer, TutorialRegistrationCreateSerializer
+from .matching import matches_for_student, shared_tokens
+from .models import Student, StudentRank, StudentAttendanceSummary
+from .rankings import leaderboard
+from .transcripts import get_transcript_pdf
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -33,9 +44,9 @@ def student_dashboard(request):
     }
     
     # Recent posts (from user's department or general)
-    recent_posts = Post.objects.filter(is_public=True).select_related(
-        'author'
-    ).prefetch_related('likes', 'comments').order_by('-created_at')[:10]
+    entries, _ = feed_page(request.user, page_size=10)
+    recent_posts = [entry.post for entry in entries]
+    prefetch_related_objects(recent_posts, 'likes', 'comments')
     
     posts_data = []
     for post in recent_posts:
@@ -53,13 +64,9 @@ def student_dashboard(request):
             'media_count': len(post.media) if hasattr(post, 'media') else 0
         })
     
-    # Recommended resources (from student's department)
-    recommended_resources = Resource.objects.filter(
-        Q(is_public=True) | Q(uploaded_by__department=request.user.department)
-    ).select_related('uploaded_by').order_by('-download_count', '-created_at')[:8]
-    
+    # Recommended resources, precomputed per department
     resources_data = []
-    for resource in recommended_resources:
+    for resource in recommended_resources(request.user, limit=8):
         resources_data.append({
             'id': resource.id,
             'title': resource.title,
@@ -71,30 +78,9 @@ def student_dashboard(request):
             'created_at': resource.created_at
         })
     
-    # Available tutorials (for student's department)
-    available_tutorials = Tutorial.objects.filter(
-        is_active=True,
-        department=request.user.department
-    ).annotate(
-        available_slots=Count('max_students') - Count('registrations')
-    ).order_by('-created_at')[:6]
-    
-    tutorials_data = []
-    for tutorial in available_tutorials:
-        tutorials_data.append({
-            'id': tutorial.id,
-            'title': tutorial.title,
-            'description': tutorial.description,
-            'tutor': tutorial.tutor,
-            'topics': tutorial.topics,
-            'schedule': tutorial.schedule,
-            'max_students': tutorial.max_students,
-            'current_registrations': tutorial.current_registrations,
-            'available_slots': tutorial.max_students - tutorial.current_registrations,
-            'is_full': tutorial.current_registrations >= tutorial.max_students,
-            'start_date': tutorial.start_date,
-            'end_date': tutorial.end_date
-        })
+    # Recommended tutorials, ranked against the student's profile
+    student = Student.objects.filter(user=request.user).first()
+    tutorials_data = recommend_tutorials(request.user, student, limit=6)
     
     # Student's tutorial registrations
     student_registrations = TutorialRegistration.objects.filter(
@@ -115,8 +101,8 @@ def student_dashboard(request):
     # Student's activity stats
     student_stats = {
         'posts_liked': Like.objects.filter(user=request.user).count(),
-        'comments_made': Comment.objects.filter(author=request.user).count(),
-        'resources_downloaded': 0,  # You might want to track this
+        'comments_made': Comment.objects.filter(user=request.user).count(),
+        'resources_downloaded': ResourceDownload.objects.filter(user=request.user).count(),
         'tutorials_registered': TutorialRegistration.objects.filter(student=request.user).count()
     }
     
@@ -133,15 +119,15 @@ def student_dashboard(request):
     })
 
 class StudentPostList(generics.ListAPIView):
-    """Students can view all public posts"""
+    """Students can view the public posts aimed at them"""
     serializer_class = PostSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
-    filterset_fields = ['author', 'tags']
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
+    filterset_fields = ['author']
     
     def get_queryset(self):
         if self.request.user.role == 'Student':
-            return Post.objects.filter(is_public=True).select_related(
+            return visible_posts(self.request.user).select_related(
                 'author'
             ).prefetch_related('likes', 'comments').order_by('-created_at')
         return Post.objects.none()
@@ -153,7 +139,7 @@ class StudentPostDetail(generics.RetrieveAPIView):
     
     def get_queryset(self):
         if self.request.user.role == 'Student':
-            return Post.objects.filter(is_public=True)
+            return visible_posts(self.request.user)
         return Post.objects.none()
 
 @api_view(['POST'])
@@ -240,7 +226,7 @@ class StudentResourceList(generics.ListAPIView):
     """Students can view all public resources"""
     serializer_class = ResourceSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend]
+    filter_backends = [DjangoFilterBackend, TagFilterBackend]
     filterset_fields = ['category', 'file_type', 'uploaded_by']
     
     def get_queryset(self):
@@ -260,8 +246,7 @@ def student_download_resource(request, resource_id):
     
     try:
         resource = Resource.objects.get(id=resource_id, is_public=True)
-        resource.download_count += 1
-        resource.save()
+        record_download(resource, request.user)
         
         return Response({
             'success': True,
@@ -298,6 +283,8 @@ class StudentTutorialRegistrationList(generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
+        if self.request.method == 'POST':
+            return TutorialRegistrationCreateSerializer
         return TutorialRegistrationSerializer
     
     def get_queryset(self):
@@ -306,28 +293,12 @@ class StudentTutorialRegistrationList(generics.ListCreateAPIView):
         return TutorialRegistration.objects.none()
     
     def perform_create(self, serializer):
-        if self.request.user.role == 'Student':
-            tutorial = serializer.validated_data['tutorial']
-            
-            # Check if tutorial is active
-            if not tutorial.is_active:
-                raise permissions.PermissionDenied("This tutorial is not active")
-            
-            # Check if tutorial is full
-            if tutorial.current_registrations >= tutorial.max_students:
-                raise permissions.PermissionDenied("This tutorial is full")
-            
-            # Check if already registered
-            if TutorialRegistration.objects.filter(student=self.request.user, tutorial=tutorial).exists():
-                raise permissions.PermissionDenied("You are already registered for this tutorial")
-            
-            # Increment registration count
-            tutorial.current_registrations += 1
-            tutorial.save()
-            
-            serializer.save(student=self.request.user)
-        else:
+        if self.request.user.role != 'Student':
             raise permissions.PermissionDenied("Only students can register for tutorials")
+        
+        # The serializer checks active, full, duplicate and clashing
+        # tutorials and increments the registration count
+        serializer.save()
 
 @api_view(['POST'])
 @permission_classes([permissions.IsAuthenticated])
@@ -346,13 +317,8 @@ def student_cancel_registration(request, registration_id):
             status='registered'
         )
         
-        # Decrement tutorial registration count
-        tutorial = registration.tutorial
-        tutorial.current_registrations = max(0, tutorial.current_registrations - 1)
-        tutorial.save()
-        
-        registration.status = 'cancelled'
-        registration.save()
+        # Frees the seat and updates the tutorial's counters
+        transition_registration(registration, 'cancelled')
         
         return Response({
             'success': True,
@@ -364,3 +330,206 @@ def student_cancel_registration(request, registration_id):
             'success': False,
             'message': 'Registration not found or cannot be cancelled'
         }, status=status.HTTP_404_NOT_FOUND)
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_transcript(request):
+    """Download the logged-in student's transcript as PDF"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        student = Student.objects.select_related('user').get(user=request.user)
+    except Student.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Student profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    filename, pdf = get_transcript_pdf(student)
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+def serialize_leaderboard(ranks):
+    return [{
+        'rank': entry.rank,
+        'name': entry.student.user.get_full_name(),
+        'cgpa': entry.cgpa,
+        'percentile': entry.percentile
+    } for entry in ranks]
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_rank(request):
+    """CGPA rank and percentile of the logged-in student within department and year"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        rank = StudentRank.objects.get(student__user=request.user)
+    except StudentRank.DoesNotExist:
+        return Response({
+            'success': True,
+            'rank': None,
+            'message': 'No rank yet. Ranks are available once graded credits are recorded.'
+        })
+    
+    try:
+        limit = min(max(int(request.GET.get('top', 10)), 0), 50)
+    except ValueError:
+        limit = 10
+    
+    return Response({
+        'success': True,
+        'rank': {
+            'department': rank.department,
+            'year_of_study': rank.year_of_study,
+            'cgpa': rank.cgpa,
+            'rank': rank.rank,
+            'cohort_size': rank.cohort_size,
+            'percentile': rank.percentile,
+            'updated_at': rank.updated_at
+        },
+        'top': serialize_leaderboard(leaderboard(rank.department, rank.year_of_study, limit))
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_leaderboard(request):
+    """
+    Top students by CGPA for a department and year. Students see their own
+    cohort; executives and admins can pick any with ?department=&year_of_study=
+    """
+    if request.user.role in ['Executive', 'Admin']:
+        department = request.GET.get('department', request.user.department)
+        year_of_study = request.GET.get('year_of_study', request.user.year_of_study)
+    else:
+        year_of_study = Student.objects.filter(user=request.user).values_list('year_of_study', flat=True).first()
+        if year_of_study is None:
+            return Response({
+                'success': False,
+                'message': 'Access denied. Student access only.'
+            }, status=status.HTTP_403_FORBIDDEN)
+        department = request.user.department
+        if request.GET.get('department', department) != department or \
+                request.GET.get('year_of_study', year_of_study) != year_of_study:
+            return Response({
+                'success': False,
+                'message': 'Access denied. Students can only view their own department and year.'
+            }, status=status.HTTP_403_FORBIDDEN)
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 100)
+    except ValueError:
+        limit = 10
+    
+    return Response({
+        'success': True,
+        'department': department,
+        'year_of_study': year_of_study,
+        'leaderboard': serialize_leaderboard(leaderboard(department, year_of_study, limit))
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_attendance_summary(request):
+    """Attendance totals and rate of the logged-in student"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    summary = StudentAttendanceSummary.objects.filter(student__user=request.user).first()
+    
+    return Response({
+        'success': True,
+        'attendance': {
+            'sessions_recorded': summary.sessions_recorded if summary else 0,
+            'sessions_present': summary.sessions_present if summary else 0,
+            'hours_present': round(summary.minutes_present / 60, 1) if summary else 0,
+            'attendance_rate': summary.attendance_rate if summary else 0
+        }
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_study_matches(request):
+    """Students in the same department with the most similar interests, skills and availability"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        student = Student.objects.select_related('user').get(user=request.user)
+    except Student.DoesNotExist:
+        return Response({
+            'success': False,
+            'message': 'Student profile not found'
+        }, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    same_year = request.GET.get('same_year', '').lower() in ['1', 'true', 'yes']
+    
+    matches = matches_for_student(student, limit=limit, same_year=same_year)
+    others = Student.objects.select_related('user').in_bulk([pk for pk, _ in matches])
+    
+    return Response({
+        'success': True,
+        'matches': [{
+            'name': others[pk].user.get_full_name(),
+            'student_id': others[pk].student_id,
+            'year_of_study': others[pk].year_of_study,
+            'similarity': score,
+            'shared': shared_tokens([student, others[pk]])
+        } for pk, score in matches if pk in others]
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_recommended_tutorials(request):
+    """Open tutorials ranked by department, interests, availability and free seats"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    try:
+        limit = min(max(int(request.GET.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
+    
+    student = Student.objects.filter(user=request.user).first()
+    return Response({
+        'success': True,
+        'tutorials': recommend_tutorials(request.user, student, limit=limit)
+    })
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def student_timetable(request):
+    """Weekly timetable of the logged-in student's tutorial registrations"""
+    if request.user.role != 'Student':
+        return Response({
+            'success': False,
+            'message': 'Access denied. Student access only.'
+        }, status=status.HTTP_403_FORBIDDEN)
+    
+    timetable = weekly_timetable(request.user)
+    return Response({
+        'success': True,
+        'timetable': timetable,
+        'has_clashes': any(session['clashes_with'] for day in timetable for session in day['sessions'])
+    })
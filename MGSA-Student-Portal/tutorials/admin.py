@@ -2,6 +2,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import Tutorial, TutorialRegistration
+from .services import transition_registrations
 
 @admin.register(Tutorial)
 class TutorialAdmin(admin.ModelAdmin):
@@ -36,6 +37,8 @@ class TutorialAdmin(admin.ModelAdmin):
     
     readonly_fields = [
         'current_registrations',
+        'attended_count',
+        'cancelled_count',
         'created_at',
         'updated_at',
         'registrations_count'
@@ -63,6 +66,8 @@ class TutorialAdmin(admin.ModelAdmin):
             'fields': (
                 'max_students',
                 'current_registrations',
+                'attended_count',
+                'cancelled_count',
                 'registrations_count'
             )
         }),
@@ -88,7 +93,7 @@ class TutorialAdmin(admin.ModelAdmin):
     current_registrations_display.short_description = 'Registrations'
     
     def registrations_count(self, obj):
-        return obj.registrations.count()
+        return obj.current_registrations + obj.cancelled_count
     registrations_count.short_description = 'Total Registrations (All Status)'
     
     def save_model(self, request, obj, form, change):
@@ -97,7 +102,7 @@ class TutorialAdmin(admin.ModelAdmin):
         super().save_model(request, obj, form, change)
     
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('registrations')
+        return super().get_queryset(request).select_related('created_by')
 
 @admin.register(TutorialRegistration)
 class TutorialRegistrationAdmin(admin.ModelAdmin):
@@ -170,11 +175,13 @@ class TutorialRegistrationAdmin(admin.ModelAdmin):
 
 # Optional: Custom admin actions
 def mark_registrations_attended(modeladmin, request, queryset):
-    queryset.update(status='attended')
+    result = transition_registrations(queryset, 'attended')
+    modeladmin.message_user(request, f"{result['updated']} marked as attended, {result['skipped']} skipped")
 mark_registrations_attended.short_description = "Mark selected registrations as attended"
 
 def mark_registrations_cancelled(modeladmin, request, queryset):
-    queryset.update(status='cancelled')
+    result = transition_registrations(queryset, 'cancelled')
+    modeladmin.message_user(request, f"{result['updated']} cancelled, {result['skipped']} skipped")
 mark_registrations_cancelled.short_description = "Mark selected registrations as cancelled"
 
 # Add actions to TutorialRegistrationAdmin
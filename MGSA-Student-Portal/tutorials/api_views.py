@@ -5,6 +5,7 @@ from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
 from .models import Tutorial, TutorialRegistration
+from .services import RegistrationError, ScheduleClash, register_student
 
 @require_http_methods(["GET"])
 def api_get_tutorials(request):
@@ -53,39 +54,21 @@ def api_register_tutorial(request):
         
         tutorial = Tutorial.objects.get(id=tutorial_id, is_active=True)
         
-        if tutorial.is_full():
+        # Creates or re-activates the registration and takes a seat, with
+        # capacity and timetable clashes checked under the tutorial's lock
+        try:
+            register_student(request.user, tutorial, allow_clash=data.get('allow_clash') is True)
+        except ScheduleClash as e:
             return JsonResponse({
                 'success': False,
-                'message': 'This tutorial is already full'
+                'message': str(e),
+                'clashes': e.clashes
+            }, status=400)
+        except RegistrationError as e:
+            return JsonResponse({
+                'success': False,
+                'message': str(e)
             }, status=400)
-        
-        # Check if already registered
-        existing_registration = TutorialRegistration.objects.filter(
-            student=request.user, 
-            tutorial=tutorial
-        ).first()
-        
-        if existing_registration:
-            if existing_registration.status == 'registered':
-                return JsonResponse({
-                    'success': False,
-                    'message': 'You are already registered for this tutorial'
-                }, status=400)
-            elif existing_registration.status == 'cancelled':
-                # Re-activate cancelled registration
-                existing_registration.status = 'registered'
-                existing_registration.save()
-        else:
-            # Create new registration
-            TutorialRegistration.objects.create(
-                student=request.user,
-                tutorial=tutorial,
-                status='registered'
-            )
-        
-        # Update tutorial registration count
-        tutorial.current_registrations += 1
-        tutorial.save()
         
         return JsonResponse({
             'success': True,
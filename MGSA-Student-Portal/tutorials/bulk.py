@@ -0,0 +1,222 @@
+# tutorials/bulk.py
+"""
+Bulk tutorial setup for the start of a semester.
+
+Rows come from a JSON list, a CSV/XLSX upload or a copy of an earlier
+semester's tutorials with the dates shifted. Every row is validated in one
+pass (dates, capacity, schedule format, duplicates within the batch and
+against existing tutorials) and the valid ones are inserted with one
+bulk_create in a single transaction. bulk_create skips post_save, so the
+work the Tutorial receivers would do is repeated here for the whole batch.
+"""
+import datetime
+
+from django.db import transaction
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date
+
+from .models import Tutorial
+from .schedule import parse_days, parse_time_range, rebuild_slots
+
+REQUIRED_FIELDS = ['title', 'tutor', 'department', 'start_date', 'end_date', 'days', 'time', 'max_students']
+
+# Longest run a single tutorial may have
+MAX_TUTORIAL_DAYS = 366
+
+
+def _as_list(value):
+    """JSON lists pass through; spreadsheet cells are split on ';' or ','"""
+    if isinstance(value, (list, tuple)):
+        return [str(item).strip() for item in value if str(item).strip()]
+    text = str(value or '')
+    separator = ';' if ';' in text else ','
+    return [item.strip() for item in text.split(separator) if item.strip()]
+
+
+def _as_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    text = str(value or '').strip()
+    # XLSX dates arrive as '2026-02-02 00:00:00'
+    text = text.split(' ')[0].split('T')[0]
+    try:
+        return parse_date(text)
+    except ValueError:
+        return None
+
+
+def _as_bool(value, default=True):
+    if value in (None, ''):
+        return default
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ['1', 'true', 'yes', 'y']
+
+
+def validate_tutorial_row(row):
+    """(cleaned values, errors) for one tutorial row"""
+    errors = {}
+    for field in REQUIRED_FIELDS:
+        if row.get(field) in (None, '', []):
+            errors[field] = 'This field is required.'
+
+    cleaned = {
+        'title': str(row.get('title') or '').strip(),
+        'description': str(row.get('description') or '').strip(),
+        'tutor': str(row.get('tutor') or '').strip(),
+        'department': str(row.get('department') or '').strip(),
+        'topics': _as_list(row.get('topics')),
+        'days': _as_list(row.get('days')),
+        'time': str(row.get('time') or '').strip(),
+        'is_active': _as_bool(row.get('is_active')),
+    }
+
+    for field, limit in [('title', 200), ('tutor', 100), ('department', 100), ('time', 50)]:
+        if len(cleaned[field]) > limit:
+            errors[field] = f'At most {limit} characters.'
+
+    start_date, end_date = _as_date(row.get('start_date')), _as_date(row.get('end_date'))
+    if row.get('start_date') and start_date is None:
+        errors['start_date'] = 'Use YYYY-MM-DD.'
+    if row.get('end_date') and end_date is None:
+        errors['end_date'] = 'Use YYYY-MM-DD.'
+    if start_date and end_date:
+        if end_date < start_date:
+            errors['end_date'] = 'Must be on or after start_date.'
+        elif (end_date - start_date).days > MAX_TUTORIAL_DAYS:
+            errors['end_date'] = f'A tutorial may run at most {MAX_TUTORIAL_DAYS} days.'
+    cleaned['start_date'], cleaned['end_date'] = start_date, end_date
+
+    if cleaned['days']:
+        unknown = [day for day in cleaned['days'] if not parse_days([day])]
+        if unknown:
+            errors['days'] = f"Unknown weekday: {', '.join(unknown)}"
+    if cleaned['time'] and parse_time_range(cleaned['time']) is None:
+        errors['time'] = "Use a range such as '14:00-16:00'."
+
+    try:
+        cleaned['max_students'] = int(str(row.get('max_students')).strip())
+        if cleaned['max_students'] <= 0:
+            errors['max_students'] = 'Must be at least 1.'
+    except (TypeError, ValueError):
+        errors.setdefault('max_students', 'Must be a whole number.')
+
+    return cleaned, errors
+
+
+def clone_rows(source_from, source_to, shift_days):
+    """Rows copying the tutorials that started between two dates, shifted by ``shift_days``"""
+    shift = datetime.timedelta(days=shift_days)
+    tutorials = Tutorial.objects.filter(
+        start_date__gte=source_from,
+        start_date__lte=source_to
+    ).order_by('start_date', 'pk')
+    return [
+        {
+            'title': tutorial.title,
+            'description': tutorial.description,
+            'tutor': tutorial.tutor,
+            'department': tutorial.department,
+            'topics': tutorial.topics,
+            'days': tutorial.days,
+            'time': tutorial.time,
+            'start_date': tutorial.start_date + shift,
+            'end_date': tutorial.end_date + shift,
+            'max_students': tutorial.max_students,
+            'is_active': True,
+            'cloned_from': tutorial.pk,
+        }
+        for tutorial in tutorials
+    ]
+
+
+def create_tutorials(rows, created_by, dry_run=False, skip_invalid=False):
+    """
+    Validate and insert tutorials. ``rows`` is an iterable of
+    (row_number, dict) pairs. Nothing is written if any row is invalid
+    unless ``skip_invalid`` is set. Returns a summary with per-row results.
+    """
+    results = []
+    valid = []
+    seen = {}
+    for row_number, row in rows:
+        if not isinstance(row, dict):
+            results.append({'row': row_number, 'title': '', 'status': 'invalid', 'errors': {'row': 'Expected an object.'}})
+            continue
+        cleaned, errors = validate_tutorial_row(row)
+        key = (cleaned['title'].lower(), cleaned['department'].lower(), cleaned['start_date'])
+        if not errors and key in seen:
+            errors['title'] = f'Duplicate of row {seen[key]}.'
+        seen.setdefault(key, row_number)
+
+        result = {'row': row_number, 'title': cleaned['title'], 'status': 'invalid' if errors else 'valid'}
+        if errors:
+            result['errors'] = errors
+        if row.get('cloned_from'):
+            result['cloned_from'] = row['cloned_from']
+        results.append(result)
+        if not errors:
+            valid.append((result, cleaned, key))
+
+    # Tutorials that already exist, found with one query
+    if valid:
+        existing = set(
+            (title.lower(), department.lower(), start_date)
+            for title, department, start_date in Tutorial.objects.annotate(title_key=Lower('title')).filter(
+                title_key__in={key[0] for _, _, key in valid},
+                start_date__in={key[2] for _, _, key in valid}
+            ).values_list('title', 'department', 'start_date')
+        )
+        for result, cleaned, key in valid:
+            if key in existing:
+                result['status'] = 'invalid'
+                result['errors'] = {'title': 'A tutorial with this title, department and start date already exists.'}
+        valid = [item for item in valid if item[0]['status'] == 'valid']
+
+    invalid_count = len(results) - len(valid)
+    summary = {
+        'total': len(results),
+        'valid': len(valid),
+        'invalid': invalid_count,
+        'created': 0,
+        'dry_run': dry_run,
+        'results': results,
+    }
+    if dry_run or not valid:
+        return summary
+    if invalid_count and not skip_invalid:
+        for result, _, _ in valid:
+            result['status'] = 'not_created'
+        return summary
+
+    tutorials = [Tutorial(created_by=created_by, current_registrations=0, **cleaned) for _, cleaned, _ in valid]
+    with transaction.atomic():
+        Tutorial.objects.bulk_create(tutorials, batch_size=500)
+        after_bulk_create(tutorials)
+
+    for (result, _, _), tutorial in zip(valid, tutorials):
+        result['status'] = 'created'
+        result['id'] = tutorial.pk
+    summary['created'] = len(tutorials)
+    return summary
+
+
+def after_bulk_create(tutorials):
+    """What the Tutorial post_save receivers do, for a batch"""
+    from analytics.models import ContentIndex
+    from .calendar import invalidate_feeds
+    from .recommendations import invalidate_candidates
+
+    rebuild_slots(tutorials)
+    ContentIndex.objects.bulk_create(
+        [
+            ContentIndex(content_type='tutorial', object_id=tutorial.pk, **ContentIndex.values_for('tutorial', tutorial))
+            for tutorial in tutorials
+        ],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    transaction.on_commit(invalidate_candidates)
+    transaction.on_commit(lambda: invalidate_feeds({tutorial.created_by_id for tutorial in tutorials}))
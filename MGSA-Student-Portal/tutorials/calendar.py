@@ -0,0 +1,220 @@
+# tutorials/calendar.py
+"""
+iCalendar subscription feeds.
+
+Students get their registered tutorials and executives their meetings plus
+the tutorials they run. Each tutorial is a single weekly RRULE event rather
+than one event per session. A feed is addressed by a secret token and the
+rendered body, with its ETag, is kept per user in the shared default cache
+until one of their registrations, tutorials or meetings changes, so a feed
+rendered or invalidated by one worker is seen by all of them. A poll that hits the cache
+costs no queries, and one with a matching If-None-Match gets a 304.
+Tutorial sessions are floating local times, meetings are UTC instants.
+"""
+import datetime
+import hashlib
+import secrets
+
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import CalendarFeedToken, Tutorial, TutorialRegistration
+from .schedule import parse_days, parse_time_range
+
+CACHE_TIMEOUT = 60 * 60 * 24
+PRODID = '-//MGSA Student Portal//Calendar//EN'
+ICAL_DAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def feed_cache_key(user_id):
+    return f"calendar:feed:{user_id}"
+
+
+def token_cache_key(token):
+    return f"calendar:token:{token}"
+
+
+def get_or_create_token(user):
+    feed_token, _ = CalendarFeedToken.objects.get_or_create(
+        user=user,
+        defaults={'token': secrets.token_urlsafe(32)}
+    )
+    return feed_token.token
+
+
+def rotate_token(user):
+    """Give ``user`` a new feed token; the old subscription URL stops working"""
+    old = CalendarFeedToken.objects.filter(user=user).values_list('token', flat=True).first()
+    token = secrets.token_urlsafe(32)
+    CalendarFeedToken.objects.update_or_create(user=user, defaults={'token': token})
+    if old:
+        cache.delete(token_cache_key(old))
+    return token
+
+
+def user_for_token(token):
+    """User id behind a feed token, cached; None for unknown tokens"""
+    key = token_cache_key(token)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = CalendarFeedToken.objects.filter(
+            token=token, user__is_active=True
+        ).values_list('user_id', flat=True).first()
+        if user_id is None:
+            return None
+        cache.set(key, user_id, CACHE_TIMEOUT)
+    return user_id
+
+
+def forget_tokens(user_ids):
+    """Drop the cached lookups of the users' tokens, e.g. once they are deactivated"""
+    tokens = CalendarFeedToken.objects.filter(user_id__in=user_ids).values_list('token', flat=True)
+    cache.delete_many([token_cache_key(token) for token in tokens])
+
+
+def invalidate_feeds(user_ids):
+    cache.delete_many([feed_cache_key(user_id) for user_id in set(user_ids) if user_id])
+
+
+def escape_text(value):
+    return (
+        str(value or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n')
+    )
+
+
+def fold(line):
+    """Split a content line into 75-octet pieces as RFC 5545 requires"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line
+    pieces = []
+    while encoded:
+        size = 75 if not pieces else 74
+        # Don't split a multi-byte character
+        while size < len(encoded) and (encoded[size] & 0xC0) == 0x80:
+            size -= 1
+        pieces.append(encoded[:size].decode('utf-8'))
+        encoded = encoded[size:]
+    return '\r\n '.join(pieces)
+
+
+def format_utc(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def format_local(value):
+    return value.strftime('%Y%m%dT%H%M%S')
+
+
+def tutorial_event(tutorial):
+    """VEVENT lines for a tutorial, recurring weekly on its days"""
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:tutorial-{tutorial.pk}@mgsa',
+        f'DTSTAMP:{format_utc(tutorial.updated_at)}',
+        f'SUMMARY:{escape_text(tutorial.title)}',
+        f'DESCRIPTION:{escape_text(f"Tutor: {tutorial.tutor}. {tutorial.description}".strip())}',
+        f'CATEGORIES:{escape_text(tutorial.department)}',
+    ]
+
+    weekdays = parse_days(tutorial.days)
+    time_range = parse_time_range(tutorial.time)
+    if weekdays and time_range:
+        # The first session is the first listed weekday on or after start_date
+        first = min(
+            tutorial.start_date + datetime.timedelta(days=(weekday - tutorial.start_date.weekday()) % 7)
+            for weekday in weekdays
+        )
+        # Tutorial times are campus wall-clock times, so they are written as
+        # floating local times (no TZID, no Z) that calendar apps show as-is;
+        # a floating DTSTART needs a floating UNTIL too
+        day_start = datetime.datetime.combine(first, datetime.time())
+        until = datetime.datetime.combine(tutorial.end_date, datetime.time(23, 59, 59))
+        lines += [
+            f'DTSTART:{format_local(day_start + datetime.timedelta(minutes=time_range[0]))}',
+            f'DTEND:{format_local(day_start + datetime.timedelta(minutes=time_range[1]))}',
+            f'RRULE:FREQ=WEEKLY;BYDAY={",".join(ICAL_DAYS[weekday] for weekday in weekdays)};UNTIL={format_local(until)}',
+        ]
+    else:
+        # No usable schedule: show the tutorial's whole run as an all-day span
+        lines += [
+            f'DTSTART;VALUE=DATE:{tutorial.start_date.strftime("%Y%m%d")}',
+            f'DTEND;VALUE=DATE:{(tutorial.end_date + datetime.timedelta(days=1)).strftime("%Y%m%d")}',
+        ]
+
+    lines.append('END:VEVENT')
+    return lines
+
+
+def meeting_event(meeting):
+    start = meeting.meeting_date
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:meeting-{meeting.pk}@mgsa',
+        f'DTSTAMP:{format_utc(meeting.updated_at)}',
+        f'DTSTART:{format_utc(start)}',
+        f'DTEND:{format_utc(start + datetime.timedelta(minutes=meeting.duration_minutes))}',
+        f'SUMMARY:{escape_text(meeting.title)}',
+        f'DESCRIPTION:{escape_text(meeting.description)}',
+        f'CATEGORIES:{escape_text(meeting.get_meeting_type_display())}',
+    ]
+    if meeting.location:
+        lines.append(f'LOCATION:{escape_text(meeting.location)}')
+    if meeting.virtual_link:
+        lines.append(f'URL:{meeting.virtual_link}')
+    if meeting.is_cancelled:
+        lines.append('STATUS:CANCELLED')
+    lines.append('END:VEVENT')
+    return lines
+
+
+def feed_events(user):
+    """Tutorials and meetings that belong in ``user``'s feed"""
+    from executive.models import ExecutiveMeeting, MeetingAttendance
+
+    registered = TutorialRegistration.objects.filter(student=user, status='registered').values('tutorial_id')
+    tutorials = Tutorial.objects.filter(is_active=True).filter(
+        Q(pk__in=registered) | Q(created_by=user)
+    ).order_by('start_date', 'pk')
+
+    meetings = ExecutiveMeeting.objects.none()
+    if user.role in ['Executive', 'Admin']:
+        attending = MeetingAttendance.objects.filter(executive__user=user).exclude(
+            rsvp_status='declined'
+        ).values('meeting_id')
+        meetings = ExecutiveMeeting.objects.filter(
+            Q(organized_by__user=user) | Q(pk__in=attending)
+        ).order_by('meeting_date', 'pk')
+    return tutorials, meetings
+
+
+def render_feed(user):
+    tutorials, meetings = feed_events(user)
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape_text(f"MGSA - {user.get_full_name()}")}',
+    ]
+    for tutorial in tutorials:
+        lines += tutorial_event(tutorial)
+    for meeting in meetings:
+        lines += meeting_event(meeting)
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(fold(line) for line in lines) + '\r\n'
+
+
+def get_feed(user_id):
+    """(etag, body) of a user's feed, rendered on a cache miss"""
+    from accounts.models import User
+
+    key = feed_cache_key(user_id)
+    feed = cache.get(key)
+    if feed is None:
+        body = render_feed(User.objects.get(pk=user_id))
+        feed = (f'"{hashlib.sha1(body.encode()).hexdigest()}"', body)
+        cache.set(key, feed, CACHE_TIMEOUT)
+    return feed
@@ -0,0 +1,31 @@
+# tutorials/counters.py
+from django.db.models import Count, OuterRef, Q, Subquery
+
+from analytics.counters import register
+
+from .models import Tutorial
+
+
+def _after_registrations_repaired(tutorial_ids):
+    from analytics.models import ContentIndex
+
+    ContentIndex.objects.filter(content_type='tutorial', object_id__in=tutorial_ids).update(
+        registration_count=Subquery(
+            Tutorial.objects.filter(pk=OuterRef('object_id')).values('current_registrations')[:1]
+        )
+    )
+
+
+register(
+    'tutorial.current_registrations', Tutorial, 'current_registrations',
+    Count('registrations', filter=Q(registrations__status__in=['registered', 'attended'])),
+    on_repair=_after_registrations_repaired
+)
+register(
+    'tutorial.attended_count', Tutorial, 'attended_count',
+    Count('registrations', filter=Q(registrations__status='attended'))
+)
+register(
+    'tutorial.cancelled_count', Tutorial, 'cancelled_count',
+    Count('registrations', filter=Q(registrations__status='cancelled'))
+)
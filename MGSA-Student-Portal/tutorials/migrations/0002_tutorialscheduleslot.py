@@ -0,0 +1,106 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:32
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Copies of the tutorials.schedule parsers as they were when this migration
+# was written, so later changes to that module don't change the backfill
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+TIME_RE = re.compile(r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?', re.IGNORECASE)
+RANGE_RE = re.compile(r'^\s*(.+?)\s*(?:-|–|to)\s*(.+?)\s*$', re.IGNORECASE)
+
+
+def parse_weekday(value):
+    name = str(value).strip().lower().rstrip('.')
+    if len(name) < 3:
+        return None
+    for number, weekday in enumerate(WEEKDAYS):
+        if weekday.startswith(name) or name == weekday + 's':
+            return number
+    return None
+
+
+def parse_days(days):
+    numbers = {parse_weekday(day) for day in days or []}
+    numbers.discard(None)
+    return sorted(numbers)
+
+
+def parse_clock(value, meridiem_hint=None):
+    match = TIME_RE.fullmatch(value.strip())
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3) or meridiem_hint
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def parse_time_range(value):
+    match = RANGE_RE.match(value or '')
+    if not match:
+        return None
+    end_match = TIME_RE.fullmatch(match.group(2))
+    end = parse_clock(match.group(2))
+    start = parse_clock(match.group(1), meridiem_hint=end_match.group(3) if end_match else None)
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+
+def build_schedule_slots(apps, schema_editor):
+    Tutorial = apps.get_model('tutorials', 'Tutorial')
+    TutorialScheduleSlot = apps.get_model('tutorials', 'TutorialScheduleSlot')
+
+    slots = []
+    for tutorial in Tutorial.objects.only('id', 'days', 'time', 'start_date', 'end_date').iterator():
+        time_range = parse_time_range(tutorial.time)
+        if time_range is None:
+            continue
+        slots.extend(
+            TutorialScheduleSlot(
+                tutorial_id=tutorial.id,
+                weekday=weekday,
+                start_minute=time_range[0],
+                end_minute=time_range[1],
+                start_date=tutorial.start_date,
+                end_date=tutorial.end_date
+            )
+            for weekday in parse_days(tutorial.days)
+        )
+    TutorialScheduleSlot.objects.bulk_create(slots, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TutorialScheduleSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField()),
+                ('start_minute', models.PositiveSmallIntegerField()),
+                ('end_minute', models.PositiveSmallIntegerField()),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('tutorial', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='schedule_slots', to='tutorials.tutorial')),
+            ],
+            options={
+                'ordering': ['weekday', 'start_minute'],
+                'indexes': [models.Index(fields=['weekday', 'start_minute', 'end_minute'], name='tutorials_t_weekday_817872_idx')],
+            },
+        ),
+        migrations.RunPython(build_schedule_slots, migrations.RunPython.noop),
+    ]
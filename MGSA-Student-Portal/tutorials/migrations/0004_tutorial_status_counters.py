@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-19 13:36
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def count_registration_statuses(apps, schema_editor):
+    Tutorial = apps.get_model('tutorials', 'Tutorial')
+    TutorialRegistration = apps.get_model('tutorials', 'TutorialRegistration')
+
+    totals = TutorialRegistration.objects.order_by().values('tutorial_id').annotate(
+        attended=Count('id', filter=Q(status='attended')),
+        cancelled=Count('id', filter=Q(status='cancelled')),
+    )
+    tutorials = [
+        Tutorial(pk=row['tutorial_id'], attended_count=row['attended'], cancelled_count=row['cancelled'])
+        for row in totals
+    ]
+    Tutorial.objects.bulk_update(tutorials, ['attended_count', 'cancelled_count'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tutorials', '0003_calendarfeedtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tutorial',
+            name='attended_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='tutorial',
+            name='cancelled_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(count_registration_statuses, migrations.RunPython.noop),
+    ]
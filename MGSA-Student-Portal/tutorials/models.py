@@ -1,7 +1,12 @@
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
 
-class Tutorial(models.Model):
+from accounts.tracking import TrackedFieldsMixin
+
+class Tutorial(TrackedFieldsMixin, models.Model):
     title = models.CharField(max_length=200)
     description = models.TextField(blank=True)
     tutor = models.CharField(max_length=100)
@@ -17,12 +22,26 @@ class Tutorial(models.Model):
     max_students = models.PositiveIntegerField()
     current_registrations = models.PositiveIntegerField(default=0)
     
+    # Registration status counters, maintained by tutorials.services
+    attended_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='created_tutorials')
     is_active = models.BooleanField(default=True)
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    # Any of these refreshes the cached recommendation candidates; schedule
+    # changes rebuild the schedule slots and feed_fields changes refresh
+    # the calendar feeds of registered students
+    tracked_fields = (
+        'days', 'time', 'start_date', 'end_date', 'title', 'description', 'tutor', 'is_active',
+        'department', 'topics', 'max_students'
+    )
+    schedule_fields = {'days', 'time', 'start_date', 'end_date'}
+    feed_fields = {'days', 'time', 'start_date', 'end_date', 'title', 'description', 'tutor', 'is_active', 'department'}
+    
     class Meta:
         ordering = ['-created_at']
     
@@ -49,4 +68,101 @@ class TutorialRegistration(models.Model):
         ordering = ['-registration_date']
     
     def __str__(self):
-        return f"{self.student.email} - {self.tutorial.title}"
\ No newline at end of file
+        return f"{self.student.email} - {self.tutorial.title}"
+
+
+class TutorialScheduleSlot(models.Model):
+    """One weekly session of a tutorial, parsed from days and time, see tutorials.schedule"""
+    tutorial = models.ForeignKey(Tutorial, on_delete=models.CASCADE, related_name='schedule_slots')
+    weekday = models.PositiveSmallIntegerField()  # 0 = Monday
+    start_minute = models.PositiveSmallIntegerField()
+    end_minute = models.PositiveSmallIntegerField()
+    
+    # Copied from the tutorial so clash queries filter dates on the slot itself
+    start_date = models.DateField()
+    end_date = models.DateField()
+    
+    class Meta:
+        ordering = ['weekday', 'start_minute']
+        indexes = [
+            models.Index(fields=['weekday', 'start_minute', 'end_minute']),
+        ]
+    
+    def __str__(self):
+        return f"{self.tutorial} - day {self.weekday} {self.start_minute}-{self.end_minute}"
+
+
+@receiver(post_save, sender=Tutorial)
+def rebuild_schedule_slots_on_tutorial_save(sender, instance, created, **kwargs):
+    from .schedule import rebuild_slots
+
+    if created or instance.changed_fields & Tutorial.schedule_fields:
+        rebuild_slots([instance])
+
+
+class CalendarFeedToken(models.Model):
+    """Secret token in a user's calendar subscription URL, see tutorials.calendar"""
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='calendar_feed_token')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Calendar feed of {self.user.email}"
+
+
+# Cached recommendation candidates hold tutorial details, not seat counts
+@receiver(post_save, sender=Tutorial)
+def invalidate_recommendations_on_tutorial_save(sender, instance, created, **kwargs):
+    from .recommendations import invalidate_candidates
+
+    if created or instance.changed_fields:
+        invalidate_candidates()
+
+@receiver(post_delete, sender=Tutorial)
+def invalidate_recommendations_on_tutorial_delete(sender, instance, **kwargs):
+    from .recommendations import invalidate_candidates
+
+    invalidate_candidates()
+
+
+# Cached calendar feeds list a user's registrations, tutorials and meetings
+@receiver(post_save, sender=Tutorial)
+def invalidate_feeds_on_tutorial_save(sender, instance, created, **kwargs):
+    from .calendar import invalidate_feeds
+
+    if created:
+        invalidate_feeds([instance.created_by_id])
+    elif instance.changed_fields & Tutorial.feed_fields:
+        invalidate_feeds([
+            instance.created_by_id,
+            *instance.registrations.values_list('student_id', flat=True)
+        ])
+
+@receiver(post_delete, sender=Tutorial)
+def invalidate_feeds_on_tutorial_delete(sender, instance, **kwargs):
+    from .calendar import invalidate_feeds
+
+    invalidate_feeds([instance.created_by_id])
+
+@receiver(post_save, sender=TutorialRegistration)
+@receiver(post_delete, sender=TutorialRegistration)
+def invalidate_feed_on_registration_change(sender, instance, **kwargs):
+    from .calendar import invalidate_feeds
+
+    invalidate_feeds([instance.student_id])
+
+
+# Cached token lookups let feeds be served without queries, so they are
+# dropped as soon as the token or its user stops being valid
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_feed_token_on_deactivation(sender, instance, created, **kwargs):
+    from .calendar import forget_tokens
+
+    if not created and 'is_active' in getattr(instance, 'changed_fields', set()) and not instance.is_active:
+        forget_tokens([instance.pk])
+
+@receiver(post_delete, sender=CalendarFeedToken)
+def forget_feed_token_on_delete(sender, instance, **kwargs):
+    from .calendar import token_cache_key
+
+    cache.delete(token_cache_key(instance.token))
@@ -0,0 +1,198 @@
+# tutorials/recommendations.py
+"""
+Tutorial recommendations for students.
+
+Candidates for a department are its active, unfinished tutorials plus
+tutorials of other departments. They are fetched once and kept in the
+shared default cache, behind a version key that a change to a tutorial's
+details bumps, so every worker drops its lists together. Seat counts move
+with every registration, so they are not cached: each recommendation reads
+them for its candidates in one primary key query. Each student's ranking
+is then done in memory from four signals: same department, topics matching
+their interests and skills, free seats, and how well the sessions fit
+their weekly availability.
+"""
+import re
+import time
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Tutorial, TutorialRegistration
+from .schedule import parse_availability, parse_days, parse_time_range
+
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = 'tutorials:candidates:version'
+
+# Tutorials from other departments kept per candidate list, soonest first
+OTHER_DEPARTMENTS_LIMIT = 100
+
+WEIGHTS = {
+    'department': 0.3,
+    'topics': 0.35,
+    'availability': 0.25,
+    'seats': 0.1,
+}
+
+# Score given for availability when the student hasn't filled it in
+UNKNOWN_AVAILABILITY = 0.5
+
+WORD_RE = re.compile(r'[a-z0-9+#]{3,}')
+
+
+def words(values):
+    return set(WORD_RE.findall(' '.join(str(value) for value in values or []).lower()))
+
+
+def candidates_version():
+    # A missing version (evicted or never set) starts a new one, so stale
+    # candidate lists are never read back
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def invalidate_candidates():
+    """Drop every cached candidate list, called when a tutorial's details change"""
+    cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def _candidate(tutorial):
+    return {
+        'id': tutorial.id,
+        'title': tutorial.title,
+        'description': tutorial.description,
+        'tutor': tutorial.tutor,
+        'department': tutorial.department,
+        'topics': tutorial.topics,
+        'topic_words': [words([topic]) for topic in tutorial.topics or []] or [words([tutorial.title])],
+        'days': tutorial.days,
+        'time': tutorial.time,
+        'weekdays': parse_days(tutorial.days),
+        'time_range': parse_time_range(tutorial.time),
+        'start_date': tutorial.start_date,
+        'end_date': tutorial.end_date,
+        'max_students': tutorial.max_students,
+    }
+
+
+def department_candidates(department):
+    """Cached candidate tutorials for students of ``department``"""
+    department = (department or '').strip()
+    key = f"tutorials:candidates:{candidates_version()}:{slugify(department) or '-'}"
+    candidates = cache.get(key)
+    if candidates is None:
+        tutorials = Tutorial.objects.filter(is_active=True, end_date__gte=timezone.localdate())
+        own = list(tutorials.filter(department__iexact=department)) if department else []
+        others = tutorials.exclude(department__iexact=department).order_by('start_date')[:OTHER_DEPARTMENTS_LIMIT]
+        candidates = [_candidate(tutorial) for tutorial in [*own, *others]]
+        cache.set(key, candidates, CACHE_TIMEOUT)
+    return candidates
+
+
+def seats_taken(tutorial_ids):
+    """{tutorial id: current registrations}, read fresh"""
+    return dict(Tutorial.objects.filter(pk__in=tutorial_ids).values_list('id', 'current_registrations'))
+
+
+def availability_fit(weekdays, time_range, windows):
+    """Share of a tutorial's weekdays that fall in the student's free windows, None if unknown"""
+    if not windows or not weekdays:
+        return None
+    fitting = 0
+    for weekday in weekdays:
+        for day, start, end in windows:
+            if day != weekday:
+                continue
+            if time_range is None or (start <= time_range[0] and time_range[1] <= end):
+                fitting += 1
+                break
+    return fitting / len(weekdays)
+
+
+def score_tutorial(candidate, department, interest_words, windows):
+    """(score, reasons) of one candidate for a student"""
+    reasons = []
+    same_department = candidate['department'].strip().lower() == department
+    if same_department:
+        reasons.append('Your department')
+
+    matched = [topic for topic in candidate['topic_words'] if topic & interest_words]
+    topic_score = len(matched) / len(candidate['topic_words']) if interest_words else 0
+    if matched:
+        reasons.append('Matches your interests')
+
+    fit = availability_fit(candidate['weekdays'], candidate['time_range'], windows)
+    if fit is None:
+        fit = UNKNOWN_AVAILABILITY
+    elif fit == 1:
+        reasons.append('Fits your availability')
+
+    seats_left = candidate['max_students'] - candidate['current_registrations']
+    seat_score = seats_left / candidate['max_students'] if candidate['max_students'] else 0
+
+    score = (
+        WEIGHTS['department'] * same_department
+        + WEIGHTS['topics'] * topic_score
+        + WEIGHTS['availability'] * fit
+        + WEIGHTS['seats'] * seat_score
+    )
+    return round(score, 4), reasons
+
+
+def recommend_tutorials(user, student=None, limit=6):
+    """
+    Ranked open tutorials for a student user, leaving out ones they are
+    registered for. ``student`` is their Student profile, if any.
+    """
+    candidates = department_candidates(user.department)
+    registered = set(
+        TutorialRegistration.objects.filter(student=user).exclude(
+            status='cancelled'
+        ).values_list('tutorial_id', flat=True)
+    )
+
+    department = (user.department or '').strip().lower()
+    interest_words = words(student.interests) | words(student.skills) if student else set()
+    windows = parse_availability(student.availability) if student else []
+    today = timezone.localdate()
+
+    taken = seats_taken([candidate['id'] for candidate in candidates])
+
+    ranked = []
+    for candidate in candidates:
+        if candidate['id'] not in taken:
+            continue
+        candidate = {**candidate, 'current_registrations': taken[candidate['id']]}
+        seats_left = candidate['max_students'] - candidate['current_registrations']
+        if candidate['id'] in registered or seats_left <= 0 or candidate['end_date'] < today:
+            continue
+        score, reasons = score_tutorial(candidate, department, interest_words, windows)
+        ranked.append((score, candidate, reasons))
+
+    ranked.sort(key=lambda item: (-item[0], item[1]['start_date'], item[1]['id']))
+    return [
+        {
+            'id': candidate['id'],
+            'title': candidate['title'],
+            'description': candidate['description'],
+            'tutor': candidate['tutor'],
+            'department': candidate['department'],
+            'topics': candidate['topics'],
+            'days': candidate['days'],
+            'time': candidate['time'],
+            'max_students': candidate['max_students'],
+            'current_registrations': candidate['current_registrations'],
+            'available_slots': candidate['max_students'] - candidate['current_registrations'],
+            'is_full': False,
+            'start_date': candidate['start_date'],
+            'end_date': candidate['end_date'],
+            'score': score,
+            'reasons': reasons,
+        }
+        for score, candidate, reasons in ranked[:limit]
+    ]
@@ -0,0 +1,233 @@
+# tutorials/schedule.py
+"""
+Parsing of the free-form Tutorial.days and Tutorial.time fields.
+
+``days`` is a list of weekday names ('Monday', 'mon', 'Tues') and ``time`` a
+range such as '14:00-16:00', '2pm - 4pm' or '9:30 to 11'. Weekdays are
+returned as 0 (Monday) to 6 (Sunday) and times as minutes after midnight.
+
+Each tutorial's sessions are stored as TutorialScheduleSlot rows, one per
+weekday, so registration clashes are a single indexed overlap query and a
+student's weekly timetable is a single join. Tutorials whose time can't be
+parsed get no slots and never clash.
+"""
+import re
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday']
+
+# Parts of the day students use in their availability
+DAY_PERIODS = {
+    'morning': (6 * 60, 12 * 60),
+    'afternoon': (12 * 60, 17 * 60),
+    'evening': (17 * 60, 22 * 60),
+}
+
+TIME_RE = re.compile(r'(\d{1,2})(?:[:.](\d{2}))?\s*(am|pm)?', re.IGNORECASE)
+RANGE_RE = re.compile(r'^\s*(.+?)\s*(?:-|–|to)\s*(.+?)\s*$', re.IGNORECASE)
+
+
+def parse_weekday(value):
+    """Weekday number for a day name or abbreviation of at least three letters, else None"""
+    name = str(value).strip().lower().rstrip('.')
+    if len(name) < 3:
+        return None
+    for number, weekday in enumerate(WEEKDAYS):
+        if weekday.startswith(name) or name == weekday + 's':
+            return number
+    return None
+
+
+def parse_days(days):
+    """Sorted weekday numbers of a Tutorial.days list, unknown names skipped"""
+    numbers = {parse_weekday(day) for day in days or []}
+    numbers.discard(None)
+    return sorted(numbers)
+
+
+def parse_clock(value, meridiem_hint=None):
+    """Minutes after midnight for '14:00', '2pm' or '9.30 am', else None"""
+    match = TIME_RE.fullmatch(value.strip())
+    if not match:
+        return None
+    hours, minutes, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3) or meridiem_hint
+    if meridiem:
+        if not 1 <= hours <= 12:
+            return None
+        hours = hours % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hours > 23 or minutes > 59:
+        return None
+    return hours * 60 + minutes
+
+
+def parse_time_range(value):
+    """
+    (start, end) in minutes after midnight for a Tutorial.time string, or
+    None if it can't be read. '2-4pm' takes the meridiem from the end time.
+    """
+    match = RANGE_RE.match(value or '')
+    if not match:
+        return None
+    end_match = TIME_RE.fullmatch(match.group(2))
+    end = parse_clock(match.group(2))
+    start = parse_clock(match.group(1), meridiem_hint=end_match.group(3) if end_match else None)
+    if start is None or end is None or end <= start:
+        return None
+    return start, end
+
+
+def day_period(start):
+    """'morning', 'afternoon' or 'evening' for a start time, None at night"""
+    for period, (begin, finish) in DAY_PERIODS.items():
+        if begin <= start < finish:
+            return period
+    return None
+
+
+def parse_availability(entries):
+    """
+    Weekly free windows as (weekday, start, end) from Student.availability.
+    Entries may be 'Monday', 'Mon morning', 'Tuesday 14:00-16:00' or dicts
+    with 'day' and 'time' keys; a bare day counts as free all day.
+    """
+    windows = []
+    for entry in entries or []:
+        if isinstance(entry, dict):
+            day, rest = entry.get('day', ''), str(entry.get('time', '') or entry.get('period', ''))
+        else:
+            day, _, rest = str(entry).strip().partition(' ')
+        weekday = parse_weekday(day)
+        if weekday is None:
+            continue
+
+        rest = rest.strip().lower()
+        if not rest:
+            windows.append((weekday, 0, 24 * 60))
+        elif rest in DAY_PERIODS:
+            windows.append((weekday, *DAY_PERIODS[rest]))
+        else:
+            time_range = parse_time_range(rest)
+            if time_range:
+                windows.append((weekday, *time_range))
+    return windows
+
+
+def format_minutes(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def slots_for(tutorial):
+    """Unsaved TutorialScheduleSlot rows for a tutorial's days and time"""
+    from .models import TutorialScheduleSlot
+
+    time_range = parse_time_range(tutorial.time)
+    if time_range is None:
+        return []
+    return [
+        TutorialScheduleSlot(
+            tutorial_id=tutorial.pk,
+            weekday=weekday,
+            start_minute=time_range[0],
+            end_minute=time_range[1],
+            start_date=tutorial.start_date,
+            end_date=tutorial.end_date
+        )
+        for weekday in parse_days(tutorial.days)
+    ]
+
+
+def rebuild_slots(tutorials):
+    """Replace the schedule slots of saved tutorials"""
+    from .models import TutorialScheduleSlot
+
+    with transaction.atomic():
+        TutorialScheduleSlot.objects.filter(tutorial__in=[tutorial.pk for tutorial in tutorials]).delete()
+        slots = [slot for tutorial in tutorials for slot in slots_for(tutorial)]
+        TutorialScheduleSlot.objects.bulk_create(slots, batch_size=1000)
+    return len(slots)
+
+
+def find_clashes(user, tutorial):
+    """
+    Tutorials ``user`` is registered for that meet at the same time as
+    ``tutorial`` on any shared weekday while both are running.
+    """
+    from .models import Tutorial, TutorialScheduleSlot
+
+    slots = slots_for(tutorial)
+    if not slots:
+        return []
+
+    overlaps = Q()
+    for slot in slots:
+        overlaps |= Q(
+            weekday=slot.weekday,
+            start_minute__lt=slot.end_minute,
+            end_minute__gt=slot.start_minute,
+            start_date__lte=slot.end_date,
+            end_date__gte=slot.start_date
+        )
+
+    clashing = TutorialScheduleSlot.objects.filter(overlaps).filter(
+        tutorial__is_active=True,
+        tutorial__registrations__student=user,
+        tutorial__registrations__status='registered'
+    ).exclude(tutorial_id=tutorial.pk).values_list('tutorial_id', flat=True)
+
+    return list(
+        Tutorial.objects.filter(pk__in=clashing).values('id', 'title', 'days', 'time').order_by('title')
+    )
+
+
+def weekly_timetable(user):
+    """
+    The weekly grid of a student's current registrations, one entry per day
+    that has sessions. Sessions overlapping another list its id under
+    ``clashes_with``.
+    """
+    from .models import TutorialScheduleSlot
+
+    slots = TutorialScheduleSlot.objects.filter(
+        tutorial__is_active=True,
+        tutorial__registrations__student=user,
+        tutorial__registrations__status='registered',
+        end_date__gte=timezone.localdate()
+    ).values(
+        'weekday', 'start_minute', 'end_minute', 'start_date', 'end_date',
+        'tutorial_id', 'tutorial__title', 'tutorial__tutor', 'tutorial__department'
+    ).order_by('weekday', 'start_minute', 'end_minute')
+
+    days = defaultdict(list)
+    for slot in slots:
+        days[slot['weekday']].append({
+            'tutorial_id': slot['tutorial_id'],
+            'title': slot['tutorial__title'],
+            'tutor': slot['tutorial__tutor'],
+            'department': slot['tutorial__department'],
+            'start': format_minutes(slot['start_minute']),
+            'end': format_minutes(slot['end_minute']),
+            'start_minute': slot['start_minute'],
+            'end_minute': slot['end_minute'],
+            'start_date': slot['start_date'],
+            'end_date': slot['end_date'],
+            'clashes_with': [],
+        })
+
+    grid = []
+    for weekday in sorted(days):
+        sessions = days[weekday]
+        # Sessions are sorted by start, so each only needs checking against
+        # the ones after it that start before it ends
+        for index, session in enumerate(sessions):
+            for other in sessions[index + 1:]:
+                if other['start_minute'] >= session['end_minute']:
+                    break
+                if other['start_date'] <= session['end_date'] and session['start_date'] <= other['end_date']:
+                    session['clashes_with'].append(other['tutorial_id'])
+                    other['clashes_with'].append(session['tutorial_id'])
+        grid.append({'day': WEEKDAYS[weekday].capitalize(), 'weekday': weekday, 'sessions': sessions})
+    return grid
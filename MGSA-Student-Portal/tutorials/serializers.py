@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import Tutorial, TutorialRegistration
+from .schedule import find_clashes
+from .services import RegistrationError, register_student
 from accounts.serializers import UserSerializer
 
 class TutorialSerializer(serializers.ModelSerializer):
@@ -32,9 +34,13 @@ class TutorialRegistrationSerializer(serializers.ModelSerializer):
         read_only_fields = ('student', 'registration_date')
 
 class TutorialRegistrationCreateSerializer(serializers.ModelSerializer):
+    # Register anyway when the tutorial clashes with another registration
+    allow_clash = serializers.BooleanField(write_only=True, required=False, default=False)
+    clashes = serializers.SerializerMethodField()
+    
     class Meta:
         model = TutorialRegistration
-        fields = ('tutorial',)
+        fields = ('tutorial', 'allow_clash', 'clashes')
     
     def validate(self, attrs):
         tutorial = attrs['tutorial']
@@ -47,21 +53,37 @@ class TutorialRegistrationCreateSerializer(serializers.ModelSerializer):
         if tutorial.is_full():
             raise serializers.ValidationError("This tutorial is full")
         
-        # Check if student is already registered
+        # Check if student is already registered; a cancelled registration
+        # is re-activated
         if TutorialRegistration.objects.filter(
             student=self.context['request'].user,
             tutorial=tutorial
-        ).exists():
+        ).exclude(status='cancelled').exists():
             raise serializers.ValidationError("You are already registered for this tutorial")
         
+        # Check for timetable clashes with the student's other tutorials
+        self.clash_list = find_clashes(self.context['request'].user, tutorial)
+        if self.clash_list and not attrs.get('allow_clash'):
+            raise serializers.ValidationError({
+                'tutorial': "This tutorial clashes with your timetable. Send allow_clash to register anyway.",
+                'clashes': [
+                    f"{clash['title']} ({', '.join(clash['days'])} {clash['time']})" for clash in self.clash_list
+                ]
+            })
+        
         return attrs
     
+    def get_clashes(self, obj):
+        return getattr(self, 'clash_list', [])
+    
     def create(self, validated_data):
-        validated_data['student'] = self.context['request'].user
-        
-        # Increment tutorial registration count
-        tutorial = validated_data['tutorial']
-        tutorial.current_registrations += 1
-        tutorial.save()
-        
-        return super().create(validated_data)
\ No newline at end of file
+        # Seats are checked again with the tutorial locked, and the
+        # registration count goes up in the same transaction
+        try:
+            return register_student(
+                self.context['request'].user,
+                validated_data['tutorial'],
+                allow_clash=validated_data.get('allow_clash', False)
+            )
+        except RegistrationError as e:
+            raise serializers.ValidationError({'tutorial': str(e)})
\ No newline at end of file
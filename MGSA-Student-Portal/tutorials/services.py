@@ -0,0 +1,223 @@
+# tutorials/services.py
+"""
+Registration status transitions.
+
+A registration moves registered -> attended or registered -> cancelled, and
+back again to undo a mistake or re-register. Moves that take a seat
+(re-registering) are refused when the tutorial is full or, unless
+allowed, when the session clashes with the student's other tutorials;
+register_student() applies the same checks to new registrations. Tutorials
+keep counters that follow the status of their registrations:
+
+    current_registrations  registered + attended (seats taken)
+    attended_count         attended
+    cancelled_count        cancelled
+
+A bulk transition is one UPDATE of the registrations plus one F() UPDATE
+per distinct counter delta, all in one transaction, so tutorial pages can
+read the counters instead of counting registrations.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from .models import Tutorial, TutorialRegistration
+
+TRANSITIONS = {
+    ('registered', 'attended'): {'attended_count': 1},
+    ('registered', 'cancelled'): {'current_registrations': -1, 'cancelled_count': 1},
+    ('attended', 'registered'): {'attended_count': -1},
+    ('cancelled', 'registered'): {'current_registrations': 1, 'cancelled_count': -1},
+}
+
+# Counter changes when a registration in a given status is deleted
+REMOVAL_DELTAS = {
+    'registered': {'current_registrations': -1},
+    'attended': {'current_registrations': -1, 'attended_count': -1},
+    'cancelled': {'cancelled_count': -1},
+}
+
+
+class RegistrationError(ValueError):
+    pass
+
+
+class InvalidTransition(RegistrationError):
+    pass
+
+
+class TutorialFull(InvalidTransition):
+    pass
+
+
+class ScheduleClash(InvalidTransition):
+    def __init__(self, message, clashes):
+        super().__init__(message)
+        self.clashes = clashes
+
+
+def allowed_sources(to_status):
+    return [source for source, target in TRANSITIONS if target == to_status]
+
+
+def _apply_counter_deltas(deltas_by_tutorial):
+    """
+    deltas_by_tutorial: {tutorial_id: {counter: delta}}. Tutorials with the
+    same deltas share one UPDATE.
+    """
+    from analytics.models import ContentIndex
+
+    groups = defaultdict(list)
+    for tutorial_id, deltas in deltas_by_tutorial.items():
+        deltas = tuple(sorted((field, delta) for field, delta in deltas.items() if delta))
+        if deltas:
+            groups[deltas].append(tutorial_id)
+
+    for deltas, tutorial_ids in groups.items():
+        Tutorial.objects.filter(pk__in=tutorial_ids).update(**{
+            field: Greatest(F(field) + delta, 0) for field, delta in deltas
+        })
+        registrations_delta = dict(deltas).get('current_registrations')
+        if registrations_delta:
+            ContentIndex.objects.filter(content_type='tutorial', object_id__in=tutorial_ids).update(
+                registration_count=Greatest(F('registration_count') + registrations_delta, 0)
+            )
+
+
+def _check_seats(seats_by_tutorial):
+    """
+    Lock the tutorials and raise TutorialFull unless each has the seats
+    asked for in ``seats_by_tutorial`` ({tutorial_id: seats}) free
+    """
+    tutorials = Tutorial.objects.select_for_update().filter(pk__in=list(seats_by_tutorial)).values_list(
+        'id', 'title', 'current_registrations', 'max_students'
+    )
+    for tutorial_id, title, taken, max_students in tutorials:
+        seats = seats_by_tutorial[tutorial_id]
+        if taken + seats > max_students:
+            free = max(max_students - taken, 0)
+            raise TutorialFull(
+                f"{title} is full" if not free else f"{title} has {free} free seats, {seats} needed"
+            )
+
+
+def _check_clashes(pairs):
+    """Raise ScheduleClash if any (student_id, tutorial) pair clashes with the student's timetable"""
+    from .schedule import find_clashes
+
+    for student_id, tutorial in pairs:
+        clashes = find_clashes(student_id, tutorial)
+        if clashes:
+            raise ScheduleClash(
+                f"{tutorial.title} clashes with " + ', '.join(clash['title'] for clash in clashes),
+                clashes
+            )
+
+
+def _after_change(student_ids):
+    from .calendar import invalidate_feeds
+
+    transaction.on_commit(lambda: invalidate_feeds(student_ids))
+
+
+def transition_registrations(registrations, to_status, allow_clash=False):
+    """
+    Move every registration in the ``registrations`` queryset that may
+    change to ``to_status`` and adjust the tutorial counters. Registrations
+    already in ``to_status`` or in a status that can't move there are left
+    alone. Nothing moves if a tutorial lacks the seats (TutorialFull) or,
+    without ``allow_clash``, a re-registration clashes (ScheduleClash).
+    Returns {'updated': n, 'skipped': n}.
+    """
+    sources = allowed_sources(to_status)
+    if not sources:
+        raise InvalidTransition(f"Registrations can't be moved to '{to_status}'")
+
+    with transaction.atomic():
+        rows = list(
+            registrations.select_for_update().values_list('id', 'tutorial_id', 'student_id', 'status')
+        )
+        movable = [row for row in rows if row[3] in sources]
+
+        deltas_by_tutorial = defaultdict(lambda: defaultdict(int))
+        for _, tutorial_id, _, status in movable:
+            for field, delta in TRANSITIONS[(status, to_status)].items():
+                deltas_by_tutorial[tutorial_id][field] += delta
+
+        seats = {
+            tutorial_id: deltas['current_registrations']
+            for tutorial_id, deltas in deltas_by_tutorial.items() if deltas['current_registrations'] > 0
+        }
+        if seats:
+            _check_seats(seats)
+            if not allow_clash:
+                tutorials = Tutorial.objects.in_bulk(list(seats))
+                _check_clashes(
+                    (student_id, tutorials[tutorial_id])
+                    for _, tutorial_id, student_id, status in movable
+                    if TRANSITIONS[(status, to_status)].get('current_registrations', 0) > 0
+                )
+
+        if movable:
+            TutorialRegistration.objects.filter(pk__in=[row[0] for row in movable]).update(status=to_status)
+            _apply_counter_deltas(deltas_by_tutorial)
+            _after_change({row[2] for row in movable})
+
+    return {'updated': len(movable), 'skipped': len(rows) - len(movable)}
+
+
+def transition_registration(registration, to_status, allow_clash=False):
+    """Move one registration, raising InvalidTransition (or a subclass) if it can't"""
+    if (registration.status, to_status) not in TRANSITIONS:
+        raise InvalidTransition(
+            f"A {registration.get_status_display().lower()} registration can't be marked {to_status}"
+        )
+    transition_registrations(TutorialRegistration.objects.filter(pk=registration.pk), to_status, allow_clash)
+    registration.status = to_status
+
+
+def register_student(student, tutorial, allow_clash=False):
+    """
+    Register ``student`` for ``tutorial``, or re-register them if they had
+    cancelled, taking a seat. Raises RegistrationError when the tutorial is
+    inactive or they already hold a place, TutorialFull or ScheduleClash.
+    Returns the registration.
+    """
+    if not tutorial.is_active:
+        raise RegistrationError("This tutorial is not active")
+
+    with transaction.atomic():
+        registration = TutorialRegistration.objects.select_for_update().filter(
+            student=student, tutorial=tutorial
+        ).first()
+        if registration is not None:
+            if registration.status != 'cancelled':
+                raise RegistrationError("You are already registered for this tutorial")
+            transition_registration(registration, 'registered', allow_clash)
+            return registration
+
+        _check_seats({tutorial.pk: 1})
+        if not allow_clash:
+            _check_clashes([(student.pk, tutorial)])
+        registration = TutorialRegistration.objects.create(student=student, tutorial=tutorial, status='registered')
+        _apply_counter_deltas({tutorial.pk: {'current_registrations': 1}})
+        _after_change({student.pk})
+    return registration
+
+
+def delete_registrations(registrations):
+    """Delete registrations and take them off their tutorials' counters"""
+    with transaction.atomic():
+        rows = list(registrations.select_for_update().values_list('id', 'tutorial_id', 'student_id', 'status'))
+        deltas_by_tutorial = defaultdict(lambda: defaultdict(int))
+        for _, tutorial_id, _, status in rows:
+            for field, delta in REMOVAL_DELTAS.get(status, {}).items():
+                deltas_by_tutorial[tutorial_id][field] += delta
+
+        TutorialRegistration.objects.filter(pk__in=[row[0] for row in rows]).delete()
+        _apply_counter_deltas(deltas_by_tutorial)
+        if rows:
+            _after_change({row[2] for row in rows})
+    return len(rows)
@@ -1,3 +1,385 @@
+import datetime
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.admin import CustomUserAdmin
+from accounts.models import User
+from students.models import Student
+from .bulk import create_tutorials
+from .calendar import feed_cache_key, get_feed, get_or_create_token, rotate_token
+from .models import Tutorial, TutorialRegistration, TutorialScheduleSlot
+from .recommendations import candidates_version, recommend_tutorials
+from .schedule import find_clashes, weekly_timetable
+from .services import (
+    InvalidTransition, RegistrationError, ScheduleClash, TutorialFull,
+    delete_registrations, register_student, transition_registration, transition_registrations
+)
+
+# A term running now, so the timetable (which skips finished tutorials) shows it
+START = timezone.localdate() - datetime.timedelta(days=30)
+END = timezone.localdate() + datetime.timedelta(days=90)
+
+
+class TutorialTestCase(TestCase):
+    def setUp(self):
+        self.executive = User.objects.create_user(
+            email='exec@example.com', password='secret-pass-123',
+            first_name='Exec', last_name='Test', gender='Male', role='Executive'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com', password='secret-pass-123',
+            first_name='Abdi', last_name='Kedir', gender='Male', role='Student'
+        )
+
+    def add_tutorial(self, title, days=('Monday',), time='14:00-16:00', max_students=10, **extra):
+        return Tutorial.objects.create(
+            title=title, tutor='Tutor', department=extra.pop('department', 'Computer Science'),
+            start_date=extra.pop('start_date', START), end_date=extra.pop('end_date', END),
+            days=list(days), time=time, max_students=max_students, created_by=self.executive, **extra
+        )
+
+    def register(self, tutorial, student=None, status='registered'):
+        return TutorialRegistration.objects.create(student=student or self.student, tutorial=tutorial, status=status)
+
+
+class ScheduleClashTests(TutorialTestCase):
+    def clash_ids(self, tutorial):
+        return [clash['id'] for clash in find_clashes(self.student, tutorial)]
+
+    def test_slots_follow_days_and_time(self):
+        tutorial = self.add_tutorial('Calculus', days=['Mon', 'Wednesday'], time='2pm - 4pm')
+
+        self.assertEqual(
+            list(TutorialScheduleSlot.objects.filter(tutorial=tutorial).values_list('weekday', 'start_minute', 'end_minute')),
+            [(0, 840, 960), (2, 840, 960)]
+        )
+
+        tutorial.time = 'whenever'
+        tutorial.save()
+        self.assertFalse(TutorialScheduleSlot.objects.filter(tutorial=tutorial).exists())
+
+    def test_overlapping_slots_clash(self):
+        registered = self.register(self.add_tutorial('Calculus', time='14:00-16:00')).tutorial
+
+        self.assertEqual(self.clash_ids(self.add_tutorial('Physics', time='15:00-17:00')), [registered.pk])
+        self.assertEqual(self.clash_ids(self.add_tutorial('Chemistry', time='14:30-15:00')), [registered.pk])
+        self.assertEqual(self.clash_ids(self.add_tutorial('Biology', time='13:00-17:00')), [registered.pk])
+
+    def test_adjacent_slots_do_not_clash(self):
+        self.register(self.add_tutorial('Calculus', time='14:00-16:00'))
+
+        self.assertEqual(self.clash_ids(self.add_tutorial('Physics', time='16:00-18:00')), [])
+        self.assertEqual(self.clash_ids(self.add_tutorial('Chemistry', time='12:00-14:00')), [])
+
+    def test_other_days_terms_and_statuses_do_not_clash(self):
+        self.register(self.add_tutorial('Calculus', time='14:00-16:00'))
+        self.register(self.add_tutorial('Algebra', days=['Tuesday'], time='10:00-12:00'), status='cancelled')
+
+        self.assertEqual(self.clash_ids(self.add_tutorial('Physics', days=['Tuesday'], time='14:00-16:00')), [])
+        self.assertEqual(self.clash_ids(self.add_tutorial('Statistics', days=['Tuesday'], time='10:00-12:00')), [])
+        self.assertEqual(self.clash_ids(self.add_tutorial(
+            'Chemistry', time='14:00-16:00',
+            start_date=END + datetime.timedelta(days=1), end_date=END + datetime.timedelta(days=120)
+        )), [])
+
+    def test_timetable_marks_clashing_sessions(self):
+        calculus = self.register(self.add_tutorial('Calculus', time='14:00-16:00')).tutorial
+        physics = self.register(self.add_tutorial('Physics', time='15:00-17:00')).tutorial
+        chemistry = self.register(self.add_tutorial('Chemistry', time='17:00-18:00')).tutorial
+
+        sessions = {session['tutorial_id']: session for session in weekly_timetable(self.student)[0]['sessions']}
+        self.assertEqual(sessions[calculus.pk]['clashes_with'], [physics.pk])
+        self.assertEqual(sessions[physics.pk]['clashes_with'], [calculus.pk])
+        self.assertEqual(sessions[chemistry.pk]['clashes_with'], [])
+
+
+class BulkCreateTests(TutorialTestCase):
+    def row(self, title, department='Computer Science'):
+        return {
+            'title': title, 'tutor': 'Tutor', 'department': department,
+            'start_date': START.isoformat(), 'end_date': END.isoformat(),
+            'days': ['Monday'], 'time': '14:00-16:00', 'max_students': 20,
+        }
+
+    def test_existing_tutorials_match_case_insensitively(self):
+        self.add_tutorial('Calculus Revision')
+
+        summary = create_tutorials(
+            enumerate([self.row('calculus revision', 'computer science'), self.row('Linear Algebra')], start=1),
+            self.executive, skip_invalid=True
+        )
+
+        self.assertEqual([result['status'] for result in summary['results']], ['invalid', 'created'])
+        self.assertEqual(Tutorial.objects.filter(title__iexact='calculus revision').count(), 1)
+
+    def test_duplicate_rows_are_rejected(self):
+        summary = create_tutorials(
+            enumerate([self.row('Calculus'), self.row('CALCULUS ')], start=1), self.executive, dry_run=True
+        )
+
+        self.assertEqual(summary['results'][1]['errors'], {'title': 'Duplicate of row 1.'})
+
+
+class RegistrationTransitionTests(TutorialTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tutorial = self.add_tutorial('Calculus', max_students=2)
+
+    def add_student(self, name):
+        return User.objects.create_user(
+            email=f'{name}@example.com', password='secret-pass-123',
+            first_name=name.title(), last_name='Test', gender='Female', role='Student'
+        )
+
+    def assertCounters(self, current, attended, cancelled, tutorial=None):
+        tutorial = Tutorial.objects.get(pk=(tutorial or self.tutorial).pk)
+        self.assertEqual(
+            (tutorial.current_registrations, tutorial.attended_count, tutorial.cancelled_count),
+            (current, attended, cancelled)
+        )
+
+    def test_counters_follow_each_transition(self):
+        registration = register_student(self.student, self.tutorial)
+        self.assertCounters(1, 0, 0)
+
+        transition_registration(registration, 'attended')
+        self.assertCounters(1, 1, 0)
+        transition_registration(registration, 'registered')
+        self.assertCounters(1, 0, 0)
+        transition_registration(registration, 'cancelled')
+        self.assertCounters(0, 0, 1)
+        transition_registration(registration, 'registered')
+        self.assertCounters(1, 0, 0)
+        self.assertEqual(TutorialRegistration.objects.get(pk=registration.pk).status, 'registered')
+
+    def test_disallowed_transitions_are_refused(self):
+        registration = register_student(self.student, self.tutorial)
+        transition_registration(registration, 'cancelled')
+
+        with self.assertRaises(InvalidTransition):
+            transition_registration(registration, 'attended')
+        with self.assertRaises(InvalidTransition):
+            transition_registrations(TutorialRegistration.objects.all(), 'unknown')
+        self.assertCounters(0, 0, 1)
+
+    def test_bulk_transition_skips_rows_that_cannot_move(self):
+        register_student(self.student, self.tutorial)
+        cancelled = register_student(self.add_student('hawi'), self.tutorial)
+        transition_registration(cancelled, 'cancelled')
+
+        result = transition_registrations(TutorialRegistration.objects.filter(tutorial=self.tutorial), 'attended')
+
+        self.assertEqual(result, {'updated': 1, 'skipped': 1})
+        self.assertCounters(1, 1, 1)
+
+    def test_deleting_takes_registrations_off_the_counters(self):
+        register_student(self.student, self.tutorial)
+        attended = register_student(self.add_student('hawi'), self.tutorial)
+        transition_registration(attended, 'attended')
+
+        self.assertEqual(delete_registrations(TutorialRegistration.objects.filter(tutorial=self.tutorial)), 2)
+        self.assertCounters(0, 0, 0)
+
+    def test_deleting_frees_seats_for_recommendations_and_refreshes_feeds(self):
+        cache.clear()
+        register_student(self.student, self.tutorial)
+        hawi = self.add_student('hawi')
+        register_student(hawi, self.tutorial)
+        lensa = self.add_student('lensa')
+        self.assertEqual(recommend_tutorials(lensa), [])
+        get_feed(hawi.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            delete_registrations(TutorialRegistration.objects.filter(student=hawi))
+
+        self.assertEqual([item['available_slots'] for item in recommend_tutorials(lensa)], [1])
+        self.assertIsNone(cache.get(feed_cache_key(hawi.pk)))
+
+    def test_full_tutorial_refuses_registration(self):
+        register_student(self.student, self.tutorial)
+        register_student(self.add_student('hawi'), self.tutorial)
+
+        with self.assertRaises(TutorialFull):
+            register_student(self.add_student('lensa'), self.tutorial)
+        self.assertCounters(2, 0, 0)
+        self.assertEqual(TutorialRegistration.objects.filter(tutorial=self.tutorial).count(), 2)
+
+    def test_re_registering_past_capacity_is_refused(self):
+        students = [self.student, self.add_student('hawi'), self.add_student('lensa')]
+        registrations = [register_student(student, self.tutorial) for student in students[:2]]
+        transition_registrations(TutorialRegistration.objects.filter(tutorial=self.tutorial), 'cancelled')
+        register_student(students[2], self.tutorial)
+
+        # One seat is free, two cancelled registrations ask for it
+        with self.assertRaises(TutorialFull):
+            transition_registrations(TutorialRegistration.objects.filter(tutorial=self.tutorial), 'registered')
+        self.assertCounters(1, 0, 2)
+
+        transition_registration(TutorialRegistration.objects.get(pk=registrations[0].pk), 'registered')
+        self.assertCounters(2, 0, 1)
+
+    def test_re_registering_checks_clashes(self):
+        registration = register_student(self.student, self.tutorial)
+        transition_registration(registration, 'cancelled')
+        register_student(self.student, self.add_tutorial('Physics', time='15:00-17:00'))
+
+        with self.assertRaises(ScheduleClash):
+            transition_registration(registration, 'registered')
+        self.assertCounters(0, 0, 1)
+
+        transition_registration(registration, 'registered', allow_clash=True)
+        self.assertCounters(1, 0, 0)
+
+    def test_register_reactivates_a_cancelled_registration(self):
+        registration = register_student(self.student, self.tutorial)
+        transition_registration(registration, 'cancelled')
+
+        self.assertEqual(register_student(self.student, self.tutorial).pk, registration.pk)
+        self.assertCounters(1, 0, 0)
+        with self.assertRaises(RegistrationError):
+            register_student(self.student, self.tutorial)
+
+    def test_views_go_through_the_state_machine(self):
+        self.client.force_login(self.student)
+        self.client.post('/tutorials/register/', {'tutorial_id': self.tutorial.pk}, secure=True)
+        self.assertCounters(1, 0, 0)
+
+        registration = TutorialRegistration.objects.get(student=self.student)
+        self.client.post(f'/tutorials/cancel/{registration.pk}/', secure=True)
+        self.assertCounters(0, 0, 1)
+
+        self.client.post('/tutorials/register/', {'tutorial_id': self.tutorial.pk}, secure=True)
+        self.assertCounters(1, 0, 0)
+
+
+class CalendarFeedTests(TutorialTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.tutorial = self.add_tutorial('Calculus', days=('Monday', 'Wednesday'), time='14:00-16:00')
+        self.register(self.tutorial)
+        self.token = get_or_create_token(self.student)
+
+    def feed(self, token=None, **headers):
+        return self.client.get(f'/api/tutorials/calendar/{token or self.token}.ics', secure=True, headers=headers)
+
+    def test_tutorials_are_weekly_floating_local_events(self):
+        response = self.feed()
+        body = response.content.decode()
+        # First Monday or Wednesday on or after the start date
+        first = min(START + datetime.timedelta(days=(weekday - START.weekday()) % 7) for weekday in (0, 2))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/calendar; charset=utf-8')
+        self.assertIn(f'DTSTART:{first:%Y%m%d}T140000\r\n', body)
+        self.assertIn(f'DTEND:{first:%Y%m%d}T160000\r\n', body)
+        self.assertIn(f'RRULE:FREQ=WEEKLY;BYDAY=MO,WE;UNTIL={END:%Y%m%d}T235959\r\n', body)
+        self.assertNotIn('TZID', body)
+        self.assertTrue(body.endswith('END:VCALENDAR\r\n'))
+
+    def test_matching_etag_gets_not_modified(self):
+        etag = self.feed()['ETag']
+
+        self.assertEqual(self.feed(if_none_match=etag).status_code, 304)
+
+        self.register(self.add_tutorial('Physics', days=('Friday',)))
+        response = self.feed(if_none_match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('SUMMARY:Physics', response.content.decode())
+
+    def test_token_is_required(self):
+        self.assertEqual(self.feed(token='unknown').status_code, 404)
+
+        old = self.token
+        self.feed()
+        self.token = rotate_token(self.student)
+        self.assertEqual(self.feed(token=old).status_code, 404)
+        self.assertEqual(self.feed().status_code, 200)
+
+    def test_deactivated_user_loses_the_feed(self):
+        self.assertEqual(self.feed().status_code, 200)
+
+        self.student.is_active = False
+        self.student.save()
+
+        self.assertEqual(self.feed().status_code, 404)
+
+    def test_admin_deactivation_drops_the_cached_token(self):
+        self.assertEqual(self.feed().status_code, 200)
+
+        with mock.patch.object(CustomUserAdmin, 'message_user'):
+            CustomUserAdmin(User, site).deactivate_users(None, User.objects.filter(pk=self.student.pk))
+
+        self.assertEqual(self.feed().status_code, 404)
+
+    def test_subscription_url_points_at_the_feed(self):
+        self.client.force_login(self.student)
+        response = self.client.get('/api/tutorials/calendar/', secure=True)
+
+        self.assertTrue(response.data['feed_url'].endswith(f'/calendar/{self.token}.ics'))
+        self.assertEqual(self.client.get(response.data['feed_url'], secure=True).status_code, 200)
+
+
+class RecommendationTests(TutorialTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.student.department = 'Computer Science'
+        self.student.save()
+        self.profile = Student.objects.get(user=self.student)
+        self.profile.interests = ['Python programming']
+        self.profile.save()
+
+    def recommend(self):
+        return recommend_tutorials(self.student, self.profile)
+
+    def test_ranking_prefers_department_and_interests(self):
+        python = self.add_tutorial('Python', topics=['Python'])
+        chemistry = self.add_tutorial('Chemistry', topics=['Chemistry'])
+        physics_python = self.add_tutorial('Scientific Python', topics=['Python'], department='Physics')
+        full = self.add_tutorial('Full', topics=['Python'], max_students=1)
+        registered = self.add_tutorial('Registered', topics=['Python'])
+        register_student(User.objects.create_user(
+            email='other@example.com', password='secret-pass-123',
+            first_name='Other', last_name='Student', gender='Female', role='Student'
+        ), full)
+        register_student(self.student, registered)
+
+        ranked = self.recommend()
+
+        self.assertEqual([item['id'] for item in ranked], [python.pk, physics_python.pk, chemistry.pk])
+        self.assertEqual(ranked[0]['reasons'], ['Your department', 'Matches your interests'])
+
+    def test_registrations_keep_the_cache_and_show_fresh_seats(self):
+        tutorial = self.add_tutorial('Python', topics=['Python'])
+        self.recommend()
+        version = candidates_version()
+
+        register_student(User.objects.create_user(
+            email='other@example.com', password='secret-pass-123',
+            first_name='Other', last_name='Student', gender='Female', role='Student'
+        ), tutorial)
+
+        # Registered tutorials and seat counts; the candidates come from the cache
+        with self.assertNumQueries(2):
+            ranked = self.recommend()
+        self.assertEqual(candidates_version(), version)
+        self.assertEqual(ranked[0]['available_slots'], 9)
+
+    def test_detail_changes_refresh_the_candidates(self):
+        tutorial = self.add_tutorial('Python', topics=['Python'])
+        self.recommend()
+        version = candidates_version()
+
+        tutorial.save()
+        self.assertEqual(candidates_version(), version)
 
-# Create your tests here.
+        tutorial.title = 'Python for beginners'
+        tutorial.save()
+        self.assertNotEqual(candidates_version(), version)
+        self.assertEqual(self.recommend()[0]['title'], 'Python for beginners')
@@ -7,4 +7,6 @@ urlpatterns = [
     path('registrations/', views.TutorialRegistrationListView.as_view(), name='tutorial-registration-list'),
     path('registrations/<int:pk>/', views.TutorialRegistrationDetailView.as_view(), name='tutorial-registration-detail'),
     path('my-registrations/', views.my_tutorial_registrations, name='my-tutorial-registrations'),
+    path('calendar/', views.calendar_subscription, name='calendar-subscription'),
+    path('calendar/<str:token>.ics', views.calendar_feed, name='calendar-feed'),
 ]
\ No newline at end of file
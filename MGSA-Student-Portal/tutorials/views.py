@@ -1,9 +1,16 @@
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Q
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.urls import reverse
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+from .calendar import get_feed, get_or_create_token, rotate_token, user_for_token
 from .models import Tutorial, TutorialRegistration
+from .services import InvalidTransition, delete_registrations, transition_registration
 from .serializers import (
     TutorialSerializer, TutorialCreateSerializer,
     TutorialRegistrationSerializer, TutorialRegistrationCreateSerializer
@@ -96,15 +103,22 @@ class TutorialRegistrationDetailView(generics.RetrieveUpdateDestroyAPIView):
         else:
             return TutorialRegistration.objects.filter(tutorial__created_by=self.request.user)
     
-    def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        
-        # Decrement tutorial registration count
-        tutorial = instance.tutorial
-        tutorial.current_registrations = max(0, tutorial.current_registrations - 1)
-        tutorial.save()
-        
-        return super().destroy(request, *args, **kwargs)
+    def perform_update(self, serializer):
+        # Status changes go through the state machine so counters follow
+        new_status = serializer.validated_data.pop('status', None)
+        instance = serializer.instance
+        if new_status and new_status != instance.status:
+            if self.request.user.role == 'Student' and new_status != 'cancelled':
+                raise permissions.PermissionDenied("Students can only cancel their registrations")
+            try:
+                transition_registration(instance, new_status)
+            except InvalidTransition as e:
+                raise ValidationError({'status': str(e)})
+        serializer.save()
+    
+    def perform_destroy(self, instance):
+        # Takes the registration off the tutorial's counters
+        delete_registrations(TutorialRegistration.objects.filter(pk=instance.pk))
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
@@ -124,4 +138,31 @@ def my_tutorial_registrations(request):
     return Response({
         'success': True,
         'registrations': serializer.data
-    })
\ No newline at end of file
+    })
+
+@api_view(['GET', 'POST'])
+@permission_classes([permissions.IsAuthenticated])
+def calendar_subscription(request):
+    """Calendar feed URL of the current user; POST replaces it with a new one"""
+    token = rotate_token(request.user) if request.method == 'POST' else get_or_create_token(request.user)
+    return Response({
+        'success': True,
+        'feed_url': request.build_absolute_uri(reverse('calendar-feed', kwargs={'token': token}))
+    })
+
+@require_GET
+def calendar_feed(request, token):
+    """iCalendar feed for calendar apps, authenticated by the token in the URL"""
+    user_id = user_for_token(token)
+    if user_id is None:
+        raise Http404('Unknown calendar feed')
+    
+    etag, body = get_feed(user_id)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='text/calendar; charset=utf-8')
+        response['Content-Disposition'] = 'inline; filename="mgsa.ics"'
+    response['ETag'] = etag
+    response['Cache-Control'] = 'private, max-age=300'
+    return response